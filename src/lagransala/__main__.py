@@ -1,14 +1,28 @@
 import asyncio
 import logging
+from datetime import datetime
+from pathlib import Path
 
 import typer
 from dotenv import load_dotenv
 
 from lagransala.applications import event_discovery as event_discovery_app
+from lagransala.applications import warm_event_discovery_cache
+from lagransala.shared.application import load_cache_metrics
+from lagransala.shared.infrastructure import (
+    CACHE_NAMESPACES,
+    RUN_METRICS_PATH,
+    collect_garbage,
+    get_cache_namespace,
+    parse_size,
+    summarize_cache,
+)
 
 load_dotenv()
 
 app = typer.Typer()
+cache_app = typer.Typer(help="Manage the local caches.")
+app.add_typer(cache_app, name="cache")
 
 
 @app.callback()
@@ -24,9 +38,127 @@ def callback(debug: bool = typer.Option(False, "--debug")):
 
 
 @app.command("event-discovery")
-def event_discovery():
+def event_discovery(
+    record: Path | None = typer.Option(
+        None, "--record", help="Record every fetch into this WARC file."
+    ),
+    replay: Path | None = typer.Option(
+        None, "--replay", help="Serve fetches from this WARC file, offline."
+    ),
+    replay_latency: float = typer.Option(
+        0.0, "--replay-latency", help="Seconds of simulated latency per replay."
+    ),
+):
     """Run the event discovery application."""
-    asyncio.run(event_discovery_app())
+    asyncio.run(
+        event_discovery_app(record=record, replay=replay, replay_latency=replay_latency)
+    )
+
+
+@cache_app.command("gc")
+def cache_gc(
+    path: Path | None = typer.Option(
+        None, "--path", help="Cache directory, instead of the cache namespaces."
+    ),
+    namespaces: list[str] | None = typer.Option(
+        None,
+        "--namespace",
+        help=f"Only this namespace: {', '.join(CACHE_NAMESPACES)}. Repeatable.",
+    ),
+    max_size: str | None = typer.Option(
+        None,
+        "--max-size",
+        help="Size budget, e.g. 500M or 2G, instead of the namespace budgets. "
+        "Least recently used entries go first.",
+    ),
+    dry_run: bool = typer.Option(
+        False, "--dry-run", help="Report what would be removed, remove nothing."
+    ),
+):
+    """Delete expired cache entries and enforce size budgets."""
+    try:
+        max_bytes = parse_size(max_size) if max_size is not None else None
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--max-size")
+    verb = "Would reclaim" if dry_run else "Reclaimed"
+
+    if path is not None:
+        report = collect_garbage(path, max_bytes=max_bytes, dry_run=dry_run)
+        typer.echo(f"{verb}: {report}")
+        return
+
+    try:
+        selected = [
+            get_cache_namespace(name) for name in namespaces or CACHE_NAMESPACES
+        ]
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--namespace")
+    for namespace in selected:
+        report = collect_garbage(
+            namespace.directory,
+            max_bytes=max_bytes if max_bytes is not None else namespace.max_bytes,
+            dry_run=dry_run,
+        )
+        typer.echo(f"{verb} from {namespace.name}: {report}")
+
+
+@cache_app.command("stats")
+def cache_stats(
+    namespaces: list[str] | None = typer.Option(
+        None,
+        "--namespace",
+        help=f"Only this namespace: {', '.join(CACHE_NAMESPACES)}. Repeatable.",
+    ),
+    metrics_path: Path = typer.Option(
+        Path(RUN_METRICS_PATH),
+        "--metrics",
+        help="Cache metrics saved by the last event discovery run.",
+    ),
+):
+    """Summarize the caches on disk and how the last run used them."""
+    try:
+        selected = [
+            get_cache_namespace(name) for name in namespaces or CACHE_NAMESPACES
+        ]
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--namespace")
+    for namespace in selected:
+        typer.echo(f"{namespace.name}: {summarize_cache(namespace.directory)}")
+
+    if not metrics_path.exists():
+        typer.echo("No metrics of a previous run.")
+        return
+    typer.echo("Last run:")
+    for label, metrics in load_cache_metrics(metrics_path).items():
+        typer.echo(f"  {label}: {metrics}")
+
+
+@cache_app.command("warm")
+def cache_warm(
+    refresh_within: float = typer.Option(
+        12.0,
+        "--refresh-within",
+        help="Also refresh cached pages expiring within this many hours.",
+    ),
+    max_in_flight: int = typer.Option(
+        2, "--max-in-flight", help="Maximum number of concurrent requests."
+    ),
+    at: datetime | None = typer.Option(
+        None,
+        "--at",
+        formats=["%Y-%m-%d", "%Y-%m-%dT%H:%M:%S"],
+        help="When the run to warm up for will start. Defaults to now.",
+    ),
+):
+    """Prefetch the listing pages the next event discovery run will need."""
+    report = asyncio.run(
+        warm_event_discovery_cache(
+            refresh_within=refresh_within * 3600,
+            max_in_flight=max_in_flight,
+            at=at,
+        )
+    )
+    typer.echo(f"Warmed: {report}")
 
 
 if __name__ == "__main__":
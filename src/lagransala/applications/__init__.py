@@ -1,3 +1,4 @@
 from .event_discovery.__main__ import main as event_discovery
+from .event_discovery.__main__ import warm as warm_event_discovery_cache
 
-__all__ = ["event_discovery"]
+__all__ = ["event_discovery", "warm_event_discovery_cache"]
@@ -1,6 +1,8 @@
 import asyncio
 import logging
 from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
 
 import aiohttp
 import instructor
@@ -17,10 +19,30 @@ from lagransala.schedule.domain import Venue
 from lagransala.scraper.application import pagination_elements
 from lagransala.scraper.domain.content_scraper_repo import ContentScraperRepo
 from lagransala.scraper.infrastructure import JsonContentScraperRepo, JsonPaginationRepo
-from lagransala.shared.application import extract_markdown
-from lagransala.shared.domain import coroutine_with_data
-from lagransala.shared.domain.fetcher import Response
-from lagransala.shared.infrastructure import FileCacheBackend
+from lagransala.shared.application import (
+    CACHE_METRICS,
+    Robots,
+    drain_refreshes,
+    extract_markdown,
+)
+from lagransala.shared.domain import FetchError, coroutine_with_data
+from lagransala.shared.domain.fetcher import Fetcher, Response
+from lagransala.shared.infrastructure import (
+    RUN_METRICS_PATH,
+    AdaptiveConcurrency,
+    BlobStore,
+    ConnectionStats,
+    DedupResponseCacheBackend,
+    InstrumentedCacheBackend,
+    RequestScheduler,
+    StoredResponse,
+    UrlFailure,
+    WarcRecordingFetcher,
+    WarcReplayFetcher,
+    WarmReport,
+    get_cache_namespace,
+    get_connection_profile,
+)
 from lagransala.shared.infrastructure.aiohttp_fetcher import AiohttpFetcher
 from lagransala.shared.infrastructure.initialize_sqlmodel import initialize_sqlmodel
 
@@ -62,7 +84,105 @@ class State:
         return extract_markdown(self.content, main_selector)
 
 
-async def main():
+async def fetch_or_none(fetcher: Fetcher, url: str) -> Response | None:
+    try:
+        return await fetcher.fetch(url)
+    except FetchError as e:
+        logger.warning("Skipping %s: %s", url, e)
+        return None
+
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+    "Accept": "text/html,application/xhtml+xml,application/xml;"
+    "q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Connection": "keep-alive",
+}
+
+
+def build_http_fetcher(
+    client: aiohttp.ClientSession,
+    scheduler: RequestScheduler,
+    adaptive_concurrency: AdaptiveConcurrency | None = None,
+) -> AiohttpFetcher:
+    http_cache = get_cache_namespace("http")
+    return AiohttpFetcher(
+        client,
+        scheduler=scheduler,
+        adaptive_concurrency=adaptive_concurrency,
+        cache_backend=InstrumentedCacheBackend(
+            http_cache.with_memory_tier(
+                # Identical pages under different URLs are stored once
+                DedupResponseCacheBackend(
+                    http_cache.file_backend(StoredResponse, "pages"),
+                    BlobStore(str(http_cache.path("blobs"))),
+                )
+            ),
+            label=http_cache.name,
+            # Cheaper than serializing every page
+            sizeof=lambda response: len(response.content),
+        ),
+        cache_ttl=http_cache.ttl,
+        # Serve day-old pages at once and revalidate them meanwhile
+        stale_while_revalidate=http_cache.stale_ttl,
+        allowed_content_types=(
+            "text/html",
+            "application/xhtml+xml",
+            "text/plain",  # robots.txt
+        ),
+        max_content_size=5 * 1024 * 1024,
+        failure_backend=http_cache.file_backend(UrlFailure, "failures"),
+    )
+
+
+def build_robots(fetcher: Fetcher, scheduler: RequestScheduler) -> Robots:
+    # robots.txt is cached, revalidated and kept on server errors by the
+    # fetcher's HTTP cache, so it is not cached a second time here
+    return Robots(
+        fetcher,
+        on_crawl_delay=lambda host, delay: scheduler.set_host_limits(host, delay=delay),
+    )
+
+
+async def warm(
+    refresh_within: float = 3600 * 12,
+    max_in_flight: int = 2,
+    at: datetime | None = None,
+) -> WarmReport:
+    """
+    Prefetch the listing pages of every pagination in the seeds that are not
+    cached, or that expire within `refresh_within` seconds, a few at a time.
+    Run it off-peak before a run at `at` (by default now), so the run meets a
+    hot cache. Pages of DAY and MONTH paginations depend on the date.
+    """
+    pagination_repo = JsonPaginationRepo("./seeds/paginations.json")
+    urls = [
+        str(url) for pagination in pagination_repo.get() for url in pagination.urls(at)
+    ]
+
+    async with get_connection_profile("venues").client_session(
+        headers=HEADERS
+    ) as client:
+        # One request per host at a time: warming is not in a hurry
+        scheduler = RequestScheduler(max_concurrency=max_in_flight, max_per_host=1)
+        fetcher = build_http_fetcher(client, scheduler)
+        robots = build_robots(fetcher, scheduler)
+        report = await fetcher.warm(
+            await robots.filter(urls),
+            refresh_within=refresh_within,
+            max_in_flight=max_in_flight,
+        )
+        await fetcher.drain_refreshes()
+    logger.info("Cache warm-up: %s", report)
+    return report
+
+
+async def main(
+    record: Path | None = None,
+    replay: Path | None = None,
+    replay_latency: float = 0.0,
+):
 
     db_engine = initialize_sqlmodel("sqlite:///./lagransala.db")
 
@@ -71,20 +191,26 @@ async def main():
         venues = session.exec(select(Venue).order_by(Venue.name)).all()
         logger.info("Found %d venues", len(venues))
 
-    async with aiohttp.ClientSession(
-        headers={
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
-            "Accept": "text/html,application/xhtml+xml,application/xml;"
-            "q=0.9,image/webp,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Connection": "keep-alive",
-        }
+    extract_cache = get_cache_namespace("extract")
+
+    connection_stats = ConnectionStats()
+    async with get_connection_profile("venues").client_session(
+        stats=connection_stats, headers=HEADERS
     ) as client:
-        fetcher = AiohttpFetcher(
-            client,
-            cache_backend=FileCacheBackend(Response, cache_dir=".cache/extract"),
-            cache_ttl=3600 * 24,  # 1 day
-        )
+        scheduler = RequestScheduler(max_concurrency=24, max_per_host=4)
+        adaptive_concurrency = AdaptiveConcurrency(initial=4, max_limit=16)
+        fetcher: Fetcher
+        http_fetcher: AiohttpFetcher | None = None
+        if replay is not None:
+            fetcher = WarcReplayFetcher(replay, latency=replay_latency)
+        else:
+            fetcher = http_fetcher = build_http_fetcher(
+                client, scheduler, adaptive_concurrency
+            )
+        if record is not None:
+            fetcher = WarcRecordingFetcher(fetcher, record)
+
+        robots = build_robots(fetcher, scheduler)
 
         pagination_repo = JsonPaginationRepo("./seeds/paginations.json")
 
@@ -94,7 +220,7 @@ async def main():
 
         for venue in venues:
             pagination = get_venue_pagination(pagination_repo, venue)
-            urls = await pagination_elements(fetcher, pagination)
+            urls = await pagination_elements(fetcher, pagination, robots)
             logger.info("Found %d pages for venue '%s'", len(urls), venue.name)
             for url in urls:
                 state.append(State(url=url, venue=venue))
@@ -104,14 +230,22 @@ async def main():
         tasks = [
             asyncio.create_task(
                 coroutine_with_data(
-                    fetcher.fetch(el.url),
+                    fetch_or_none(fetcher, el.url),
                     el,
-                    lambda content, el: el.with_content(content.content),
+                    lambda response, el: (
+                        el.with_content(response.content) if response else None
+                    ),
                 )
             )
             for el in state
         ]
-        state = await asyncio.gather(*tasks)
+        state = [el for el in await asyncio.gather(*tasks) if el is not None]
+
+        if http_fetcher is not None:
+            await http_fetcher.drain_refreshes()
+
+    logger.info("Connections: %s", connection_stats)
+    logger.info("Concurrency per host: %s", adaptive_concurrency.windows())
 
     logger.info("3. Extracting events")
 
@@ -121,23 +255,23 @@ async def main():
         instructor_client,
         "gemini/gemini-2.5-flash",
         AsyncLimiter(15),
-        cache_backend=FileCacheBackend(
-            EventExtractionResult, cache_dir=".cache/extract"
+        cache_backend=InstrumentedCacheBackend(
+            extract_cache.with_memory_tier(
+                extract_cache.file_backend(EventExtractionResult)
+            ),
+            label=extract_cache.name,
         ),
+        cache_ttl=extract_cache.ttl,
     )
 
     content_scraper_repo = JsonContentScraperRepo("./seeds/content_scrapers.json")
 
-    tasks = [
-        asyncio.create_task(
-            coroutine_with_data(
-                event_extractor.extract(el.md_content(content_scraper_repo) or ""),
-                el,
-                lambda result, el: el.with_extraction_result(result),
-            )
-        )
-        for el in state
-        if el.md_content is not None
-    ]
+    results = await event_extractor.extract_many(
+        [el.md_content(content_scraper_repo) or "" for el in state]
+    )
+    state = [el.with_extraction_result(result) for el, result in zip(state, results)]
+    await drain_refreshes()
 
-    state = await asyncio.gather(*tasks)
+    for label, metrics in CACHE_METRICS.snapshot().items():
+        logger.info("Cache %s: %s", label, metrics)
+    CACHE_METRICS.save(RUN_METRICS_PATH)
@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 
 import instructor
@@ -5,7 +6,7 @@ from aiolimiter import AsyncLimiter
 from tenacity import AsyncRetrying, stop_after_attempt
 
 from lagransala.extractor.domain import EventExtractionResult
-from lagransala.shared.application.caching import cached
+from lagransala.shared.application.caching import KeyBuilder, cached
 from lagransala.shared.domain.caching import CacheBackend
 
 
@@ -17,6 +18,7 @@ class InstructorEventExtractor:
         limiter: AsyncLimiter | None = None,
         cache_backend: CacheBackend[EventExtractionResult] | None = None,
         cache_ttl: int | None = None,
+        cache_soft_ttl: int | None = None,
     ):
         self.system_prompt = """
             You are an event extractor.
@@ -42,14 +44,39 @@ class InstructorEventExtractor:
         self._cache_backend = cache_backend
         self._cache_ttl = cache_ttl
 
+        self._key_builder = KeyBuilder(self._extract)
         if self._cache_backend is not None:
             self.extract = cached(
                 backend=self._cache_backend,
                 ttl=cache_ttl,
+                soft_ttl=cache_soft_ttl,
+                single_flight=True,
             )(self._extract)
         else:
             self.extract = self._extract
 
+    async def extract_many(self, contents: list[str]) -> list[EventExtractionResult]:
+        """
+        Extract the events of several pages. Cached results are looked up in a
+        single batch and only the rest is sent to the model.
+        """
+        hits: dict[str, EventExtractionResult] = {}
+        if self._cache_backend is not None and contents:
+            keys = {
+                self._key_builder.key((content,), {}): content for content in contents
+            }
+            entries = await self._cache_backend.get_many(keys)
+            hits = {
+                keys[key]: entry.value
+                for key, entry in entries.items()
+                if not entry.is_stale()
+            }
+
+        misses = [content for content in dict.fromkeys(contents) if content not in hits]
+        extracted = await asyncio.gather(*[self.extract(content) for content in misses])
+        results = {**hits, **dict(zip(misses, extracted))}
+        return [results[content] for content in contents]
+
     async def _extract(
         self, content: str, _context: dict[str, str] | None = None
     ) -> EventExtractionResult:
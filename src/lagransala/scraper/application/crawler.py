@@ -8,8 +8,9 @@ from urllib.parse import urljoin, urlparse
 from pydantic import HttpUrl, ValidationError
 
 from lagransala.scraper.domain.crawler import CrawlResult
+from lagransala.shared.application.robots import Robots
 from lagransala.shared.application.urls import extract_urls
-from lagransala.shared.domain.fetcher import Fetcher
+from lagransala.shared.domain.fetcher import Fetcher, FetchError
 
 logger = logging.getLogger(__name__)
 
@@ -29,9 +30,11 @@ class Crawler:
         fetcher: Fetcher,
         max_concurrency: int = 5,
         url_filter: Callable[[HttpUrl], bool] = lambda _: True,
+        robots: Robots | None = None,
     ) -> None:
         self.fetcher = fetcher
         self.url_filter = url_filter
+        self.robots = robots
         self._start_url_host: str
         self._visited: set[HttpUrl] = set()
         self._processed_urls: set[HttpUrl] = set()
@@ -40,10 +43,14 @@ class Crawler:
         self._semaphore = asyncio.Semaphore(max_concurrency)
 
     async def _fetch_and_extract(self, url: HttpUrl) -> None:
-        async with self._semaphore:
-            response = await self.fetcher.fetch(str(url))
+        try:
+            async with self._semaphore:
+                response = await self.fetcher.fetch(str(url))
+        except FetchError as e:
+            logger.debug("Skipping %s: %s", url, e)
+            return
 
-        if response.status != 200:
+        if response.status != 200 or response.discarded:
             return
 
         if "text/html" not in response.content_type:
@@ -64,8 +71,14 @@ class Crawler:
                 continue
 
             host = urlparse(str(next_url)).netloc
+            if host != self._start_url_host:
+                continue
+            if self.robots is not None and not await self.robots.can_fetch(
+                str(next_url)
+            ):
+                continue
             async with self._lock:
-                if next_url not in self._visited and host == self._start_url_host:
+                if next_url not in self._visited:
                     self._visited.add(next_url)
                     await self._queue.put(next_url)
 
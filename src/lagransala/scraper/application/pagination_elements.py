@@ -1,22 +1,30 @@
 import logging
 from typing import Pattern
 
-from lagransala.shared.application import absolutize_url, extract_urls
-from lagransala.shared.domain import Fetcher
+from lagransala.shared.application import Robots, absolutize_url, extract_urls
+from lagransala.shared.domain import Fetcher, FetchError
 
 from ..domain import Pagination
 
 logger = logging.getLogger(__name__)
 
 
-async def pagination_elements(fetcher: Fetcher, pagination: Pagination) -> set[str]:
+async def pagination_elements(
+    fetcher: Fetcher, pagination: Pagination, robots: Robots | None = None
+) -> set[str]:
     result: set[str] = set()
     logger.debug("Fetching paginated pages for venue_slug '%s'", pagination.venue_slug)
     urls = [str(url) for url in pagination.urls()]
-    responses = await fetcher.fetch_urls(urls)
+    if robots is not None:
+        urls = await robots.filter(urls)
 
-    for response in responses:
+    async for url, response in fetcher.iter_fetch(urls):
+        if isinstance(response, FetchError):
+            logger.warning("Skipping paginated page %s: %s", url, response)
+            continue
         extracted = extract_urls(response.content, pagination.element_url_pattern)
-        for url in extracted:
-            result.add(absolutize_url(str(pagination.base_url), url))
+        for element_url in extracted:
+            result.add(absolutize_url(str(pagination.base_url), element_url))
+    if robots is not None:
+        result = set(await robots.filter(result))
     return result
@@ -57,7 +57,9 @@ class Pagination(BaseModel):
                 assert self.limit is not None, "Month pagination limit must be set"
         return self
 
-    def urls(self) -> list[HttpUrl]:
+    def urls(self, now: datetime | None = None) -> list[HttpUrl]:
+        """Page URLs as of `now`, by default the current time."""
+        now = now or datetime.now()
         match self.type:
             case PaginationType.NONE | None:
                 return [HttpUrl(self.url)]
@@ -74,7 +76,7 @@ class Pagination(BaseModel):
             case PaginationType.DAY:
                 assert self.date_format is not None
                 assert self.limit is not None
-                today = datetime.now().replace(minute=0, hour=0, second=0)
+                today = now.replace(minute=0, hour=0, second=0)
                 result: list[HttpUrl] = []
                 for i in range(0, self.limit):
                     date = today + timedelta(days=i)
@@ -84,11 +86,14 @@ class Pagination(BaseModel):
             case PaginationType.MONTH:
                 assert self.date_format is not None
                 assert self.limit is not None
-                month_start = datetime.now().replace(day=1, minute=0, hour=0, second=0)
+                month_start = now.replace(day=1, minute=0, hour=0, second=0)
                 current_month = month_start.month
                 result: list[HttpUrl] = []
                 for i in range(0, self.limit):
-                    month = month_start.replace(month=current_month + i)
+                    years, month_index = divmod(current_month - 1 + i, 12)
+                    month = month_start.replace(
+                        year=month_start.year + years, month=month_index + 1
+                    )
                     url = HttpUrl(
                         self.url.format(month=month.strftime(self.date_format))
                     )
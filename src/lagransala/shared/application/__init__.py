@@ -1,14 +1,33 @@
 from .build_sqlmodel_type import build_sqlmodel_list_type, build_sqlmodel_type
-from .caching import cached, generate_key
+from .cache_metrics import (
+    CACHE_METRICS,
+    CacheMetrics,
+    CacheMetricsRegistry,
+    LatencyHistogram,
+    load_cache_metrics,
+)
+from .caching import KeyBuilder, cached, drain_refreshes, generate_key
 from .markdown import extract_markdown
+from .robots import Robots, RobotsRules
+from .single_flight import SingleFlight
 from .urls import absolutize_url, extract_urls
 
 __all__ = [
     "absolutize_url",
     "build_sqlmodel_list_type",
     "build_sqlmodel_type",
+    "CACHE_METRICS",
+    "CacheMetrics",
+    "CacheMetricsRegistry",
     "cached",
+    "drain_refreshes",
     "extract_markdown",
     "extract_urls",
     "generate_key",
+    "KeyBuilder",
+    "LatencyHistogram",
+    "load_cache_metrics",
+    "Robots",
+    "RobotsRules",
+    "SingleFlight",
 ]
@@ -0,0 +1,124 @@
+import json
+from bisect import bisect_left
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+@dataclass
+class LatencyHistogram:
+    """Counts of latencies per bucket, the last one for anything slower."""
+
+    counts: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    total: float = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the `q` quantile, None if empty."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip((*LATENCY_BUCKETS, float("inf")), self.counts):
+            seen += count
+            if count and seen >= rank:
+                return bound
+        return None
+
+    def __str__(self) -> str:
+        if not self.count:
+            return "-"
+        mean = self.total / self.count
+        return (
+            f"mean {_format_seconds(mean)}, p50 ≤ "
+            f"{_format_seconds(self.quantile(0.5))}, "
+            f"p99 ≤ {_format_seconds(self.quantile(0.99))}"
+        )
+
+
+def _format_seconds(seconds: float | None) -> str:
+    if seconds is None or seconds == float("inf"):
+        return f"> {LATENCY_BUCKETS[-1]:g}s"
+    return f"{seconds * 1000:g}ms"
+
+
+@dataclass
+class CacheMetrics:
+    hits: int = 0
+    misses: int = 0
+    stale_hits: int = 0
+    sets: int = 0
+    deletes: int = 0
+    evictions: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    get_latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    set_latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    @property
+    def hit_ratio(self) -> float:
+        """Hits, stale or not, over lookups."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "CacheMetrics":
+        return cls(
+            **{
+                **data,
+                "get_latency": LatencyHistogram(**data["get_latency"]),
+                "set_latency": LatencyHistogram(**data["set_latency"]),
+            }
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"{self.hits} hits ({self.stale_hits} stale), {self.misses} misses "
+            f"({self.hit_ratio:.0%} hit ratio), {self.sets} sets, "
+            f"{self.evictions} evictions, {self.bytes_read} bytes read, "
+            f"{self.bytes_written} bytes written; get {self.get_latency}; "
+            f"set {self.set_latency}"
+        )
+
+
+class CacheMetricsRegistry:
+    """Cache metrics by label: a cached function or a cache backend."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, CacheMetrics] = {}
+
+    def labels(self, label: str) -> CacheMetrics:
+        metrics = self._metrics.get(label)
+        if metrics is None:
+            metrics = self._metrics[label] = CacheMetrics()
+        return metrics
+
+    def snapshot(self) -> dict[str, CacheMetrics]:
+        return dict(self._metrics)
+
+    def reset(self) -> None:
+        self._metrics.clear()
+
+    def save(self, path: Path | str) -> None:
+        """Write the metrics as JSON, for `load_cache_metrics`."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {label: asdict(metrics) for label, metrics in self._metrics.items()}
+        path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def load_cache_metrics(path: Path | str) -> dict[str, CacheMetrics]:
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {label: CacheMetrics.from_dict(metrics) for label, metrics in data.items()}
+
+
+# Metrics of every cached function and instrumented backend in the process
+CACHE_METRICS = CacheMetricsRegistry()
@@ -1,39 +1,174 @@
+import asyncio
 import functools
 import hashlib
 import inspect
 import json
 import logging
+import math
+import random
+import time
+from json.encoder import encode_basestring_ascii
 from typing import Any, Callable, Concatenate, Coroutine, ParamSpec, TypeVar
 
 from pydantic import BaseModel
 
 from lagransala.shared.domain.caching import CacheBackend, Data
 
+from .cache_metrics import CACHE_METRICS, CacheMetricsRegistry
+from .single_flight import SingleFlight
+
 P = ParamSpec("P")
 R = TypeVar("R", bound=BaseModel)
 
 logger = logging.getLogger(__name__)
 
 
-def _get_filtered_args(
-    func: Callable[..., Any],
-    args: tuple[Any, ...],
-    kwargs: dict[str, Any],
-    key_params: list[str] | None,
-) -> dict[str, Any]:
-    """Bind arguments to the function signature and filter them based on key_params."""
-    sig = inspect.signature(func)
-    bound_args = sig.bind_partial(*args, **kwargs)
-    bound_args.apply_defaults()
-
-    if not key_params:
+_encoder = json.JSONEncoder(sort_keys=True, default=str)
+
+
+def _encode_float(value: float) -> str:
+    if value != value:
+        return "NaN"
+    if value in (math.inf, -math.inf):
+        return "Infinity" if value > 0 else "-Infinity"
+    return float.__repr__(value)
+
+
+# JSON for the common argument types, written as `_encoder` would write them
+_PRIMITIVES: dict[type, Callable[[Any], str]] = {
+    str: encode_basestring_ascii,
+    int: int.__repr__,
+    float: _encode_float,
+    bool: lambda value: "true" if value else "false",
+    type(None): lambda value: "null",
+}
+
+
+_POSITIONAL = (
+    inspect.Parameter.POSITIONAL_ONLY,
+    inspect.Parameter.POSITIONAL_OR_KEYWORD,
+)
+
+
+class KeyBuilder:
+    """
+    Generates cache keys for calls to a function. The signature is resolved once,
+    and calls without *args/**kwargs are bound without `inspect`. Arguments
+    that are all str, int, float, bool or None are serialized without
+    building the key data for `json`, to the same string.
+    """
+
+    def __init__(self, func: Callable[..., Any], key_params: list[str] | None = None):
+        self.func_name = f"{func.__module__}.{func.__qualname__}"
+        self._func_json = encode_basestring_ascii(self.func_name)
+        self._signature = inspect.signature(func)
+        self._key_params = key_params
+        params = list(self._signature.parameters.values())
+        self._names = [p.name for p in params]
+        self._parameters = set(self._names)
+        self._positional = [p.name for p in params if p.kind in _POSITIONAL]
+        self._positional_only = {
+            p.name for p in params if p.kind == inspect.Parameter.POSITIONAL_ONLY
+        }
+        self._keyword_only = [
+            p.name for p in params if p.kind == inspect.Parameter.KEYWORD_ONLY
+        ]
+        self._defaults = {p.name: p.default for p in params if p.default is not p.empty}
+        self._simple = all(
+            p.kind in _POSITIONAL or p.kind == inspect.Parameter.KEYWORD_ONLY
+            for p in params
+        )
+
+    def _fast_bind(
+        self, args: tuple[Any, ...], kwargs: dict[str, Any]
+    ) -> dict[str, Any] | None:
+        if not self._simple or len(args) > len(self._positional):
+            return None
+        bound = dict(zip(self._positional, args))
+        for name, value in kwargs.items():
+            if (
+                name in bound
+                or name in self._positional_only
+                or name not in self._parameters
+            ):
+                # Left to `inspect` to raise the usual TypeError
+                return None
+            bound[name] = value
+        for name, default in self._defaults.items():
+            bound.setdefault(name, default)
+        if len(bound) != len(self._names):
+            # Missing arguments
+            return None
+        return {name: bound[name] for name in self._names}
+
+    def _bind(self, args: tuple[Any, ...], kwargs: dict[str, Any]) -> dict[str, Any]:
+        """Bind the call arguments by name, with defaults applied."""
+        arguments = self._fast_bind(args, kwargs)
+        if arguments is not None:
+            return arguments
+        bound_args = self._signature.bind_partial(*args, **kwargs)
+        bound_args.apply_defaults()
         return bound_args.arguments
 
-    filtered_args = {}
-    for param_name in key_params:
-        if param_name in bound_args.arguments:
-            filtered_args[param_name] = bound_args.arguments[param_name]
-    return filtered_args
+    def arguments(
+        self, args: tuple[Any, ...], kwargs: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Bind the arguments and filter them based on key_params."""
+        arguments = self._bind(args, kwargs)
+        if not self._key_params:
+            return arguments
+        return {name: arguments[name] for name in self._key_params if name in arguments}
+
+    def key(self, args: tuple[Any, ...], kwargs: dict[str, Any]) -> str:
+        # If key_params are not specified, the key is based on all args and kwargs
+        if not self._key_params:
+            arguments = self._fast_bind(args, kwargs)
+            if arguments is not None:
+                positional = [arguments[name] for name in self._positional]
+                keyword = [(name, arguments[name]) for name in self._keyword_only]
+            else:
+                bound_args = self._signature.bind_partial(*args, **kwargs)
+                bound_args.apply_defaults()
+                positional = list(bound_args.args)
+                keyword = list(bound_args.kwargs.items())
+            serialized = self._serialize(positional, sorted(keyword))
+        else:
+            serialized = self._serialize(
+                None, sorted(self.arguments(args, kwargs).items())
+            )
+
+        # Hash the JSON string for a clean, fixed-length key
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def _serialize(
+        self, positional: list[Any] | None, keyword: list[tuple[str, Any]]
+    ) -> str:
+        """The key data as JSON, as `_encoder` would write it."""
+        args = []
+        for value in positional or ():
+            encode = _PRIMITIVES.get(type(value))
+            if encode is None:
+                return self._encode(positional, keyword)
+            args.append(encode(value))
+        kwargs = []
+        for name, value in keyword:
+            encode = _PRIMITIVES.get(type(value))
+            if encode is None:
+                return self._encode(positional, keyword)
+            kwargs.append(f"[{encode_basestring_ascii(name)}, {encode(value)}]")
+
+        serialized = f'"func": {self._func_json}, "kwargs": [{", ".join(kwargs)}]}}'
+        if positional is None:
+            return "{" + serialized
+        return f'{{"args": [{", ".join(args)}], {serialized}'
+
+    def _encode(
+        self, positional: list[Any] | None, keyword: list[tuple[str, Any]]
+    ) -> str:
+        key_data: dict[str, Any] = {"func": self.func_name, "kwargs": keyword}
+        if positional is not None:
+            key_data["args"] = positional
+        return _encoder.encode(key_data)
 
 
 def generate_key(
@@ -43,26 +178,16 @@ def generate_key(
     key_params: list[str] | None = None,
 ) -> str:
     """Generate a cache key from a function and its arguments."""
-    func_name = f"{func.__module__}.{func.__qualname__}"
+    return KeyBuilder(func, key_params).key(args, kwargs)
 
-    relevant_args = _get_filtered_args(func, args, kwargs, key_params)
 
-    # If key_params are not specified, the key is based on all args and kwargs
-    if not key_params:
-        sig = inspect.signature(func)
-        bound_args = sig.bind_partial(*args, **kwargs)
-        bound_args.apply_defaults()
-        key_data = {
-            "func": func_name,
-            "args": bound_args.args,
-            "kwargs": sorted(bound_args.kwargs.items()),
-        }
-    else:
-        key_data = {"func": func_name, "kwargs": sorted(relevant_args.items())}
+_refreshes: set[asyncio.Task[Any]] = set()
+
 
-    # Serialize to a JSON string and hash it for a clean, fixed-length key
-    serialized_data = json.dumps(key_data, sort_keys=True, default=str).encode("utf-8")
-    return hashlib.sha256(serialized_data).hexdigest()
+async def drain_refreshes() -> None:
+    """Wait for the background refreshes started by `cached` functions."""
+    while _refreshes:
+        await asyncio.gather(*_refreshes, return_exceptions=True)
 
 
 def cached(
@@ -70,40 +195,105 @@ def cached(
     ttl: float | None = None,
     key_func: Callable[Concatenate[Callable[P, Any], P], str] | None = None,
     key_params: list[str] | None = None,
+    single_flight: bool = False,
+    soft_ttl: float | None = None,
+    jitter: float = 0.1,
+    metrics: CacheMetricsRegistry = CACHE_METRICS,
 ) -> Callable[
     [Callable[P, Coroutine[Any, Any, R]]], Callable[P, Coroutine[Any, Any, R]]
 ]:
-    """Cache the result of an async function."""
+    """
+    Cache the result of an async function. With `single_flight`, concurrent
+    misses for the same key share a single call of the function.
+
+    With `soft_ttl`, values older than it (give or take `jitter`, a fraction
+    of `soft_ttl`) are still returned until `ttl`, but the function is called
+    again in the background to refresh them. See `drain_refreshes`.
+
+    Hits, misses, sets and backend latencies are recorded in `metrics`,
+    labelled with the qualified name of the function.
+    """
 
     if key_func and key_params:
         raise ValueError("key_func and key_params are mutually exclusive")
+    if soft_ttl is not None and ttl is not None and soft_ttl > ttl:
+        raise ValueError("soft_ttl must not be greater than ttl")
+    if not 0 <= jitter < 1:
+        raise ValueError("jitter must be in [0, 1)")
 
     def decorator(
         func: Callable[P, Coroutine[Any, Any, R]],
     ) -> Callable[P, Coroutine[Any, Any, R]]:
+        builder = KeyBuilder(func, key_params)
+        flights: SingleFlight[R] = SingleFlight()
+        refreshing: set[str] = set()
+        func_metrics = metrics.labels(builder.func_name)
+
+        async def load(key: str, args: tuple[Any, ...], kwargs: dict[str, Any]) -> R:
+            result = await func(*args, **kwargs)
+            entry_soft_ttl = soft_ttl
+            if entry_soft_ttl is not None and jitter:
+                entry_soft_ttl *= 1 + random.uniform(-jitter, jitter)
+                if ttl is not None:
+                    entry_soft_ttl = min(entry_soft_ttl, ttl)
+            start = time.perf_counter()
+            await backend.set(key, result, ttl=ttl, soft_ttl=entry_soft_ttl)
+            func_metrics.set_latency.observe(time.perf_counter() - start)
+            func_metrics.sets += 1
+            return result
+
+        async def call(key: str, args: tuple[Any, ...], kwargs: dict[str, Any]) -> R:
+            if single_flight:
+                return await flights.do(key, lambda: load(key, args, kwargs))
+            return await load(key, args, kwargs)
+
+        async def refresh(
+            key: str, args: tuple[Any, ...], kwargs: dict[str, Any]
+        ) -> None:
+            try:
+                await call(key, args, kwargs)
+            except Exception:
+                logger.warning(
+                    "Background refresh of %s failed", builder.func_name, exc_info=True
+                )
+            finally:
+                refreshing.discard(key)
+
         @functools.wraps(func)
         async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
             if key_func:
                 key = key_func(func, *args, **kwargs)
             else:
-                key = generate_key(func, args, kwargs, key_params=key_params)
+                key = builder.key(args, kwargs)
 
-            cached_value = await backend.get(key)
+            start = time.perf_counter()
+            entry = await backend.get_entry(key)
+            func_metrics.get_latency.observe(time.perf_counter() - start)
+            stale = entry is not None and entry.is_stale()
+            if entry is None:
+                func_metrics.misses += 1
+            else:
+                func_metrics.hits += 1
+                func_metrics.stale_hits += stale
 
-            func_name = f"{func.__module__}.{func.__qualname__}"
-            params_str = ", ".join(
-                f"{k}={v!r}"
-                for k, v in _get_filtered_args(func, args, kwargs, key_params).items()
-            )
+            if logger.isEnabledFor(logging.DEBUG):
+                params_str = ", ".join(
+                    f"{k}={v!r}" for k, v in builder.arguments(args, kwargs).items()
+                )
+                outcome = "miss" if entry is None else "stale hit" if stale else "hit"
+                logger.debug(
+                    "Cache %s for %s(%s)", outcome, builder.func_name, params_str
+                )
 
-            if cached_value is not None:
-                logger.debug("Cache hit for %s(%s)", func_name, params_str)
-                return cached_value
-            logger.debug("Cache miss for %s(%s)", func_name, params_str)
+            if entry is None:
+                return await call(key, args, kwargs)
 
-            result = await func(*args, **kwargs)
-            await backend.set(key, result, ttl=ttl)
-            return result
+            if stale and key not in refreshing:
+                refreshing.add(key)
+                task = asyncio.create_task(refresh(key, args, kwargs))
+                _refreshes.add(task)
+                task.add_done_callback(_refreshes.discard)
+            return entry.value
 
         return wrapper
 
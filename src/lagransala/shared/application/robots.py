@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Iterable
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+from pydantic import BaseModel
+
+from ..domain import CacheBackend, Fetcher, FetchError
+from .caching import KeyBuilder
+
+logger = logging.getLogger(__name__)
+
+
+class RobotsRules(BaseModel):
+    status: int
+    content: str
+
+
+def _parser_for(rules: RobotsRules | None) -> RobotFileParser:
+    parser = RobotFileParser()
+    if rules is None or 400 <= rules.status < 500:
+        # Missing robots.txt (or unreachable host): everything is allowed
+        parser.parse([])
+    elif rules.status >= 500:
+        parser.parse(["User-agent: *", "Disallow: /"])
+    else:
+        parser.parse(rules.content.splitlines())
+    return parser
+
+
+class Robots:
+    """
+    robots.txt rules for every host, fetched once per host and cached through a
+    CacheBackend. Crawl-delay and Request-rate are reported through
+    `on_crawl_delay` as the minimum delay between requests to a host.
+
+    Cached rules are fresh for `cache_ttl` seconds, then kept `stale_ttl`
+    more seconds as the last good rules. A server error (5xx) disallows the
+    whole host, but is never cached: the last good rules are used instead if
+    there are any, and otherwise robots.txt is fetched again after
+    `error_ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        fetcher: Fetcher,
+        user_agent: str = "*",
+        cache_backend: CacheBackend[RobotsRules] | None = None,
+        cache_ttl: int | None = 3600 * 24,
+        stale_ttl: int | None = 3600 * 24 * 6,
+        error_ttl: float = 300,
+        on_crawl_delay: Callable[[str, float], None] | None = None,
+    ):
+        self._fetcher = fetcher
+        self._user_agent = user_agent
+        self._cache_backend = cache_backend
+        self._cache_ttl = cache_ttl
+        self._stale_ttl = stale_ttl
+        self._error_ttl = error_ttl
+        self._on_crawl_delay = on_crawl_delay
+        self._key_builder = KeyBuilder(self._fetch_rules, key_params=["robots_url"])
+        # Parsers by host, with until when (monotonic) they hold, None if forever
+        self._parsers: dict[str, tuple[RobotFileParser, float | None]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def _fetch_rules(self, robots_url: str) -> RobotsRules:
+        response = await self._fetcher.fetch(robots_url)
+        return RobotsRules(status=response.status, content=response.content)
+
+    async def _load(self, robots_url: str) -> RobotsRules | None:
+        """The rules at `robots_url`, None if they could not be fetched."""
+        key = self._key_builder.key((), {"robots_url": robots_url})
+        entry = None
+        if self._cache_backend is not None:
+            entry = await self._cache_backend.get_entry(key)
+            if entry is not None and not entry.is_stale():
+                return entry.value
+
+        try:
+            rules = await self._fetch_rules(robots_url)
+        except FetchError as e:
+            logger.warning("Could not fetch %s: %s", robots_url, e)
+            return entry.value if entry is not None else None
+        if rules.status >= 500:
+            if entry is not None:
+                logger.warning(
+                    "Status %d for %s, using the last rules", rules.status, robots_url
+                )
+                return entry.value
+            return rules
+
+        if self._cache_backend is not None:
+            ttl = (
+                self._cache_ttl + self._stale_ttl
+                if self._cache_ttl is not None and self._stale_ttl is not None
+                else self._cache_ttl
+            )
+            await self._cache_backend.set(key, rules, ttl=ttl, soft_ttl=self._cache_ttl)
+        return rules
+
+    def _cached_parser(self, host: str) -> RobotFileParser | None:
+        cached = self._parsers.get(host)
+        if cached is None:
+            return None
+        parser, until = cached
+        if until is not None and time.monotonic() >= until:
+            return None
+        return parser
+
+    async def _parser(self, url: str) -> RobotFileParser:
+        parsed = urlparse(url)
+        host = parsed.netloc
+        parser = self._cached_parser(host)
+        if parser is not None:
+            return parser
+
+        async with self._locks.setdefault(host, asyncio.Lock()):
+            parser = self._cached_parser(host)
+            if parser is not None:
+                return parser
+            rules = await self._load(f"{parsed.scheme}://{host}/robots.txt")
+            parser = _parser_for(rules)
+            # Server errors only disallow the host for a while
+            until = (
+                time.monotonic() + self._error_ttl
+                if rules is not None and rules.status >= 500
+                else None
+            )
+            self._parsers[host] = (parser, until)
+
+        delay = self._delay(parser)
+        if delay is not None:
+            logger.debug("Crawl delay for %s: %.2fs", host, delay)
+            if self._on_crawl_delay is not None:
+                self._on_crawl_delay(host, delay)
+        return parser
+
+    def _delay(self, parser: RobotFileParser) -> float | None:
+        delays = []
+        crawl_delay = parser.crawl_delay(self._user_agent)
+        if crawl_delay is not None:
+            delays.append(float(crawl_delay))
+        request_rate = parser.request_rate(self._user_agent)
+        if request_rate is not None and request_rate.requests > 0:
+            delays.append(request_rate.seconds / request_rate.requests)
+        return max(delays) if delays else None
+
+    async def can_fetch(self, url: str) -> bool:
+        parser = await self._parser(url)
+        return parser.can_fetch(self._user_agent, url)
+
+    async def crawl_delay(self, url: str) -> float | None:
+        return self._delay(await self._parser(url))
+
+    async def filter(self, urls: Iterable[str]) -> list[str]:
+        """Return the URLs that robots.txt allows, keeping their order."""
+        urls = list(urls)
+        allowed = await asyncio.gather(*[self.can_fetch(url) for url in urls])
+        for url, ok in zip(urls, allowed):
+            if not ok:
+                logger.debug("Disallowed by robots.txt: %s", url)
+        return [url for url, ok in zip(urls, allowed) if ok]
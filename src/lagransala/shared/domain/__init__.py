@@ -1,5 +1,13 @@
-from .caching import CacheBackend
+from .caching import CacheBackend, CacheEntry
 from .coroutine_with_data import coroutine_with_data
-from .fetcher import Fetcher
+from .fetcher import DeadUrlError, Fetcher, FetchError, HostUnavailableError
 
-__all__ = ["CacheBackend", "coroutine_with_data", "Fetcher"]
+__all__ = [
+    "CacheBackend",
+    "CacheEntry",
+    "coroutine_with_data",
+    "DeadUrlError",
+    "Fetcher",
+    "FetchError",
+    "HostUnavailableError",
+]
@@ -1,12 +1,53 @@
-from typing import Generic, Protocol, TypeVar
+import time
+from dataclasses import dataclass
+from typing import Generic, Iterable, Mapping, Protocol, TypeVar
 
 from pydantic import BaseModel
 
 Data = TypeVar("Data", bound=BaseModel)
 
 
+@dataclass(frozen=True)
+class CacheEntry(Generic[Data]):
+    """
+    A cached value with its expiry times. Past `stale_at` (the soft TTL) the
+    value may still be served while it is refreshed; past `expires_at` (the
+    hard TTL) it is gone.
+    """
+
+    value: Data
+    expires_at: float | None = None
+    stale_at: float | None = None
+
+    def is_stale(self, now: float | None = None) -> bool:
+        if self.stale_at is None:
+            return False
+        return (time.time() if now is None else now) >= self.stale_at
+
+
 class CacheBackend(Protocol, Generic[Data]):
 
     async def get(self, key: str) -> Data | None: ...
 
-    async def set(self, key: str, value: Data, ttl: float | None = None) -> None: ...
+    async def get_entry(self, key: str) -> CacheEntry[Data] | None: ...
+
+    async def set(
+        self,
+        key: str,
+        value: Data,
+        ttl: float | None = None,
+        soft_ttl: float | None = None,
+    ) -> None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, CacheEntry[Data]]:
+        """Return the entries found for `keys`; missing keys are left out."""
+        ...
+
+    async def set_many(
+        self,
+        items: Mapping[str, Data],
+        ttl: float | None = None,
+        soft_ttl: float | None = None,
+    ) -> None: ...
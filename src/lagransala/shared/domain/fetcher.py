@@ -1,4 +1,4 @@
-from typing import Protocol, overload
+from typing import AsyncIterator, Protocol, overload
 
 from pydantic import BaseModel
 
@@ -7,6 +7,25 @@ class Response(BaseModel):
     status: int
     content: str
     content_type: str
+    etag: str | None = None
+    last_modified: str | None = None
+    max_age: float | None = None
+    expires_at: float | None = None
+    discarded: bool = False
+    # Seconds the server asked to wait before retrying, from Retry-After
+    retry_after: float | None = None
+
+
+class FetchError(Exception):
+    """Raised when a URL could not be fetched."""
+
+
+class HostUnavailableError(FetchError):
+    """Raised when requests to a host are suspended after repeated failures."""
+
+
+class DeadUrlError(FetchError):
+    """Raised when a URL has failed too many times and is no longer requested."""
 
 
 class Fetcher(Protocol):
@@ -14,3 +33,9 @@ class Fetcher(Protocol):
     async def fetch(self, url: str) -> Response: ...
 
     async def fetch_urls(self, urls: list[str]) -> list[Response]: ...
+
+    def iter_fetch(
+        self, urls: list[str], max_in_flight: int | None = None
+    ) -> AsyncIterator[tuple[str, Response | FetchError]]:
+        """Yield (url, response or error) pairs as the requests complete."""
+        ...
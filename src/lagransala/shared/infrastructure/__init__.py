@@ -1,11 +1,72 @@
-from .aiohttp_fetcher import AiohttpFetcher
+from .adaptive_concurrency import AdaptiveConcurrency
+from .aiohttp_fetcher import AiohttpFetcher, WarmReport
+from .blob_store import (
+    BlobStore,
+    DedupResponseCacheBackend,
+    StoredResponse,
+    collect_blobs,
+)
+from .cache_codec import CacheCodec, IdentityCodec, ZlibCodec, ZstdCodec
+from .cache_gc import GcReport, collect_garbage, parse_size
+from .cache_namespace import CACHE_NAMESPACES, CacheNamespace, get_cache_namespace
+from .cache_stats import RUN_METRICS_PATH, CacheSummary, summarize_cache
+from .circuit_breaker import CircuitBreaker
+from .connection_profile import (
+    CONNECTION_PROFILES,
+    ConnectionProfile,
+    ConnectionStats,
+    get_connection_profile,
+)
 from .file_cache_backend import FileCacheBackend
 from .initialize_sqlmodel import initialize_sqlmodel
-from .memory_cache_backend import MemoryCacheBackend
+from .instrumented_cache_backend import InstrumentedCacheBackend
+from .log_cache_backend import LogCacheBackend
+from .memory_cache_backend import MemoryCacheBackend, MemoryCacheStats
+from .negative_caching import NegativeCachePolicy, UrlFailure
+from .request_scheduler import RequestScheduler
+from .retry_policy import RetryPolicy
+from .sqlite_cache_backend import SqliteCacheBackend
+from .tiered_cache_backend import TieredCacheBackend
+from .warc_fetcher import WarcRecordingFetcher, WarcReplayFetcher
 
 __all___ = [
+    "AdaptiveConcurrency",
     "AiohttpFetcher",
+    "BlobStore",
+    "CACHE_NAMESPACES",
+    "CacheNamespace",
+    "CacheSummary",
+    "CacheCodec",
+    "CircuitBreaker",
+    "CONNECTION_PROFILES",
+    "ConnectionProfile",
+    "ConnectionStats",
+    "DedupResponseCacheBackend",
     "FileCacheBackend",
+    "GcReport",
+    "InstrumentedCacheBackend",
+    "IdentityCodec",
+    "LogCacheBackend",
     "MemoryCacheBackend",
+    "MemoryCacheStats",
+    "NegativeCachePolicy",
+    "RequestScheduler",
+    "RetryPolicy",
+    "RUN_METRICS_PATH",
+    "SqliteCacheBackend",
+    "StoredResponse",
+    "TieredCacheBackend",
+    "UrlFailure",
+    "WarcRecordingFetcher",
+    "WarcReplayFetcher",
+    "WarmReport",
+    "ZlibCodec",
+    "ZstdCodec",
+    "collect_blobs",
+    "collect_garbage",
+    "get_cache_namespace",
+    "get_connection_profile",
     "initialize_sqlmodel",
+    "parse_size",
+    "summarize_cache",
 ]
@@ -0,0 +1,71 @@
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class _Window:
+    limit: float
+    baseline: float | None = None
+    last_decrease: float = float("-inf")
+
+
+class AdaptiveConcurrency:
+    """
+    Per-host concurrency windows adjusted with AIMD. Every healthy response grows
+    the window by 1/window (about one slot per window of requests), while an
+    error or a latency above `latency_tolerance` times the host baseline shrinks
+    it by `backoff`, at most once per `cooldown` seconds. The baseline follows
+    the lowest observed latency and drifts slowly upwards.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        latency_tolerance: float = 2.0,
+        backoff: float = 0.5,
+        cooldown: float = 1.0,
+        baseline_drift: float = 0.05,
+    ):
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError("Expected 1 <= min_limit <= initial <= max_limit")
+        self._initial = initial
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._latency_tolerance = latency_tolerance
+        self._backoff = backoff
+        self._cooldown = cooldown
+        self._baseline_drift = baseline_drift
+        self._windows: dict[str, _Window] = {}
+
+    def _window(self, host: str) -> _Window:
+        return self._windows.setdefault(host, _Window(limit=self._initial))
+
+    def limit(self, host: str) -> int:
+        return int(self._window(host).limit)
+
+    def windows(self) -> dict[str, int]:
+        return {host: int(window.limit) for host, window in self._windows.items()}
+
+    def observe(self, host: str, latency: float, ok: bool) -> int:
+        """Record a request outcome for the host and return its new limit."""
+        window = self._window(host)
+        if ok:
+            if window.baseline is None or latency < window.baseline:
+                window.baseline = latency
+            else:
+                window.baseline += self._baseline_drift * (latency - window.baseline)
+
+        congested = not ok or (
+            window.baseline is not None
+            and latency > window.baseline * self._latency_tolerance
+        )
+        if congested:
+            now = time.monotonic()
+            if now - window.last_decrease >= self._cooldown:
+                window.limit = max(self._min_limit, window.limit * self._backoff)
+                window.last_decrease = now
+        else:
+            window.limit = min(self._max_limit, window.limit + 1 / window.limit)
+        return int(window.limit)
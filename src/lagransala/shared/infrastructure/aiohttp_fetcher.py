@@ -1,14 +1,51 @@
 import asyncio
 import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator
+from urllib.parse import urlparse
 
 import aiohttp
 
-from ..application import cached
+from ..application import KeyBuilder, SingleFlight
 from ..domain import CacheBackend
-from ..domain.fetcher import Response
+from ..domain.fetcher import DeadUrlError, FetchError, HostUnavailableError, Response
+from .adaptive_concurrency import AdaptiveConcurrency
+from .circuit_breaker import CircuitBreaker
+from .negative_caching import NegativeCachePolicy, UrlFailure
+from .request_scheduler import RequestScheduler
+from .retry_policy import RetryPolicy, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
+_CHUNK_SIZE = 64 * 1024
+_MAX_AGE_RE = re.compile(r"(?:^|,)\s*max-age\s*=\s*\"?(\d+)\"?", re.IGNORECASE)
+_NO_CACHE_RE = re.compile(r"(?:^|,)\s*(?:no-cache|no-store)\b", re.IGNORECASE)
+
+
+def _parse_max_age(cache_control: str | None) -> float | None:
+    if not cache_control:
+        return None
+    if _NO_CACHE_RE.search(cache_control):
+        return 0.0
+    match = _MAX_AGE_RE.search(cache_control)
+    return float(match.group(1)) if match else None
+
+
+@dataclass
+class WarmReport:
+    urls: int = 0
+    fresh: int = 0
+    fetched: int = 0
+    failed: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.urls} URLs, {self.fresh} already fresh, "
+            f"{self.fetched} fetched, {self.failed} failed"
+        )
+
 
 class AiohttpFetcher:
     def __init__(
@@ -17,39 +54,511 @@ class AiohttpFetcher:
         max_concurrency: int = 12,
         cache_backend: CacheBackend[Response] | None = None,
         cache_ttl: int | None = None,
+        max_per_host: int = 4,
+        host_delay: float = 0.0,
+        scheduler: RequestScheduler | None = None,
+        revalidation_ttl: int | None = 3600 * 24 * 30,
+        allowed_content_types: tuple[str, ...] | None = None,
+        max_content_size: int | None = None,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        negative_cache_policy: NegativeCachePolicy | None = None,
+        failure_backend: CacheBackend[UrlFailure] | None = None,
+        adaptive_concurrency: AdaptiveConcurrency | None = None,
+        stale_while_revalidate: int | None = None,
     ):
+        """
+        :param cache_ttl: Freshness lifetime of cached responses, used when the
+            server does not send a Cache-Control max-age along with validators.
+        :param revalidation_ttl: How long expired responses with an ETag or
+            Last-Modified are kept in the cache so they can be revalidated with
+            If-None-Match/If-Modified-Since.
+        :param allowed_content_types: If set, bodies of any other content type are
+            not downloaded and the response is marked as discarded.
+        :param max_content_size: If set, bodies larger than this many bytes are
+            aborted and the response is marked as discarded.
+        :param retry_policy: Retries for connection errors and retryable statuses.
+        :param circuit_breaker: Stops requests to hosts that keep failing.
+        :param negative_cache_policy: TTLs for cached error responses and
+            connection errors, and when to tombstone URLs that keep failing.
+        :param failure_backend: Where failures are remembered. Without it only
+            error responses are negatively cached.
+        :param adaptive_concurrency: Adjusts each host's concurrency in the
+            scheduler from observed latencies and errors.
+        :param stale_while_revalidate: For how long after expiring a response is
+            still returned from the cache while it is revalidated in the
+            background. See `drain_refreshes`.
+        """
         self._client = client
-        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._scheduler = scheduler or RequestScheduler(
+            max_concurrency=max_concurrency,
+            max_per_host=max_per_host,
+            host_delay=host_delay,
+        )
         self._cache_backend = cache_backend
         self._cache_ttl = cache_ttl
+        self._revalidation_ttl = revalidation_ttl
+        self._allowed_content_types = allowed_content_types
+        self._max_content_size = max_content_size
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._circuit_breaker = circuit_breaker or CircuitBreaker()
+        self._negative_cache_policy = negative_cache_policy or NegativeCachePolicy()
+        self._failure_backend = failure_backend
+        self._adaptive_concurrency = adaptive_concurrency
+        self._key_builder = KeyBuilder(self._fetch, key_params=["url"])
+        self._in_flight: SingleFlight[Response] = SingleFlight()
+        self._stale_while_revalidate = stale_while_revalidate
+        self._revalidating: set[str] = set()
+        self._background: set[asyncio.Task[None]] = set()
+
+    @property
+    def scheduler(self) -> RequestScheduler:
+        return self._scheduler
+
+    def _cache_key(self, url: str) -> str:
+        return self._key_builder.key((), {"url": url})
+
+    def _lifetime(self, response: Response) -> float | None:
+        if (response.etag or response.last_modified) and response.max_age is not None:
+            return response.max_age
+        return self._cache_ttl
 
     async def fetch(self, url: str) -> Response:
-        if self._cache_backend:
-            return await cached(
-                backend=self._cache_backend,
-                ttl=self._cache_ttl,
-                key_params=["url"],
-            )(self._fetch)(url=url)
-        return await self._fetch(url)
+        # Concurrent fetches of the same URL share one request
+        return await self._in_flight.do(url, lambda: self._fetch_cached(url))
+
+    async def _fetch_cached(self, url: str) -> Response:
+        if self._cache_backend is None:
+            return await self._fetch(url)
+
+        key = self._cache_key(url)
+        cached_response = await self._cache_backend.get(key)
+        if cached_response is not None:
+            expires_at = cached_response.expires_at
+            if expires_at is None or time.time() < expires_at:
+                logger.debug("Cache hit for %s", url)
+                return cached_response
+
+        failure = await self._get_failure(key)
+        if cached_response is None or self._negative_cache_policy.is_failure(
+            cached_response.status
+        ):
+            self._check_failures(failure, url)
+            return await self._revalidate(url, key, failure, cached_response)
+
+        # A stale copy is served rather than failing, or retrying too early
+        if failure is not None and time.time() < failure.retry_at:
+            logger.debug("Serving stale %s, it failed recently", url)
+            return cached_response
+        if (
+            self._stale_while_revalidate is not None
+            and cached_response.expires_at is not None
+            and time.time() < cached_response.expires_at + self._stale_while_revalidate
+        ):
+            logger.debug("Serving stale %s while revalidating", url)
+            self._revalidate_in_background(url, key, failure, cached_response)
+            return cached_response
+        return await self._revalidate(url, key, failure, cached_response)
+
+    def _revalidate_in_background(
+        self,
+        url: str,
+        key: str,
+        failure: UrlFailure | None,
+        cached_response: Response,
+    ) -> None:
+        if url in self._revalidating:
+            return
+        self._revalidating.add(url)
+
+        async def revalidate() -> None:
+            try:
+                await self._revalidate(url, key, failure, cached_response)
+            except FetchError as e:
+                logger.debug("Background revalidation of %s failed: %s", url, e)
+            finally:
+                self._revalidating.discard(url)
+
+        task = asyncio.create_task(revalidate())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def drain_refreshes(self) -> None:
+        """Wait for the background revalidations of stale responses."""
+        while self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+
+    async def _revalidate(
+        self,
+        url: str,
+        key: str,
+        failure: UrlFailure | None,
+        cached_response: Response | None,
+    ) -> Response:
+        assert self._cache_backend is not None
+        try:
+            response = await self._fetch(url, validators=cached_response)
+        except FetchError as e:
+            # A suspended host says nothing about this URL
+            if not isinstance(e, HostUnavailableError):
+                await self._record_failure(key, failure, error=str(e))
+            if cached_response is not None:
+                logger.debug("Serving stale %s after error: %s", url, e)
+                return cached_response
+            raise
+
+        if response.status == 304 and cached_response is not None:
+            logger.debug("Cache revalidated for %s", url)
+            response = cached_response.model_copy(
+                update={
+                    "etag": response.etag or cached_response.etag,
+                    "last_modified": response.last_modified
+                    or cached_response.last_modified,
+                    "max_age": (
+                        response.max_age
+                        if response.max_age is not None
+                        else cached_response.max_age
+                    ),
+                }
+            )
+        else:
+            logger.debug("Cache miss for %s", url)
+
+        policy = self._negative_cache_policy
+        if policy.is_failure(response.status):
+            throttled = policy.is_throttled(response.status)
+            await self._record_failure(
+                key, failure, status=response.status, retry_after=response.retry_after
+            )
+            if (response.status >= 500 or throttled) and cached_response is not None:
+                logger.debug("Serving stale %s after status %d", url, response.status)
+                return cached_response
+            lifetime = ttl = policy.ttl_for_status(response.status)
+            if ttl is None or throttled:
+                # Throttle pages are not content: never cache them
+                return response
+        else:
+            if failure is not None and self._failure_backend is not None:
+                await self._failure_backend.delete(self._failure_key(key))
+            lifetime = self._lifetime(response)
+            if lifetime is None:
+                ttl = None
+            elif response.etag or response.last_modified:
+                ttl = (
+                    lifetime + self._revalidation_ttl
+                    if self._revalidation_ttl is not None
+                    else None
+                )
+            else:
+                # Without validators an expired copy can be served stale, but
+                # never revalidated
+                ttl = lifetime + (self._stale_while_revalidate or 0)
+
+        response.expires_at = time.time() + lifetime if lifetime is not None else None
+        await self._cache_backend.set(key, response, ttl=ttl)
+        return response
+
+    def _failure_key(self, key: str) -> str:
+        return f"failure:{key}"
+
+    async def _get_failure(self, key: str) -> UrlFailure | None:
+        if self._failure_backend is None:
+            return None
+        return await self._failure_backend.get(self._failure_key(key))
 
-    async def _fetch(self, url: str) -> Response:
+    def _check_failures(self, failure: UrlFailure | None, url: str) -> None:
+        """Raises if the URL is tombstoned or failed to connect recently."""
+        if failure is None or time.time() >= failure.retry_at:
+            return
+        if failure.failures >= self._negative_cache_policy.tombstone_after:
+            raise DeadUrlError(f"{url} failed {failure.failures} times, skipping")
+        if failure.error is not None:
+            raise FetchError(f"{url} failed recently: {failure.error}")
+        if failure.status is not None and self._negative_cache_policy.is_throttled(
+            failure.status
+        ):
+            raise FetchError(f"{url} was throttled, retrying later")
+
+    async def _record_failure(
+        self,
+        key: str,
+        previous: UrlFailure | None,
+        status: int | None = None,
+        error: str | None = None,
+        retry_after: float | None = None,
+    ) -> None:
+        if self._failure_backend is None:
+            return
+        policy = self._negative_cache_policy
+        throttled = status is not None and policy.is_throttled(status)
+        # Throttling says nothing about the URL, so it never tombstones it
+        failures = (previous.failures if previous else 0) + (not throttled)
+        if failures >= policy.tombstone_after:
+            window = policy.tombstone_ttl
+        elif status is not None:
+            window = policy.ttl_for_status(status) or 0
+            if throttled and retry_after is not None:
+                window = max(window, retry_after)
+        else:
+            window = policy.connection_error_ttl or 0
+        failure = UrlFailure(
+            failures=failures,
+            status=status,
+            error=error,
+            retry_at=time.time() + window,
+        )
+        await self._failure_backend.set(
+            self._failure_key(key), failure, ttl=policy.tombstone_ttl
+        )
+
+    async def _fetch(self, url: str, validators: Response | None = None) -> Response:
         """
         Fetches data from the given URL asynchronously.
         :param url: The URL to fetch data from.
+        :param validators: A previous response whose ETag/Last-Modified are sent
+            to make the request conditional.
         :return: The response text from the URL.
         """
-        async with self._client.get(url) as response:
+        headers: dict[str, str] = {}
+        if validators is not None:
+            if validators.etag:
+                headers["If-None-Match"] = validators.etag
+            if validators.last_modified:
+                headers["If-Modified-Since"] = validators.last_modified
+
+        host = urlparse(url).netloc
+        policy = self._retry_policy
+        attempt = 0
+        while True:
+            attempt += 1
+            trial = self._circuit_breaker.state(host) == "half_open"
+            if not self._circuit_breaker.allow(host):
+                raise HostUnavailableError(f"Requests to {host} are suspended")
+            try:
+                response = await self._request(url, headers)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._circuit_breaker.record_failure(host)
+                if attempt >= policy.max_attempts:
+                    raise FetchError(f"Error fetching {url}: {e!r}") from e
+                delay = policy.delay(attempt)
+                logger.debug("Retrying %s in %.2fs after %r", url, delay, e)
+            else:
+                if not policy.is_retryable(response.status):
+                    self._circuit_breaker.record_success(host)
+                    return response
+                self._circuit_breaker.record_failure(host)
+                if attempt >= policy.max_attempts:
+                    return response
+                delay = policy.delay(attempt, response.retry_after)
+                logger.debug(
+                    "Retrying %s in %.2fs after status %d", url, delay, response.status
+                )
+            finally:
+                # A cancelled or crashed trial must not suspend the host forever
+                if trial:
+                    self._circuit_breaker.release(host)
+            await asyncio.sleep(delay)
+
+    async def _request(self, url: str, headers: dict[str, str]) -> Response:
+        """Performs a single request."""
+        async with self._scheduler.slot(url) as host:
+            start = time.monotonic()
+            try:
+                async with self._client.get(url, headers=headers) as response:
+                    content = await self._read_body(url, response)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                self._observe(host, time.monotonic() - start, ok=False)
+                raise
+            # Observed once the body is read, so a failed read counts only once
+            self._observe(
+                host,
+                time.monotonic() - start,
+                ok=response.status < 500 and response.status != 429,
+            )
             return Response(
                 status=response.status,
-                content=await response.text(),
+                content=content or "",
                 content_type=response.content_type,
+                discarded=content is None,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                max_age=_parse_max_age(response.headers.get("Cache-Control")),
+                retry_after=parse_retry_after(response.headers.get("Retry-After")),
             )
 
+    def _observe(self, host: str, latency: float, ok: bool) -> None:
+        if self._adaptive_concurrency is None:
+            return
+        limit = self._adaptive_concurrency.observe(host, latency, ok)
+        self._scheduler.set_host_limits(host, max_concurrency=limit)
+
+    async def _read_body(
+        self, url: str, response: aiohttp.ClientResponse
+    ) -> str | None:
+        """
+        Streams the body into memory, checking the headers first so unwanted
+        bodies are never downloaded. Returns None if the body was discarded.
+        """
+        if response.status == 304:
+            return ""
+        if self._allowed_content_types is not None and not any(
+            response.content_type.startswith(content_type)
+            for content_type in self._allowed_content_types
+        ):
+            logger.debug("Discarding %s: content type %s", url, response.content_type)
+            return None
+
+        max_size = self._max_content_size
+        if max_size is not None and (response.content_length or 0) > max_size:
+            logger.debug("Discarding %s: %d bytes", url, response.content_length)
+            return None
+
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+            body += chunk
+            if max_size is not None and len(body) > max_size:
+                logger.debug("Discarding %s: more than %d bytes", url, max_size)
+                return None
+        try:
+            return body.decode(response.charset or "utf-8", errors="replace")
+        except LookupError:
+            return body.decode("utf-8", errors="replace")
+
     async def fetch_urls(self, urls: list[str]) -> list[Response]:
         """
-        Fetches data from multiple URLs concurrently.
+        Fetches data from multiple URLs concurrently. Fresh responses are
+        looked up in the cache in a single batch before fetching the rest.
         :param urls: List of URLs to fetch data from.
         :return: List of responses from the URLs.
         """
-        async with self._semaphore:
-            return await asyncio.gather(*[self.fetch(url) for url in urls])
+        hits = await self._fresh_from_cache(urls)
+        misses = [url for url in dict.fromkeys(urls) if url not in hits]
+        fetched = await asyncio.gather(*[self.fetch(url) for url in misses])
+        responses = {**hits, **dict(zip(misses, fetched))}
+        return [responses[url] for url in urls]
+
+    async def _fresh_from_cache(self, urls: list[str]) -> dict[str, Response]:
+        """Look up fresh, successful responses for `urls` in one batch."""
+        if self._cache_backend is None or not urls:
+            return {}
+        keys = {self._cache_key(url): url for url in urls}
+        entries = await self._cache_backend.get_many(keys)
+        now = time.time()
+        hits = {}
+        for key, entry in entries.items():
+            response = entry.value
+            if self._negative_cache_policy.is_failure(response.status):
+                continue
+            if response.expires_at is None or now < response.expires_at:
+                hits[keys[key]] = response
+        logger.debug("Cache hits for %d of %d URLs", len(hits), len(keys))
+        return hits
+
+    async def iter_fetch(
+        self, urls: list[str], max_in_flight: int | None = None
+    ) -> AsyncIterator[tuple[str, Response | FetchError]]:
+        """
+        Fetches multiple URLs, yielding results in completion order.
+        :param urls: List of URLs to fetch data from.
+        :param max_in_flight: Maximum number of outstanding fetches. Defaults to
+            twice the scheduler concurrency so it always has queued work.
+        :return: Async iterator of (url, response or error) pairs.
+        """
+        if max_in_flight is None:
+            limit = 2 * self._scheduler.max_concurrency
+        elif max_in_flight <= 0:
+            raise ValueError(f"max_in_flight must be positive, got {max_in_flight}")
+        else:
+            limit = max_in_flight
+        hits = await self._fresh_from_cache(urls)
+        for url in urls:
+            if url in hits:
+                yield url, hits[url]
+        remaining = iter([url for url in urls if url not in hits])
+        pending: set[asyncio.Task[tuple[str, Response | FetchError]]] = set()
+
+        def start_next() -> None:
+            url = next(remaining, None)
+            if url is not None:
+                pending.add(asyncio.create_task(self._fetch_result(url)))
+
+        try:
+            for _ in range(limit):
+                start_next()
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    pending.discard(task)
+                    start_next()
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def warm(
+        self,
+        urls: list[str],
+        refresh_within: float = 0.0,
+        max_in_flight: int = 2,
+    ) -> WarmReport:
+        """
+        Fetch the URLs that are not cached or whose cached response expires
+        within `refresh_within` seconds, so later fetches are cache hits.
+        The cache is checked in a single batch. Expiring responses are
+        revalidated with their validators, so unchanged pages cost a 304.
+        :param urls: URLs expected to be fetched later.
+        :param refresh_within: Seconds before expiry from which a cached
+            response is refreshed.
+        :param max_in_flight: Maximum number of outstanding fetches, low by
+            default so warming does not compete with other traffic.
+        :return: How many URLs were fresh, fetched or failed.
+        """
+        urls = list(dict.fromkeys(urls))
+        report = WarmReport(urls=len(urls))
+        if self._cache_backend is None:
+            return report
+
+        keys = {self._cache_key(url): url for url in urls}
+        entries = await self._cache_backend.get_many(keys)
+        cached = {keys[key]: entry.value for key, entry in entries.items()}
+        refresh_from = time.time() + refresh_within
+        stale = []
+        for url in urls:
+            response = cached.get(url)
+            if response is not None and (
+                response.expires_at is None or response.expires_at > refresh_from
+            ):
+                report.fresh += 1
+            else:
+                stale.append(url)
+        logger.info("Warming %d of %d URLs", len(stale), len(urls))
+
+        semaphore = asyncio.Semaphore(max_in_flight)
+
+        async def refresh(url: str) -> None:
+            key = self._cache_key(url)
+            async with semaphore:
+                try:
+                    failure = await self._get_failure(key)
+                    self._check_failures(failure, url)
+                    await self._in_flight.do(
+                        url,
+                        lambda: self._revalidate(url, key, failure, cached.get(url)),
+                    )
+                except FetchError as e:
+                    logger.debug("Could not warm %s: %s", url, e)
+                    report.failed += 1
+                else:
+                    report.fetched += 1
+
+        await asyncio.gather(*[refresh(url) for url in stale])
+        return report
+
+    async def _fetch_result(self, url: str) -> tuple[str, Response | FetchError]:
+        try:
+            return url, await self.fetch(url)
+        except FetchError as e:
+            return url, e
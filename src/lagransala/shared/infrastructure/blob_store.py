@@ -0,0 +1,303 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from pathlib import Path
+from typing import Iterable, Mapping, NamedTuple
+
+from ..domain.caching import CacheBackend, CacheEntry
+from ..domain.fetcher import Response
+from .cache_codec import CacheCodec, decode_data, default_codec, encode_data
+
+logger = logging.getLogger(__name__)
+
+BLOB_INDEX = "blobs.sqlite"
+BLOB_SUFFIX = ".blob"
+
+# Unreferenced blobs younger than this may be about to be referenced
+BLOB_GRACE_PERIOD = 3600
+
+
+class BlobGcReport(NamedTuple):
+    blobs_removed: int
+    bytes_reclaimed: int
+    bytes_remaining: int
+
+
+def _digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def _connect(index: Path) -> sqlite3.Connection:
+    connection = sqlite3.connect(
+        index, check_same_thread=False, isolation_level=None, timeout=30
+    )
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS refs ("
+        "key TEXT PRIMARY KEY, digest TEXT NOT NULL, expiry REAL"
+        ") WITHOUT ROWID"
+    )
+    connection.execute("CREATE INDEX IF NOT EXISTS refs_digest ON refs (digest)")
+    return connection
+
+
+class BlobStore:
+    """
+    Content-addressed store of compressed blobs, named after the SHA-256 of
+    their content in two levels of subdirectories (`ab/cd/abcd….blob`), so
+    identical contents are stored once.
+
+    An index (`blobs.sqlite`) records which blob every cache key refers to,
+    and until when. Blobs are never deleted on release: garbage collection
+    (`collect_blobs`, or `collect_garbage`) removes those no unexpired key
+    refers to. A blob evicted for space while still referenced is a miss.
+    """
+
+    def __init__(self, path: str, codec: CacheCodec | None = None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.codec = codec if codec is not None else default_codec()
+        self._connection = _connect(self.path / BLOB_INDEX)
+        self._lock = threading.Lock()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.path / digest[:2] / digest[2:4] / f"{digest}{BLOB_SUFFIX}"
+
+    def _put(self, refs: Mapping[str, bytes], expiry: float | None) -> list[str]:
+        digests = [_digest(content) for content in refs.values()]
+        # Reference the blobs first, so a concurrent collection keeps them
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO refs (key, digest, expiry) VALUES (?, ?, ?)",
+                [(key, digest, expiry) for key, digest in zip(refs, digests)],
+            )
+        for digest, content in zip(digests, refs.values()):
+            self._write(digest, content)
+        return digests
+
+    def _write(self, digest: str, content: bytes) -> None:
+        path = self._blob_path(digest)
+        try:
+            # Already stored: only mark it as recently used
+            os.utime(path)
+            return
+        except FileNotFoundError:
+            pass
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.stem}.{uuid.uuid4().hex}.tmp")
+        try:
+            tmp_path.write_bytes(encode_data(content, self.codec))
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def _read(self, digest: str) -> bytes | None:
+        try:
+            content = decode_data(self._blob_path(digest).read_bytes())
+            if isinstance(content, str):
+                raise ValueError("Not an encoded blob")
+            return content
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.warning("Corrupted blob %s in %s", digest, self.path)
+            return None
+
+    async def put(self, key: str, content: bytes, expiry: float | None) -> str:
+        """Store `content` for `key` until `expiry`, and return its digest."""
+        (digest,) = await asyncio.to_thread(self._put, {key: content}, expiry)
+        return digest
+
+    async def put_many(
+        self, refs: Mapping[str, bytes], expiry: float | None
+    ) -> list[str]:
+        return await asyncio.to_thread(self._put, refs, expiry)
+
+    async def get(self, digest: str) -> bytes | None:
+        return await asyncio.to_thread(self._read, digest)
+
+    async def get_many(self, digests: Iterable[str]) -> dict[str, bytes]:
+        def read_all() -> dict[str, bytes]:
+            blobs = {}
+            for digest in set(digests):
+                content = self._read(digest)
+                if content is not None:
+                    blobs[digest] = content
+            return blobs
+
+        return await asyncio.to_thread(read_all)
+
+    async def release(self, key: str) -> None:
+        def delete() -> None:
+            with self._lock:
+                self._connection.execute("DELETE FROM refs WHERE key = ?", (key,))
+
+        await asyncio.to_thread(delete)
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def referenced_blobs(
+    path: Path | str, now: float | None = None, dry_run: bool = False
+) -> set[str]:
+    """
+    Digests of the blobs under `path` that an unexpired key refers to.
+    Expired references are deleted on the way, unless `dry_run`.
+    """
+    path = path if isinstance(path, Path) else Path(path)
+    now = time.time() if now is None else now
+    with closing(_connect(path / BLOB_INDEX)) as connection:
+        where = "expiry IS NULL OR expiry >= ?"
+        if not dry_run:
+            connection.execute(f"DELETE FROM refs WHERE NOT ({where})", (now,))
+        return {
+            digest
+            for (digest,) in connection.execute(
+                f"SELECT DISTINCT digest FROM refs WHERE {where}", (now,)
+            )
+        }
+
+
+def is_collectable(blob: Path, mtime: float, referenced: set[str], now: float) -> bool:
+    """Unreferenced blobs are collected once older than the grace period."""
+    return blob.stem not in referenced and mtime < now - BLOB_GRACE_PERIOD
+
+
+def collect_blobs(path: Path | str, dry_run: bool = False) -> BlobGcReport:
+    """Remove the blobs under `path` that are no longer referenced."""
+    path = path if isinstance(path, Path) else Path(path)
+    now = time.time()
+    referenced = referenced_blobs(path, now, dry_run)
+
+    removed = reclaimed = remaining = 0
+    for blob in path.glob(f"*/*/*{BLOB_SUFFIX}"):
+        stat = blob.stat()
+        if not is_collectable(blob, stat.st_mtime, referenced, now):
+            remaining += stat.st_size
+            continue
+        if not dry_run:
+            blob.unlink(missing_ok=True)
+        removed += 1
+        reclaimed += stat.st_size
+    return BlobGcReport(
+        blobs_removed=removed, bytes_reclaimed=reclaimed, bytes_remaining=remaining
+    )
+
+
+class StoredResponse(Response):
+    """
+    A Response whose content is in a BlobStore, under `content_digest`.
+    Without a digest, the content is stored inline, as in earlier entries.
+    """
+
+    content: str = ""
+    content_digest: str | None = None
+
+
+class DedupResponseCacheBackend:
+    """
+    Cache of Responses that stores their content once per distinct content
+    in `blobs`, and only the rest of the response, with the digest of its
+    content, in `entries`. Byte-identical pages under different URLs, such
+    as unchanged paginated listings, then take the space of one.
+    """
+
+    def __init__(self, entries: CacheBackend[StoredResponse], blobs: BlobStore):
+        self.entries = entries
+        self.blobs = blobs
+
+    async def get(self, key: str) -> Response | None:
+        entry = await self.get_entry(key)
+        return entry.value if entry is not None else None
+
+    async def get_entry(self, key: str) -> CacheEntry[Response] | None:
+        entry = await self.entries.get_entry(key)
+        if entry is None:
+            return None
+        digest = entry.value.content_digest
+        content = await self.blobs.get(digest) if digest is not None else None
+        return self._resolve(entry, content)
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, CacheEntry[Response]]:
+        entries = await self.entries.get_many(keys)
+        blobs = await self.blobs.get_many(
+            entry.value.content_digest
+            for entry in entries.values()
+            if entry.value.content_digest is not None
+        )
+        resolved = {}
+        for key, entry in entries.items():
+            digest = entry.value.content_digest
+            response = self._resolve(entry, blobs.get(digest) if digest else None)
+            if response is not None:
+                resolved[key] = response
+        return resolved
+
+    def _resolve(
+        self, entry: CacheEntry[StoredResponse], content: bytes | None
+    ) -> CacheEntry[Response] | None:
+        stored = entry.value
+        if stored.content_digest is None:
+            response = Response.model_validate(stored.model_dump())
+        elif content is None:
+            # The blob was collected or lost, treat it as a miss
+            return None
+        else:
+            response = Response.model_validate(
+                {**stored.model_dump(), "content": content.decode("utf-8")}
+            )
+        return CacheEntry(
+            value=response, expires_at=entry.expires_at, stale_at=entry.stale_at
+        )
+
+    async def set(
+        self,
+        key: str,
+        value: Response,
+        ttl: float | None = None,
+        soft_ttl: float | None = None,
+    ) -> None:
+        expiry = (time.time() + ttl) if ttl is not None else None
+        digest = await self.blobs.put(key, value.content.encode("utf-8"), expiry)
+        await self.entries.set(
+            key, self._stored(value, digest), ttl=ttl, soft_ttl=soft_ttl
+        )
+
+    async def set_many(
+        self,
+        items: Mapping[str, Response],
+        ttl: float | None = None,
+        soft_ttl: float | None = None,
+    ) -> None:
+        expiry = (time.time() + ttl) if ttl is not None else None
+        digests = await self.blobs.put_many(
+            {key: value.content.encode("utf-8") for key, value in items.items()},
+            expiry,
+        )
+        await self.entries.set_many(
+            {
+                key: self._stored(value, digest)
+                for (key, value), digest in zip(items.items(), digests)
+            },
+            ttl=ttl,
+            soft_ttl=soft_ttl,
+        )
+
+    @staticmethod
+    def _stored(value: Response, digest: str) -> StoredResponse:
+        return StoredResponse.model_validate(
+            {**value.model_dump(exclude={"content"}), "content_digest": digest}
+        )
+
+    async def delete(self, key: str) -> None:
+        await self.entries.delete(key)
+        await self.blobs.release(key)
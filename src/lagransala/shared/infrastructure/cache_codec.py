@@ -0,0 +1,193 @@
+import json
+import math
+import struct
+import zlib
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any, ClassVar, NamedTuple, Protocol
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore[assignment]
+
+
+class CacheCodec(Protocol):
+    """Compression of serialized cache entries, identified by a byte."""
+
+    id: ClassVar[int]
+
+    def encode(self, data: bytes) -> bytes: ...
+
+    def decode(self, data: bytes | memoryview) -> bytes: ...
+
+
+@dataclass(frozen=True)
+class IdentityCodec:
+    id: ClassVar[int] = 0
+
+    def encode(self, data: bytes) -> bytes:
+        return data
+
+    def decode(self, data: bytes | memoryview) -> bytes:
+        # Copies buffers such as memoryviews, bytes are returned as is
+        return bytes(data)
+
+
+@dataclass(frozen=True)
+class ZlibCodec:
+    id: ClassVar[int] = 1
+    level: int = 6
+
+    def encode(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decode(self, data: bytes | memoryview) -> bytes:
+        return zlib.decompress(data)
+
+
+def _zstandard() -> ModuleType:
+    if zstandard is None:
+        raise ImportError(
+            "ZstdCodec requires the 'zstandard' package, from the 'zstd' extra"
+        )
+    return zstandard
+
+
+@dataclass(frozen=True)
+class ZstdCodec:
+    """Needs the optional `zstandard` package (the `zstd` extra)."""
+
+    id: ClassVar[int] = 2
+    level: int = 3
+
+    def __post_init__(self) -> None:
+        _zstandard()
+
+    def encode(self, data: bytes) -> bytes:
+        return _zstandard().ZstdCompressor(level=self.level).compress(data)
+
+    def decode(self, data: bytes | memoryview) -> bytes:
+        return _zstandard().ZstdDecompressor().decompress(data)
+
+
+_DECODERS: dict[int, CacheCodec] = {
+    IdentityCodec.id: IdentityCodec(),
+    ZlibCodec.id: ZlibCodec(),
+}
+
+
+def _decoder(codec_id: int) -> CacheCodec:
+    if codec_id == ZstdCodec.id and codec_id not in _DECODERS:
+        _DECODERS[codec_id] = ZstdCodec()
+    try:
+        return _DECODERS[codec_id]
+    except KeyError:
+        raise ValueError(f"Unknown cache codec {codec_id}") from None
+
+
+def default_codec() -> CacheCodec:
+    return ZlibCodec()
+
+
+# Entries start with MAGIC, the format version, the codec id, then the expiry
+# and soft expiry as doubles (NaN for none) and the compressed JSON of the data.
+MAGIC = b"LGC"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct(f"<{len(MAGIC)}sBBdd")
+HEADER_SIZE = _HEADER.size
+
+
+class DecodedEntry(NamedTuple):
+    data: bytes
+    expiry: float | None
+    stale_at: float | None
+    legacy: bool
+
+
+def _pack_time(at: float | None) -> float:
+    return math.nan if at is None else at
+
+
+def _unpack_time(at: float) -> float | None:
+    return None if math.isnan(at) else at
+
+
+def encode_entry(
+    data: bytes, expiry: float | None, stale_at: float | None, codec: CacheCodec
+) -> bytes:
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, codec.id, _pack_time(expiry), _pack_time(stale_at)
+    )
+    return header + codec.encode(data)
+
+
+def read_expiry(blob: bytes | memoryview) -> float | None:
+    """The expiry of an encoded entry, without decompressing it."""
+    if blob[: len(MAGIC)] == MAGIC:
+        try:
+            return _unpack_time(_HEADER.unpack_from(blob)[3])
+        except struct.error as e:
+            raise ValueError("Truncated cache entry") from e
+    return _legacy_payload(blob).get("expiry")
+
+
+def decode_entry(blob: bytes | memoryview) -> DecodedEntry:
+    """
+    Decode an entry written by `encode_entry`, or a legacy JSON entry
+    (`{"expiry": ..., "data": ...}`). Raises ValueError if it is neither.
+    `blob` may be a memoryview, for instance of a memory-mapped file.
+    """
+    if blob[: len(MAGIC)] != MAGIC:
+        payload = _legacy_payload(blob)
+        return DecodedEntry(
+            data=json.dumps(payload["data"]).encode("utf-8"),
+            expiry=payload.get("expiry"),
+            stale_at=payload.get("stale_at"),
+            legacy=True,
+        )
+    try:
+        _, version, codec_id, expiry, stale_at = _HEADER.unpack_from(blob)
+    except struct.error as e:
+        raise ValueError("Truncated cache entry") from e
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported cache entry version {version}")
+    try:
+        data = _decoder(codec_id).decode(blob[_HEADER.size :])
+    except zlib.error as e:
+        raise ValueError("Corrupted cache entry") from e
+    return DecodedEntry(
+        data=data,
+        expiry=_unpack_time(expiry),
+        stale_at=_unpack_time(stale_at),
+        legacy=False,
+    )
+
+
+def encode_data(data: bytes, codec: CacheCodec) -> bytes:
+    """Encode data stored without expiries, as in SQLite rows."""
+    return bytes((FORMAT_VERSION, codec.id)) + codec.encode(data)
+
+
+def decode_data(stored: bytes | memoryview | str) -> bytes | str:
+    """Decode data from `encode_data`, or legacy JSON text, as is."""
+    if isinstance(stored, str):
+        return stored
+    version, codec_id = stored[0], stored[1]
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported cache entry version {version}")
+    try:
+        return _decoder(codec_id).decode(stored[2:])
+    except zlib.error as e:
+        raise ValueError("Corrupted cache entry") from e
+
+
+def _legacy_payload(blob: bytes | memoryview) -> dict[str, Any]:
+    try:
+        # json only reads bytes and str, not views of a memory-mapped file
+        payload = json.loads(bytes(blob))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Not a cache entry") from e
+    if not isinstance(payload, dict) or "data" not in payload:
+        raise ValueError("Not a cache entry")
+    return payload
@@ -0,0 +1,282 @@
+import logging
+import os
+import re
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from .blob_store import BLOB_INDEX, BLOB_SUFFIX, is_collectable, referenced_blobs
+from .cache_codec import HEADER_SIZE, MAGIC, read_expiry
+from .file_cache_backend import expiry_mtime, is_entry_path
+from .log_cache_backend import LOG_INDEX, LOG_SEGMENT_SUFFIX, collect_log
+
+logger = logging.getLogger(__name__)
+
+# Temporary files older than this are left over from interrupted writes
+TEMP_FILE_MAX_AGE = 3600
+
+_SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*$", re.IGNORECASE)
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def parse_size(size: str) -> int:
+    """Parse a size such as `512`, `500M` or `2GiB` into bytes."""
+    match = _SIZE_RE.match(size)
+    if match is None:
+        raise ValueError(f"Invalid size '{size}'")
+    number, unit = match.groups()
+    return int(float(number) * _SIZE_UNITS[unit.upper()])
+
+
+@dataclass
+class GcReport:
+    entries_scanned: int = 0
+    entries_expired: int = 0
+    entries_evicted: int = 0
+    temp_files_removed: int = 0
+    blobs_removed: int = 0
+    bytes_reclaimed: int = 0
+    bytes_remaining: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.entries_scanned} entries scanned, {self.entries_expired} "
+            f"expired, {self.entries_evicted} evicted, {self.temp_files_removed} "
+            f"temporary files removed, {self.blobs_removed} blobs removed, "
+            f"{format_size(self.bytes_reclaimed)} "
+            f"reclaimed, {format_size(self.bytes_remaining)} remaining"
+        )
+
+
+def format_size(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+@dataclass
+class _File:
+    path: Path
+    size: int
+    last_used: float
+
+
+def scan_files(path: Path) -> Iterator[os.DirEntry[str]]:
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from scan_files(Path(entry.path))
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def _stored_expiry(path: Path) -> float | None:
+    """Read the expiry from the entry itself. Raises ValueError if invalid."""
+    with path.open("rb") as f:
+        content = f.read(HEADER_SIZE)
+        if not content.startswith(MAGIC):
+            # Plain JSON entries have to be read whole
+            content += f.read()
+    return read_expiry(content)
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a table name as an SQL identifier."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _remove(path: Path, dry_run: bool) -> None:
+    if not dry_run:
+        path.unlink(missing_ok=True)
+
+
+def _collect_sqlite(path: Path, now: float, dry_run: bool, report: GcReport) -> None:
+    def size() -> int:
+        return sum(
+            file.stat().st_size
+            for file in (path, path.with_name(path.name + "-wal"))
+            if file.exists()
+        )
+
+    size_before = size()
+    with closing(sqlite3.connect(path, isolation_level=None)) as connection:
+        tables = [
+            name
+            for (name,) in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+            if {"key", "expiry"}
+            <= {
+                column[1]
+                for column in connection.execute(
+                    f"PRAGMA table_info({quote_identifier(name)})"
+                )
+            }
+        ]
+        for table in map(quote_identifier, tables):
+            (count,) = connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+            report.entries_scanned += count
+            where = "WHERE expiry IS NOT NULL AND expiry < ?"
+            if dry_run:
+                (expired,) = connection.execute(
+                    f"SELECT COUNT(*) FROM {table} {where}", (now,)
+                ).fetchone()
+            else:
+                expired = connection.execute(
+                    f"DELETE FROM {table} {where}", (now,)
+                ).rowcount
+            report.entries_expired += expired
+        if tables and not dry_run:
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            connection.execute("VACUUM")
+
+    size_after = size()
+    report.bytes_reclaimed += max(size_before - size_after, 0)
+    report.bytes_remaining += size_after
+
+
+def _collect_log(path: Path, dry_run: bool, report: GcReport) -> None:
+    def size() -> int:
+        return sum(
+            file.stat().st_size
+            for file in path.iterdir()
+            if file.name == LOG_INDEX or file.name.endswith(LOG_SEGMENT_SUFFIX)
+        )
+
+    size_before = size()
+    log = collect_log(path, dry_run)
+    report.entries_scanned += log.entries
+    report.entries_expired += log.entries_expired
+    size_after = size()
+    report.bytes_reclaimed += max(size_before - size_after, 0)
+    report.bytes_remaining += size_after
+
+
+def _remove_empty_dirs(path: Path) -> None:
+    for directory, _, _ in os.walk(path, topdown=False):
+        if Path(directory) != path:
+            try:
+                # Only succeeds for empty directories
+                os.rmdir(directory)
+            except OSError:
+                pass
+
+
+def collect_garbage(
+    path: Path | str,
+    max_bytes: int | None = None,
+    dry_run: bool = False,
+) -> GcReport:
+    """
+    Delete expired entries of the file and SQLite caches under `path`, then
+    evict the least recently used file entries until they fit in `max_bytes`.
+    Only files named as the backends name them are touched, so other files
+    kept under `path`, such as saved metrics, are left alone.
+
+    File entries are found with a directory scan: their modification time is
+    their expiry (see `expiry_mtime`), so only entries that look expired are
+    read to confirm it. Entries written before that convention get their
+    modification time fixed on the way. Last use is the access time, or the
+    write time on file systems mounted with noatime. SQLite caches are
+    purged and vacuumed, and log stores (see `LogCacheBackend`) purged and
+    compacted, which must not be open meanwhile. Neither counts towards
+    `max_bytes`. Blobs of blob stores that are no longer referenced are
+    removed, and the others count towards `max_bytes` like file entries.
+    """
+    path = path if isinstance(path, Path) else Path(path)
+    report = GcReport()
+    if not path.exists():
+        return report
+
+    now = time.time()
+    kept: list[_File] = []
+    referenced: dict[Path, set[str]] = {}
+    logs: list[Path] = []
+    for entry in scan_files(path):
+        file = Path(entry.path)
+        stat = entry.stat(follow_symlinks=False)
+
+        if entry.name.startswith(".") and entry.name.endswith(".tmp"):
+            if stat.st_ctime < now - TEMP_FILE_MAX_AGE:
+                _remove(file, dry_run)
+                report.temp_files_removed += 1
+                report.bytes_reclaimed += stat.st_size
+            continue
+        if entry.name == BLOB_INDEX or entry.name.endswith(LOG_SEGMENT_SUFFIX):
+            continue
+        if entry.name == LOG_INDEX:
+            # Compacted once the scan is done, as compaction deletes segments
+            logs.append(file.parent)
+            continue
+        if entry.name.endswith(".sqlite"):
+            _collect_sqlite(file, now, dry_run, report)
+            continue
+
+        if entry.name.endswith(BLOB_SUFFIX):
+            store = file.parents[2]
+            if not (store / BLOB_INDEX).exists():
+                continue
+            if store not in referenced:
+                referenced[store] = referenced_blobs(store, now, dry_run)
+            if is_collectable(file, stat.st_mtime, referenced[store], now):
+                _remove(file, dry_run)
+                report.blobs_removed += 1
+                report.bytes_reclaimed += stat.st_size
+                continue
+        elif is_entry_path(file) or entry.name.endswith(".json"):
+            # Other JSON files, such as saved metrics, are left alone unless
+            # they are entries of the flat layout
+            sharded = is_entry_path(file)
+            if stat.st_mtime < now or not sharded:
+                try:
+                    expiry = _stored_expiry(file)
+                except (OSError, ValueError):
+                    if not sharded:
+                        continue
+                    # Unreadable entries are never served, drop them
+                    expiry = now
+                report.entries_scanned += 1
+                if expiry is not None and expiry <= now:
+                    _remove(file, dry_run)
+                    report.entries_expired += 1
+                    report.bytes_reclaimed += stat.st_size
+                    continue
+                if not dry_run:
+                    os.utime(file, (stat.st_atime, expiry_mtime(expiry)))
+            else:
+                report.entries_scanned += 1
+        else:
+            continue
+
+        kept.append(
+            _File(
+                path=file,
+                size=stat.st_size,
+                last_used=max(stat.st_atime, stat.st_ctime),
+            )
+        )
+
+    for log in logs:
+        _collect_log(log, dry_run, report)
+
+    total = sum(file.size for file in kept)
+    if max_bytes is not None and total > max_bytes:
+        kept.sort(key=lambda file: file.last_used)
+        for file in kept:
+            if total <= max_bytes:
+                break
+            _remove(file.path, dry_run)
+            total -= file.size
+            report.entries_evicted += 1
+            report.bytes_reclaimed += file.size
+    report.bytes_remaining += total
+
+    if not dry_run:
+        _remove_empty_dirs(path)
+    logger.info("Cache garbage collection of %s: %s", path, report)
+    return report
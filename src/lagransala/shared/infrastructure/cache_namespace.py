@@ -0,0 +1,79 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Type, TypeVar
+
+from pydantic import BaseModel
+
+from ..domain.caching import CacheBackend
+from .file_cache_backend import FileCacheBackend
+from .memory_cache_backend import Eviction, MemoryCacheBackend
+from .tiered_cache_backend import TieredCacheBackend
+
+Data = TypeVar("Data", bound=BaseModel)
+
+
+@dataclass(frozen=True)
+class CacheNamespace:
+    """
+    A kind of cached data with its own directory and policies, so cheap
+    entries under disk pressure never evict costly ones.
+
+    `ttl` is how long entries are fresh and `stale_ttl` how much longer they
+    may be served while they are refreshed. `max_bytes` is the disk budget
+    enforced by `cache gc`, least recently used entries first, and
+    `memory_max_bytes` the size of an in-memory tier evicted by `eviction`.
+    """
+
+    name: str
+    directory: str
+    ttl: int | None = None
+    stale_ttl: int | None = None
+    max_bytes: int | None = None
+    memory_max_bytes: int | None = None
+    eviction: Eviction = "lru"
+
+    def path(self, *parts: str) -> Path:
+        return Path(self.directory, *parts)
+
+    def file_backend(
+        self, data_type: Type[Data], *parts: str
+    ) -> FileCacheBackend[Data]:
+        """A file backend in this namespace, or in a subdirectory of it."""
+        return FileCacheBackend(data_type, cache_dir=str(self.path(*parts)))
+
+    def with_memory_tier(self, backend: CacheBackend[Data]) -> CacheBackend[Data]:
+        """Put `backend` behind the in-memory tier, if the namespace has one."""
+        if self.memory_max_bytes is None:
+            return backend
+        return TieredCacheBackend(
+            MemoryCacheBackend[Data](
+                max_bytes=self.memory_max_bytes, eviction=self.eviction
+            ),
+            backend,
+        )
+
+
+CACHE_NAMESPACES: dict[str, CacheNamespace] = {
+    namespace.name: namespace
+    for namespace in [
+        # Fetched pages, robots.txt rules and fetch failures: cheap to fetch
+        # again, so bounded on disk and in memory
+        CacheNamespace(
+            name="http",
+            directory=".cache/http",
+            ttl=3600 * 24,  # 1 day
+            stale_ttl=3600 * 24 * 6,
+            max_bytes=2 * 1024**3,
+            memory_max_bytes=128 * 1024**2,
+        ),
+        # Results of LLM calls: costly, so kept until deleted explicitly
+        CacheNamespace(name="extract", directory=".cache/extract"),
+    ]
+}
+
+
+def get_cache_namespace(name: str) -> CacheNamespace:
+    namespace = CACHE_NAMESPACES.get(name)
+    if namespace is None:
+        raise ValueError(f"Unknown cache namespace '{name}'")
+    return namespace
@@ -0,0 +1,108 @@
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+
+from .blob_store import BLOB_INDEX, BLOB_SUFFIX
+from .cache_gc import format_size, quote_identifier, scan_files
+from .file_cache_backend import is_entry_path
+from .log_cache_backend import LOG_INDEX, LOG_SEGMENT_SUFFIX, count_log_entries
+
+# Where event discovery saves the cache metrics of its last run
+RUN_METRICS_PATH = ".cache/metrics.json"
+
+
+@dataclass
+class CacheSummary:
+    entries: int = 0
+    expired_entries: int = 0
+    entry_bytes: int = 0
+    blobs: int = 0
+    blob_bytes: int = 0
+    blob_references: int = 0
+    database_rows: int = 0
+    database_bytes: int = 0
+    log_entries: int = 0
+    log_bytes: int = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self.entry_bytes + self.blob_bytes + self.database_bytes + self.log_bytes
+
+    def __str__(self) -> str:
+        summary = (
+            f"{self.entries} entries ({self.expired_entries} expired), "
+            f"{format_size(self.entry_bytes)}"
+        )
+        if self.blobs or self.blob_references:
+            summary += (
+                f"; {self.blobs} blobs for {self.blob_references} references, "
+                f"{format_size(self.blob_bytes)}"
+            )
+        if self.database_rows or self.database_bytes:
+            summary += (
+                f"; {self.database_rows} database rows, "
+                f"{format_size(self.database_bytes)}"
+            )
+        if self.log_entries or self.log_bytes:
+            summary += (
+                f"; {self.log_entries} log entries, {format_size(self.log_bytes)}"
+            )
+        return f"{summary}; {format_size(self.total_bytes)} in total"
+
+
+def _count_rows(path: Path) -> int:
+    with closing(sqlite3.connect(path)) as connection:
+        tables = [
+            name
+            for (name,) in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        ]
+        return sum(
+            connection.execute(
+                f"SELECT COUNT(*) FROM {quote_identifier(table)}"
+            ).fetchone()[0]
+            for table in tables
+        )
+
+
+def summarize_cache(path: Path | str) -> CacheSummary:
+    """
+    Count the entries, blobs, database rows and log entries of the caches
+    under `path`, and their size on disk. File entries count as expired from
+    their modification time (see `expiry_mtime`), without being read.
+    """
+    path = path if isinstance(path, Path) else Path(path)
+    summary = CacheSummary()
+    if not path.exists():
+        return summary
+
+    now = time.time()
+    for entry in scan_files(path):
+        stat = entry.stat(follow_symlinks=False)
+        if entry.name == BLOB_INDEX:
+            with closing(sqlite3.connect(entry.path)) as connection:
+                (references,) = connection.execute(
+                    "SELECT COUNT(*) FROM refs"
+                ).fetchone()
+            summary.blob_references += references
+        elif entry.name.endswith(BLOB_SUFFIX):
+            summary.blobs += 1
+            summary.blob_bytes += stat.st_size
+        elif entry.name.endswith(".sqlite"):
+            summary.database_rows += _count_rows(Path(entry.path))
+            summary.database_bytes += stat.st_size
+        elif entry.name.endswith(("-wal", "-shm")):
+            summary.database_bytes += stat.st_size
+        elif entry.name == LOG_INDEX:
+            summary.log_entries += count_log_entries(Path(entry.path).parent)
+            summary.log_bytes += stat.st_size
+        elif entry.name.endswith(LOG_SEGMENT_SUFFIX):
+            summary.log_bytes += stat.st_size
+        elif is_entry_path(Path(entry.path)):
+            summary.entries += 1
+            summary.entry_bytes += stat.st_size
+            summary.expired_entries += stat.st_mtime < now
+    return summary
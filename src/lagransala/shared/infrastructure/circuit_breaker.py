@@ -0,0 +1,66 @@
+import time
+from dataclasses import dataclass
+from typing import Literal
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+@dataclass
+class _Circuit:
+    failures: int = 0
+    opened_at: float | None = None
+    trial_in_flight: bool = False
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker. After failure_threshold consecutive failures the
+    circuit opens and requests to the host are rejected; after reset_timeout a
+    single trial request is let through, which closes the circuit on success or
+    opens it again on failure.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._circuits: dict[str, _Circuit] = {}
+
+    def state(self, host: str) -> CircuitState:
+        circuit = self._circuits.get(host)
+        if circuit is None or circuit.opened_at is None:
+            return "closed"
+        if time.monotonic() - circuit.opened_at < self._reset_timeout:
+            return "open"
+        return "half_open"
+
+    def allow(self, host: str) -> bool:
+        match self.state(host):
+            case "closed":
+                return True
+            case "open":
+                return False
+            case "half_open":
+                circuit = self._circuits[host]
+                if circuit.trial_in_flight:
+                    return False
+                circuit.trial_in_flight = True
+                return True
+
+    def release(self, host: str) -> None:
+        """
+        End a trial request that neither succeeded nor failed, for instance
+        because it was cancelled, so another one can be let through.
+        """
+        circuit = self._circuits.get(host)
+        if circuit is not None:
+            circuit.trial_in_flight = False
+
+    def record_success(self, host: str) -> None:
+        self._circuits.pop(host, None)
+
+    def record_failure(self, host: str) -> None:
+        circuit = self._circuits.setdefault(host, _Circuit())
+        circuit.failures += 1
+        circuit.trial_in_flight = False
+        if circuit.opened_at is not None or circuit.failures >= self._failure_threshold:
+            circuit.opened_at = time.monotonic()
@@ -0,0 +1,117 @@
+from dataclasses import dataclass
+from typing import Any
+
+import aiohttp
+
+
+@dataclass
+class ConnectionStats:
+    requests: int = 0
+    connections_created: int = 0
+    connections_reused: int = 0
+    connections_queued: int = 0
+    dns_cache_hits: int = 0
+    dns_cache_misses: int = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        total = self.connections_created + self.connections_reused
+        return self.connections_reused / total if total else 0.0
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        def counter(field: str):
+            async def increment(*_: Any) -> None:
+                setattr(self, field, getattr(self, field) + 1)
+
+            return increment
+
+        trace_config.on_request_start.append(counter("requests"))
+        trace_config.on_connection_create_end.append(counter("connections_created"))
+        trace_config.on_connection_reuseconn.append(counter("connections_reused"))
+        trace_config.on_connection_queued_start.append(counter("connections_queued"))
+        trace_config.on_dns_cache_hit.append(counter("dns_cache_hits"))
+        trace_config.on_dns_cache_miss.append(counter("dns_cache_misses"))
+        return trace_config
+
+    def __str__(self) -> str:
+        return (
+            f"{self.requests} requests, {self.connections_created} connections "
+            f"opened, {self.connections_reused} reused ({self.reuse_ratio:.0%}), "
+            f"{self.connections_queued} queued, DNS cache "
+            f"{self.dns_cache_hits} hits/{self.dns_cache_misses} misses"
+        )
+
+
+@dataclass(frozen=True)
+class ConnectionProfile:
+    """Connector settings for a ClientSession, see aiohttp.TCPConnector."""
+
+    name: str
+    limit: int = 100
+    limit_per_host: int = 0
+    ttl_dns_cache: int | None = 10
+    keepalive_timeout: float = 15.0
+    force_close: bool = False
+    connect_timeout: float | None = 10.0
+    total_timeout: float | None = 60.0
+
+    def connector(self) -> aiohttp.TCPConnector:
+        kwargs: dict[str, Any] = {}
+        if not self.force_close:
+            # aiohttp refuses a keepalive_timeout together with force_close
+            kwargs["keepalive_timeout"] = self.keepalive_timeout
+        return aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            use_dns_cache=self.ttl_dns_cache is not None,
+            ttl_dns_cache=self.ttl_dns_cache,
+            force_close=self.force_close,
+            **kwargs,
+        )
+
+    def client_session(
+        self,
+        headers: dict[str, str] | None = None,
+        stats: ConnectionStats | None = None,
+    ) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(
+            headers=headers,
+            connector=self.connector(),
+            timeout=aiohttp.ClientTimeout(
+                total=self.total_timeout, sock_connect=self.connect_timeout
+            ),
+            trace_configs=[stats.trace_config()] if stats is not None else None,
+        )
+
+
+CONNECTION_PROFILES: dict[str, ConnectionProfile] = {
+    profile.name: profile
+    for profile in [
+        ConnectionProfile(name="default"),
+        # Few hosts with many pages each: keep connections open and reuse them
+        ConnectionProfile(
+            name="venues",
+            limit=64,
+            limit_per_host=16,
+            ttl_dns_cache=3600,
+            keepalive_timeout=60.0,
+        ),
+        # Many hosts with a handful of pages each
+        ConnectionProfile(
+            name="broad",
+            limit=200,
+            limit_per_host=2,
+            ttl_dns_cache=300,
+            keepalive_timeout=5.0,
+        ),
+    ]
+}
+
+
+def get_connection_profile(name: str) -> ConnectionProfile:
+    profile = CONNECTION_PROFILES.get(name)
+    if profile is None:
+        raise ValueError(f"Unknown connection profile '{name}'")
+    return profile
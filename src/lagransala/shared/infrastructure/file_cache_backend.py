@@ -1,47 +1,252 @@
+import asyncio
 import base64
-import json
+import binascii
+import hashlib
+import logging
+import os
+import re
 import time
+import uuid
 from pathlib import Path
-from typing import Generic, Type, TypeVar
+from typing import Generic, Iterable, Mapping, Type, TypeVar
 
-import aiofiles
 import aiofiles.os
 from pydantic import BaseModel
 
+from ..domain.caching import CacheEntry
+from .cache_codec import CacheCodec, decode_entry, default_codec, encode_entry
+
+logger = logging.getLogger(__name__)
+
 Data = TypeVar("Data", bound=BaseModel)
 
 
+# Modification time of entries that never expire
+NO_EXPIRY_MTIME = float(2**31 - 1)
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# Created once a cache directory holds no more JSON entries to convert
+_NO_LEGACY_MARKER = ".no-legacy-entries"
+
+
+def expiry_mtime(expiry: float | None) -> float:
+    """
+    Entries are stored with their expiry as modification time, so expired
+    files can be found from a directory scan without reading them.
+    """
+    return expiry if expiry is not None else NO_EXPIRY_MTIME
+
+
+def is_entry_path(path: Path) -> bool:
+    """Whether `path` is named like an entry, `ab/cd/abcd….bin` (or `.json`)."""
+    digest = path.stem
+    return (
+        path.suffix in (".bin", ".json")
+        and _DIGEST_RE.match(digest) is not None
+        and path.parent.name == digest[2:4]
+        and path.parent.parent.name == digest[:2]
+    )
+
+
+def _json_path(path: Path) -> Path:
+    """Where the entry at `path` was stored before `cache_codec`."""
+    return path.with_suffix(".json")
+
+
+def _expired(entry: CacheEntry) -> bool:
+    return entry.expires_at is not None and time.time() > entry.expires_at
+
+
 class FileCacheBackend(Generic[Data]):
-    def __init__(self, data_type: Type[Data], cache_dir: str):
+    """
+    Stores every entry as a file named after the SHA-256 of its key, in two
+    levels of subdirectories (`ab/cd/abcd….bin`). Entries are the JSON of the
+    value compressed with `codec` (zlib by default) behind a versioned header,
+    see `cache_codec`. Writes go to a temporary file that is renamed over the
+    entry, so readers in this or other processes never see a partially
+    written file.
+
+    Entries in the previous layouts (base64-encoded keys directly in
+    `cache_dir`) are moved to the hashed layout when the backend is created.
+    Plain JSON entries are still read, and rewritten in the current format
+    the first time they are. Misses only look for them while the directory
+    may still hold some.
+    """
+
+    def __init__(
+        self, data_type: Type[Data], cache_dir: str, codec: CacheCodec | None = None
+    ):
         self.data_type = data_type
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.codec = codec if codec is not None else default_codec()
+        migrated = self.migrate_legacy_layout()
+        self._legacy = migrated > 0 or self._has_json_entries()
 
     def _path_for_key(self, key: str) -> Path:
-        key = base64.urlsafe_b64encode(key.encode("utf-8")).decode("utf-8")
-        return self.cache_dir / f"{key}.json"
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.cache_dir / digest[:2] / digest[2:4] / f"{digest}.bin"
+
+    def migrate_legacy_layout(self) -> int:
+        """Move entries of the flat base64 layout to their hashed path."""
+        migrated = 0
+        for legacy_path in self.cache_dir.glob("*.json"):
+            try:
+                key = base64.urlsafe_b64decode(legacy_path.stem).decode("utf-8")
+            except (binascii.Error, UnicodeDecodeError):
+                continue
+            path = _json_path(self._path_for_key(key))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.replace(legacy_path, path)
+            except FileNotFoundError:
+                # Migrated concurrently by another process
+                continue
+            migrated += 1
+        if migrated:
+            (self.cache_dir / _NO_LEGACY_MARKER).unlink(missing_ok=True)
+            logger.info("Migrated %d cache entries in %s", migrated, self.cache_dir)
+        return migrated
+
+    def _has_json_entries(self) -> bool:
+        """
+        Whether JSON entries may remain. The directory is scanned until a
+        scan finds none, which is then recorded by a marker file.
+        """
+        marker = self.cache_dir / _NO_LEGACY_MARKER
+        if marker.exists():
+            return False
+        if next(self.cache_dir.glob("*/*/*.json"), None) is not None:
+            return True
+        marker.touch()
+        return False
 
     async def get(self, key: str) -> Data | None:
-        path = self._path_for_key(key)
-        if not await aiofiles.os.path.exists(path):
-            return None
+        entry = await self.get_entry(key)
+        return entry.value if entry is not None else None
+
+    async def get_entry(self, key: str) -> CacheEntry[Data] | None:
+        # One worker call reads the entry, or the JSON entry it replaces
+        return await asyncio.to_thread(self._read, self._path_for_key(key))
+
+    def _read(self, path: Path) -> CacheEntry[Data] | None:
         try:
-            async with aiofiles.open(path, "r", encoding="utf-8") as f:
-                content = await f.read()
-                payload = json.loads(content)
+            content = path.read_bytes()
+        except FileNotFoundError:
+            return self._read_json(path) if self._legacy else None
+        except OSError:
+            return None
 
-                expiry = payload.get("expiry")
-                if expiry is not None and time.time() > expiry:
-                    await aiofiles.os.remove(path)
-                    return None
+        entry = self._decode(content)
+        if entry is not None and _expired(entry):
+            path.unlink(missing_ok=True)
+            return None
+        return entry
 
-                return self.data_type.model_validate(payload["data"])
+    def _decode(self, content: bytes) -> CacheEntry[Data] | None:
+        try:
+            decoded = decode_entry(content)
+            return CacheEntry(
+                value=self.data_type.model_validate_json(decoded.data),
+                expires_at=decoded.expiry,
+                stale_at=decoded.stale_at,
+            )
         except Exception:
             return None
 
-    async def set(self, key: str, value: Data, ttl: float | None = None) -> None:
+    def _read_json(self, path: Path) -> CacheEntry[Data] | None:
+        """Read a JSON entry of the previous format, and rewrite it at `path`."""
+        json_path = _json_path(path)
+        try:
+            decoded = decode_entry(json_path.read_bytes())
+            value = self.data_type.model_validate_json(decoded.data)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            json_path.unlink(missing_ok=True)
+            return None
+
+        entry = CacheEntry(
+            value=value, expires_at=decoded.expiry, stale_at=decoded.stale_at
+        )
+        if _expired(entry):
+            json_path.unlink(missing_ok=True)
+            return None
+        content = encode_entry(
+            decoded.data, decoded.expiry, decoded.stale_at, self.codec
+        )
+        self._write(path, content, decoded.expiry)
+        json_path.unlink(missing_ok=True)
+        return entry
+
+    def _read_many(self, keys: Iterable[str]) -> dict[str, CacheEntry[Data]]:
+        entries = {}
+        for key in keys:
+            entry = self._read(self._path_for_key(key))
+            if entry is not None:
+                entries[key] = entry
+        return entries
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, CacheEntry[Data]]:
+        # A single worker thread reads every file instead of a hop per file
+        return await asyncio.to_thread(self._read_many, list(keys))
+
+    async def set(
+        self,
+        key: str,
+        value: Data,
+        ttl: float | None = None,
+        soft_ttl: float | None = None,
+    ) -> None:
+        path = self._path_for_key(key)
+        now = time.time()
+
+        def write() -> None:
+            # Compression runs in the worker thread, off the event loop
+            self._write(path, *self._encode(value, now, ttl, soft_ttl))
+
+        await asyncio.to_thread(write)
+
+    async def set_many(
+        self,
+        items: Mapping[str, Data],
+        ttl: float | None = None,
+        soft_ttl: float | None = None,
+    ) -> None:
+        now = time.time()
+        files = [(self._path_for_key(key), value) for key, value in items.items()]
+
+        def write_all() -> None:
+            for path, value in files:
+                self._write(path, *self._encode(value, now, ttl, soft_ttl))
+
+        await asyncio.to_thread(write_all)
+
+    def _encode(
+        self, value: Data, now: float, ttl: float | None, soft_ttl: float | None
+    ) -> tuple[bytes, float | None]:
+        expiry = (now + ttl) if ttl is not None else None
+        stale_at = (now + soft_ttl) if soft_ttl is not None else None
+        data = value.__pydantic_serializer__.to_json(value)
+        return encode_entry(data, expiry, stale_at, self.codec), expiry
+
+    def _write(self, path: Path, content: bytes, expiry: float | None) -> None:
+        """Write the entry atomically, with its expiry as modification time."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.stem}.{uuid.uuid4().hex}.tmp")
+        try:
+            tmp_path.write_bytes(content)
+            os.utime(tmp_path, (time.time(), expiry_mtime(expiry)))
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    async def delete(self, key: str) -> None:
         path = self._path_for_key(key)
-        expiry = (time.time() + ttl) if ttl is not None else None
-        payload = {"expiry": expiry, "data": value.model_dump(mode="json")}
-        async with aiofiles.open(path, "w", encoding="utf-8") as f:
-            await f.write(json.dumps(payload))
+        for entry_path in (path, _json_path(path)):
+            try:
+                await aiofiles.os.remove(entry_path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,106 @@
+import time
+from typing import Callable, Generic, Iterable, Mapping, TypeVar
+
+from pydantic import BaseModel
+
+from ..application.cache_metrics import CACHE_METRICS, CacheMetricsRegistry
+from ..domain.caching import CacheBackend, CacheEntry
+from .memory_cache_backend import MemoryCacheStats, approximate_size
+
+Data = TypeVar("Data", bound=BaseModel)
+
+
+def _memory_stats(backend: CacheBackend) -> MemoryCacheStats | None:
+    """Only in-memory backends, or tiers, evict entries on their own."""
+    for tier in (backend, getattr(backend, "l1", None)):
+        stats = getattr(tier, "stats", None)
+        if isinstance(stats, MemoryCacheStats):
+            return stats
+    return None
+
+
+class InstrumentedCacheBackend(Generic[Data]):
+    """
+    Records the hits, misses, sets, latencies and sizes of the values read
+    and written through `backend` in `metrics`, labelled `label`. Sizes are
+    measured with `sizeof`, which serializes values by default; pass None to
+    skip it for large values on hot paths.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend[Data],
+        label: str,
+        metrics: CacheMetricsRegistry = CACHE_METRICS,
+        sizeof: Callable[[Data], int] | None = approximate_size,
+    ):
+        self.backend = backend
+        self.label = label
+        self.metrics = metrics.labels(label)
+        self._sizeof = sizeof
+
+    async def get(self, key: str) -> Data | None:
+        entry = await self.get_entry(key)
+        return entry.value if entry is not None else None
+
+    async def get_entry(self, key: str) -> CacheEntry[Data] | None:
+        start = time.perf_counter()
+        entry = await self.backend.get_entry(key)
+        self.metrics.get_latency.observe(time.perf_counter() - start)
+        self._record_lookup(entry)
+        return entry
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, CacheEntry[Data]]:
+        keys = list(keys)
+        start = time.perf_counter()
+        entries = await self.backend.get_many(keys)
+        self.metrics.get_latency.observe(time.perf_counter() - start)
+        self.metrics.misses += len(set(keys)) - len(entries)
+        for entry in entries.values():
+            self._record_lookup(entry)
+        return entries
+
+    def _record_lookup(self, entry: CacheEntry[Data] | None) -> None:
+        if entry is None:
+            self.metrics.misses += 1
+            return
+        self.metrics.hits += 1
+        self.metrics.stale_hits += entry.is_stale()
+        if self._sizeof is not None:
+            self.metrics.bytes_read += self._sizeof(entry.value)
+
+    async def set(
+        self,
+        key: str,
+        value: Data,
+        ttl: float | None = None,
+        soft_ttl: float | None = None,
+    ) -> None:
+        start = time.perf_counter()
+        await self.backend.set(key, value, ttl=ttl, soft_ttl=soft_ttl)
+        self.metrics.set_latency.observe(time.perf_counter() - start)
+        self._record_writes([value])
+
+    async def set_many(
+        self,
+        items: Mapping[str, Data],
+        ttl: float | None = None,
+        soft_ttl: float | None = None,
+    ) -> None:
+        start = time.perf_counter()
+        await self.backend.set_many(items, ttl=ttl, soft_ttl=soft_ttl)
+        self.metrics.set_latency.observe(time.perf_counter() - start)
+        self._record_writes(items.values())
+
+    def _record_writes(self, values: Iterable[Data]) -> None:
+        for value in values:
+            self.metrics.sets += 1
+            if self._sizeof is not None:
+                self.metrics.bytes_written += self._sizeof(value)
+        stats = _memory_stats(self.backend)
+        if stats is not None:
+            self.metrics.evictions = stats.evictions
+
+    async def delete(self, key: str) -> None:
+        await self.backend.delete(key)
+        self.metrics.deletes += 1
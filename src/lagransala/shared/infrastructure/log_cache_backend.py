@@ -0,0 +1,556 @@
+import asyncio
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Generic, Iterable, Iterator, Mapping, NamedTuple, Type, TypeVar
+
+from pydantic import BaseModel
+
+from ..domain.caching import CacheEntry
+from .cache_codec import CacheCodec, decode_entry, default_codec, encode_entry
+
+logger = logging.getLogger(__name__)
+
+Data = TypeVar("Data", bound=BaseModel)
+
+LOG_INDEX = "index.lgi"
+LOG_SEGMENT_SUFFIX = ".seg"
+
+# The index starts with its magic, version, number of slots, and of live and
+# deleted slots, then holds the slots: the first 16 bytes of the key digest,
+# the segment (0 if the slot is empty), offset and length of the record, and
+# its expiry (NaN for none).
+_INDEX_MAGIC = b"LGCINDEX"
+_INDEX_VERSION = 1
+_INDEX_HEADER = struct.Struct("<8sIQQQ")
+_INDEX_HEADER_SIZE = 64
+_SLOT = struct.Struct("<16sIQId")
+_TAG_SIZE = 16
+_EMPTY = 0
+_DELETED = 0xFFFFFFFF
+# Rebuild the index once live and deleted slots fill this much of it
+_MAX_LOAD = 0.7
+
+# Records are the SHA-256 of their key and the length of the entry, followed
+# by the entry (see `encode_entry`). A zero length marks the end of a segment.
+_RECORD = struct.Struct("<32sI")
+
+
+class _Location(NamedTuple):
+    segment: int
+    offset: int
+    length: int
+    expiry: float | None
+
+    @property
+    def size(self) -> int:
+        return _RECORD.size + self.length
+
+    def is_expired(self, now: float) -> bool:
+        return self.expiry is not None and now > self.expiry
+
+
+class _Index:
+    """Hash table, with linear probing, of record locations in a mapped file."""
+
+    def __init__(self, path: Path, capacity: int, readonly: bool = False):
+        self.path = path
+        self._readonly = readonly
+        if not readonly and not path.exists():
+            self._create(path, capacity)
+        self._open()
+
+    @staticmethod
+    def _create(path: Path, capacity: int) -> None:
+        with open(path, "wb") as file:
+            file.truncate(_INDEX_HEADER_SIZE + capacity * _SLOT.size)
+            file.write(_INDEX_HEADER.pack(_INDEX_MAGIC, _INDEX_VERSION, capacity, 0, 0))
+
+    def _open(self) -> None:
+        self._file = open(self.path, "rb" if self._readonly else "r+b")
+        access = mmap.ACCESS_READ if self._readonly else mmap.ACCESS_WRITE
+        self._map = mmap.mmap(self._file.fileno(), 0, access=access)
+        magic, version, self.capacity, self.used, self.deleted = (
+            _INDEX_HEADER.unpack_from(self._map)
+        )
+        if magic != _INDEX_MAGIC or version != _INDEX_VERSION:
+            self.close()
+            raise ValueError(f"Not a cache index: {self.path}")
+
+    def _write_header(self) -> None:
+        _INDEX_HEADER.pack_into(
+            self._map,
+            0,
+            _INDEX_MAGIC,
+            _INDEX_VERSION,
+            self.capacity,
+            self.used,
+            self.deleted,
+        )
+
+    def _read_slot(self, slot: int) -> tuple[bytes, int, int, int, float]:
+        return _SLOT.unpack_from(self._map, _INDEX_HEADER_SIZE + slot * _SLOT.size)
+
+    def _write_slot(self, slot: int, tag: bytes, location: _Location) -> None:
+        _SLOT.pack_into(
+            self._map,
+            _INDEX_HEADER_SIZE + slot * _SLOT.size,
+            tag,
+            location.segment,
+            location.offset,
+            location.length,
+            math.nan if location.expiry is None else location.expiry,
+        )
+
+    def _probe(self, tag: bytes) -> Iterator[int]:
+        start = int.from_bytes(tag[:8], "little") % self.capacity
+        for step in range(self.capacity):
+            yield (start + step) % self.capacity
+
+    def find(self, tag: bytes) -> tuple[int, _Location] | None:
+        for slot in self._probe(tag):
+            slot_tag, segment, offset, length, expiry = self._read_slot(slot)
+            if segment == _EMPTY:
+                return None
+            if segment != _DELETED and slot_tag == tag:
+                return slot, _location(segment, offset, length, expiry)
+        return None
+
+    def put(self, tag: bytes, location: _Location) -> _Location | None:
+        """Point `tag` to `location`, and return where it pointed to before."""
+        if self.used + self.deleted + 1 > self.capacity * _MAX_LOAD:
+            self._rebuild()
+        free = None
+        for slot in self._probe(tag):
+            slot_tag, segment, offset, length, expiry = self._read_slot(slot)
+            if segment == _EMPTY:
+                free = slot if free is None else free
+                break
+            if segment == _DELETED:
+                free = slot if free is None else free
+            elif slot_tag == tag:
+                self._write_slot(slot, tag, location)
+                return _location(segment, offset, length, expiry)
+        assert free is not None
+        if self._read_slot(free)[1] == _DELETED:
+            self.deleted -= 1
+        self._write_slot(free, tag, location)
+        self.used += 1
+        self._write_header()
+        return None
+
+    def remove(self, slot: int) -> None:
+        _SLOT.pack_into(
+            self._map, _INDEX_HEADER_SIZE + slot * _SLOT.size, b"", _DELETED, 0, 0, 0
+        )
+        self.used -= 1
+        self.deleted += 1
+        self._write_header()
+
+    def items(self) -> Iterator[tuple[int, bytes, _Location]]:
+        for slot in range(self.capacity):
+            tag, segment, offset, length, expiry = self._read_slot(slot)
+            if segment not in (_EMPTY, _DELETED):
+                yield slot, tag, _location(segment, offset, length, expiry)
+
+    def _rebuild(self) -> None:
+        """Drop the deleted slots, doubling the capacity if it is mostly used."""
+        capacity = self.capacity
+        if self.used + 1 > capacity * _MAX_LOAD / 2:
+            capacity *= 2
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        tmp_path.unlink(missing_ok=True)
+        rebuilt = _Index(tmp_path, capacity)
+        try:
+            for _, tag, location in self.items():
+                rebuilt.put(tag, location)
+            rebuilt.close()
+            self.close()
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            rebuilt.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+        self._open()
+
+    def close(self) -> None:
+        if not self._map.closed:
+            self._map.flush()
+            self._map.close()
+        self._file.close()
+
+
+def _location(segment: int, offset: int, length: int, expiry: float) -> _Location:
+    return _Location(segment, offset, length, None if math.isnan(expiry) else expiry)
+
+
+class _Segment:
+    """A preallocated file of records, appended to through a memory map."""
+
+    def __init__(self, path: Path, size: int | None = None):
+        self.path = path
+        self.id = int(path.stem)
+        if size is not None:
+            with open(path, "xb") as file:
+                file.truncate(size)
+        self._file = open(path, "r+b")
+        self.map = mmap.mmap(self._file.fileno(), 0)
+        self.end = 0 if size is not None else self._find_end()
+
+    @property
+    def size(self) -> int:
+        return len(self.map)
+
+    def records(self) -> Iterator[tuple[int, bytes, int]]:
+        """The offset, key digest and entry length of every record."""
+        offset = 0
+        while offset + _RECORD.size <= self.size:
+            digest, length = _RECORD.unpack_from(self.map, offset)
+            if length == 0 or offset + _RECORD.size + length > self.size:
+                return
+            yield offset, digest, length
+            offset += _RECORD.size + length
+
+    def _find_end(self) -> int:
+        end = 0
+        for offset, _, length in self.records():
+            end = offset + _RECORD.size + length
+        return end
+
+    def fits(self, length: int) -> bool:
+        return self.end + _RECORD.size + length <= self.size
+
+    def append(self, digest: bytes, entry: bytes) -> int:
+        offset = self.end
+        _RECORD.pack_into(self.map, offset, digest, len(entry))
+        start = offset + _RECORD.size
+        self.map[start : start + len(entry)] = entry
+        self.end = start + len(entry)
+        return offset
+
+    def close(self) -> None:
+        self.map.flush()
+        self.map.close()
+        self._file.close()
+
+
+def _digest(key: str) -> bytes:
+    return hashlib.sha256(key.encode("utf-8")).digest()
+
+
+class LogCacheBackend(Generic[Data]):
+    """
+    Appends entries, compressed with `codec` (zlib by default), to segment
+    files of `segment_size` bytes, and keeps where the latest entry of every
+    key is, and until when, in a hash index. Both are memory-mapped, so a
+    lookup is a probe of the index and a slice of a segment, with no file
+    per entry.
+
+    Overwritten, deleted and expired entries stay in their segment until it
+    is compacted: once less than `compact_ratio` of a full segment is live,
+    a background thread appends its live entries to the current segment and
+    deletes it. Call `compact` to do it at once, and `close` before the
+    event loop ends.
+
+    The files are only safe to use from one process at a time. Entries
+    written just before the machine crashes may be lost, or read as misses.
+    """
+
+    def __init__(
+        self,
+        data_type: Type[Data],
+        path: str,
+        segment_size: int = 64 * 1024**2,
+        index_capacity: int = 1 << 16,
+        compact_ratio: float = 0.5,
+        codec: CacheCodec | None = None,
+    ):
+        self.data_type = data_type
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.segment_size = segment_size
+        self.compact_ratio = compact_ratio
+        self.codec = codec if codec is not None else default_codec()
+
+        # Held by the compaction and write threads, and briefly by reads
+        self._lock = threading.RLock()
+        self._compaction_lock = threading.Lock()
+        self._index = _Index(self.path / LOG_INDEX, index_capacity)
+        self._segments = {
+            segment.id: segment
+            for segment in map(
+                _Segment, sorted(self.path.glob(f"*{LOG_SEGMENT_SUFFIX}"))
+            )
+        }
+        # Bytes of the records the index points to, by segment
+        self._live = dict.fromkeys(self._segments, 0)
+        for _, _, location in self._index.items():
+            if location.segment in self._live:
+                self._live[location.segment] += location.size
+        if not self._segments:
+            self._new_segment(segment_size)
+        self._active = self._segments[max(self._segments)]
+        self._compactor: asyncio.Task[int] | None = None
+
+    def _new_segment(self, size: int) -> _Segment:
+        segment_id = max(self._segments, default=0) + 1
+        segment = _Segment(
+            self.path / f"{segment_id:08d}{LOG_SEGMENT_SUFFIX}", size=size
+        )
+        self._segments[segment.id] = segment
+        self._live[segment.id] = 0
+        self._active = segment
+        return segment
+
+    def __len__(self) -> int:
+        return self._index.used
+
+    async def get(self, key: str) -> Data | None:
+        entry = await self.get_entry(key)
+        return entry.value if entry is not None else None
+
+    async def get_entry(self, key: str) -> CacheEntry[Data] | None:
+        # Reads are memory accesses, cheaper than a hop to a thread
+        return self._read(_digest(key))
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, CacheEntry[Data]]:
+        entries = {}
+        for key in keys:
+            entry = self._read(_digest(key))
+            if entry is not None:
+                entries[key] = entry
+        return entries
+
+    def _read(self, digest: bytes) -> CacheEntry[Data] | None:
+        with self._lock:
+            found = self._index.find(digest[:_TAG_SIZE])
+            if found is None:
+                return None
+            slot, location = found
+            segment = self._segments.get(location.segment)
+            if segment is None or location.is_expired(time.time()):
+                self._remove(slot, location)
+                return None
+            end = location.offset + location.size
+            # Decoded from a view of the mapped segment, without copying the
+            # entry first, and released before the segment can be compacted
+            with memoryview(segment.map)[location.offset : end] as record:
+                stored_digest, length = _RECORD.unpack_from(record)
+                if stored_digest != digest or length != location.length:
+                    return None
+                try:
+                    decoded = decode_entry(record[_RECORD.size :])
+                except Exception:
+                    logger.warning("Corrupted cache entry in %s", segment.path)
+                    self._remove(slot, location)
+                    return None
+        try:
+            value = self.data_type.model_validate_json(decoded.data)
+        except Exception:
+            return None
+        return CacheEntry(
+            value=value, expires_at=decoded.expiry, stale_at=decoded.stale_at
+        )
+
+    async def set(
+        self,
+        key: str,
+        value: Data,
+        ttl: float | None = None,
+        soft_ttl: float | None = None,
+    ) -> None:
+        await self.set_many({key: value}, ttl=ttl, soft_ttl=soft_ttl)
+
+    async def set_many(
+        self,
+        items: Mapping[str, Data],
+        ttl: float | None = None,
+        soft_ttl: float | None = None,
+    ) -> None:
+        now = time.time()
+        expiry = (now + ttl) if ttl is not None else None
+        stale_at = (now + soft_ttl) if soft_ttl is not None else None
+        data = {
+            _digest(key): value.__pydantic_serializer__.to_json(value)
+            for key, value in items.items()
+        }
+
+        def write_all() -> None:
+            for digest, json in data.items():
+                # Compressed outside the lock, so reads are not held up
+                entry = encode_entry(json, expiry, stale_at, self.codec)
+                with self._lock:
+                    self._append(digest, entry, expiry)
+
+        await asyncio.to_thread(write_all)
+        self._schedule_compaction()
+
+    def _append(self, digest: bytes, entry: bytes, expiry: float | None) -> None:
+        segment = self._active
+        if not segment.fits(len(entry)):
+            segment = self._new_segment(
+                max(self.segment_size, _RECORD.size + len(entry))
+            )
+        offset = segment.append(digest, entry)
+        location = _Location(segment.id, offset, len(entry), expiry)
+        previous = self._index.put(digest[:_TAG_SIZE], location)
+        self._live[segment.id] += location.size
+        if previous is not None and previous.segment in self._live:
+            self._live[previous.segment] -= previous.size
+
+    async def delete(self, key: str) -> None:
+        with self._lock:
+            found = self._index.find(_digest(key)[:_TAG_SIZE])
+            if found is not None:
+                self._remove(*found)
+        self._schedule_compaction()
+
+    def _remove(self, slot: int, location: _Location) -> None:
+        self._index.remove(slot)
+        if location.segment in self._live:
+            self._live[location.segment] -= location.size
+
+    def _compactable(self, force: bool = False) -> list[_Segment]:
+        return [
+            segment
+            for segment in self._segments.values()
+            if segment is not self._active
+            and (force or self._live[segment.id] < segment.size * self.compact_ratio)
+        ]
+
+    def _schedule_compaction(self) -> None:
+        if self._compactor is not None and not self._compactor.done():
+            return
+        with self._lock:
+            if not self._compactable():
+                return
+        self._compactor = asyncio.create_task(asyncio.to_thread(self.compact))
+
+    def compact(self, force: bool = False) -> int:
+        """
+        Append the live entries of the segments that are mostly garbage, or of
+        every full segment if `force`, to the current segment and delete them.
+        Returns the bytes reclaimed. Blocking: call it from a thread.
+        """
+        with self._compaction_lock:
+            with self._lock:
+                segments = self._compactable(force)
+            reclaimed = 0
+            for segment in segments:
+                moved = 0
+                for offset, digest, length in segment.records():
+                    # Locked per record, so reads and writes go on in between
+                    with self._lock:
+                        moved += self._move(segment, offset, digest, length)
+                with self._lock:
+                    reclaimed += segment.size - moved
+                    del self._live[segment.id]
+                    del self._segments[segment.id]
+                    segment.close()
+                    segment.path.unlink()
+            return reclaimed
+
+    def _move(self, segment: _Segment, offset: int, digest: bytes, length: int) -> int:
+        """Append the record at `offset` if it is live, return its size if so."""
+        found = self._index.find(digest[:_TAG_SIZE])
+        if found is None:
+            return 0
+        slot, location = found
+        if location.segment != segment.id or location.offset != offset:
+            # Overwritten since
+            return 0
+        if location.is_expired(time.time()):
+            self._remove(slot, location)
+            return 0
+        start = offset + _RECORD.size
+        self._append(digest, segment.map[start : start + length], location.expiry)
+        return location.size
+
+    async def purge_expired(self) -> int:
+        """Delete the expired entries and return how many were deleted."""
+        return await asyncio.to_thread(self._purge_expired)
+
+    def _purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [
+                (slot, location)
+                for slot, _, location in self._index.items()
+                if location.is_expired(now)
+            ]
+            for slot, location in expired:
+                self._remove(slot, location)
+        return len(expired)
+
+    def purge_and_compact(self) -> int:
+        """
+        Delete the expired entries, then compact every full segment. Returns
+        how many entries were deleted. Blocking: call it from a thread.
+        """
+        expired = self._purge_expired()
+        self.compact(force=True)
+        return expired
+
+    async def close(self) -> None:
+        """Wait for the compaction and unmap the index and segments."""
+        if self._compactor is not None:
+            await self._compactor
+        self.unmap()
+
+    def unmap(self) -> None:
+        """
+        Unmap the index and segments, without waiting for a background
+        compaction. For use outside an event loop, `close` otherwise.
+        """
+        with self._lock:
+            self._index.close()
+            for segment in self._segments.values():
+                segment.close()
+            self._segments.clear()
+
+
+class LogGcReport(NamedTuple):
+    entries: int
+    entries_expired: int
+
+
+def count_log_entries(path: Path | str) -> int:
+    """The number of entries of the log store at `path`, from its index."""
+    with open(Path(path) / LOG_INDEX, "rb") as file:
+        magic, version, _, used, _ = _INDEX_HEADER.unpack(file.read(_INDEX_HEADER.size))
+    if magic != _INDEX_MAGIC or version != _INDEX_VERSION:
+        raise ValueError(f"Not a cache index: {path}")
+    return used
+
+
+def collect_log(path: Path | str, dry_run: bool = False) -> LogGcReport:
+    """
+    Drop the expired entries of the log store at `path`, then compact every
+    full segment. No backend may have the store open meanwhile. With
+    `dry_run`, the expired entries are only counted, from the index.
+    """
+    if dry_run:
+        now = time.time()
+        index = _Index(Path(path) / LOG_INDEX, 0, readonly=True)
+        try:
+            locations = [location for _, _, location in index.items()]
+        finally:
+            index.close()
+        return LogGcReport(
+            entries=len(locations),
+            entries_expired=sum(location.is_expired(now) for location in locations),
+        )
+
+    backend = LogCacheBackend(BaseModel, str(path))
+    try:
+        entries = len(backend)
+        expired = backend.purge_and_compact()
+    finally:
+        backend.unmap()
+    return LogGcReport(entries=entries, entries_expired=expired)
@@ -1,26 +1,240 @@
+import heapq
 import time
-from typing import Any, Generic, TypeVar
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Generic, Iterable, Literal, Mapping, TypeVar
 
 from pydantic import BaseModel
 
+from ..domain.caching import CacheEntry
+
 Data = TypeVar("Data", bound=BaseModel)
 
+Eviction = Literal["lru", "lfu"]
+
+
+def approximate_size(value: BaseModel) -> int:
+    """Approximate memory use of a model, from the size of its JSON."""
+    return len(value.__pydantic_serializer__.to_json(value))
+
+
+@dataclass
+class MemoryCacheStats:
+    entries: int = 0
+    bytes: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+
+class _Entry(Generic[Data]):
+    __slots__ = ("value", "expiry", "stale_at", "size", "frequency")
+
+    def __init__(
+        self,
+        value: Data,
+        expiry: float | None,
+        stale_at: float | None,
+        size: int,
+    ):
+        self.value = value
+        self.expiry = expiry
+        self.stale_at = stale_at
+        self.size = size
+        self.frequency = 1
+
+
+class _Lru:
+    """Least recently used keys first."""
 
-class MemoryCacheBackend(Generic[Data]):
     def __init__(self) -> None:
-        self._cache: dict[str, dict[str, Any]] = {}
+        self._order: OrderedDict[str, None] = OrderedDict()
+
+    def add(self, key: str, entry: _Entry) -> None:
+        self._order[key] = None
+
+    def touch(self, key: str, entry: _Entry) -> None:
+        self._order.move_to_end(key)
+
+    def remove(self, key: str, entry: _Entry) -> None:
+        del self._order[key]
+
+    def victim(self) -> str:
+        return next(iter(self._order))
+
+
+class _Lfu:
+    """Least frequently used keys first, least recently used among equals."""
+
+    def __init__(self) -> None:
+        self._buckets: dict[int, OrderedDict[str, None]] = {}
+        self._min_frequency = 1
+
+    def add(self, key: str, entry: _Entry) -> None:
+        self._buckets.setdefault(entry.frequency, OrderedDict())[key] = None
+        self._min_frequency = min(self._min_frequency, entry.frequency)
+
+    def touch(self, key: str, entry: _Entry) -> None:
+        self.remove(key, entry)
+        entry.frequency += 1
+        self.add(key, entry)
+
+    def remove(self, key: str, entry: _Entry) -> None:
+        bucket = self._buckets[entry.frequency]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[entry.frequency]
+            if self._min_frequency == entry.frequency:
+                self._min_frequency = min(self._buckets, default=1)
+
+    def victim(self) -> str:
+        return next(iter(self._buckets[self._min_frequency]))
+
+
+class MemoryCacheBackend(Generic[Data]):
+    """
+    In-memory cache, unbounded by default. With `max_entries` or `max_bytes`,
+    entries are evicted by `eviction` policy (LRU or LFU) once a limit is
+    exceeded. Sizes are approximated with `sizeof`, the JSON size by default.
+    Expired entries are swept on writes, or explicitly with `sweep`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+        eviction: Eviction = "lru",
+        sizeof: Callable[[Data], int] = approximate_size,
+    ) -> None:
+        if eviction not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction policy '{eviction}'")
+        self._cache: dict[str, _Entry[Data]] = {}
+        self._policy = _Lru() if eviction == "lru" else _Lfu()
+        self._expiries: list[tuple[float, str]] = []
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._stats = MemoryCacheStats()
+
+    @property
+    def stats(self) -> MemoryCacheStats:
+        self._stats.entries = len(self._cache)
+        return self._stats
 
     async def get(self, key: str) -> Data | None:
+        entry = await self.get_entry(key)
+        return entry.value if entry is not None else None
+
+    async def get_entry(self, key: str) -> CacheEntry[Data] | None:
         entry = self._cache.get(key)
-        if not entry:
+        if entry is None:
+            self._stats.misses += 1
             return None
 
-        if entry["expiry"] is not None and time.time() > entry["expiry"]:
-            del self._cache[key]
+        if entry.expiry is not None and time.time() > entry.expiry:
+            self._remove(key, entry)
+            self._stats.expirations += 1
+            self._stats.misses += 1
             return None
 
-        return entry["value"]
+        self._policy.touch(key, entry)
+        self._stats.hits += 1
+        return CacheEntry(
+            value=entry.value, expires_at=entry.expiry, stale_at=entry.stale_at
+        )
+
+    async def set(
+        self,
+        key: str,
+        value: Data,
+        ttl: float | None = None,
+        soft_ttl: float | None = None,
+    ) -> None:
+        now = time.time()
+        self.sweep(now)
+
+        previous = self._cache.get(key)
+        if previous is not None:
+            self._remove(key, previous)
+
+        size = self._sizeof(value)
+        if self._max_bytes is not None and size > self._max_bytes:
+            # Would evict everything else and still not fit
+            self._stats.evictions += 1
+            return
+
+        entry = _Entry(
+            value,
+            expiry=(now + ttl) if ttl is not None else None,
+            stale_at=(now + soft_ttl) if soft_ttl is not None else None,
+            size=size,
+        )
+        self._cache[key] = entry
+        self._policy.add(key, entry)
+        self._stats.bytes += size
+        if entry.expiry is not None:
+            heapq.heappush(self._expiries, (entry.expiry, key))
+            if len(self._expiries) > 2 * len(self._cache) + 64:
+                self._compact_expiries()
+        self._evict()
+
+    async def delete(self, key: str) -> None:
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._remove(key, entry)
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, CacheEntry[Data]]:
+        entries = {}
+        for key in keys:
+            entry = await self.get_entry(key)
+            if entry is not None:
+                entries[key] = entry
+        return entries
+
+    async def set_many(
+        self,
+        items: Mapping[str, Data],
+        ttl: float | None = None,
+        soft_ttl: float | None = None,
+    ) -> None:
+        for key, value in items.items():
+            await self.set(key, value, ttl=ttl, soft_ttl=soft_ttl)
+
+    def sweep(self, now: float | None = None) -> int:
+        """Remove expired entries and return how many were removed."""
+        now = time.time() if now is None else now
+        removed = 0
+        while self._expiries and self._expiries[0][0] < now:
+            expiry, key = heapq.heappop(self._expiries)
+            entry = self._cache.get(key)
+            # Skip heap items left behind by overwritten or deleted entries
+            if entry is not None and entry.expiry == expiry:
+                self._remove(key, entry)
+                removed += 1
+        self._stats.expirations += removed
+        return removed
+
+    def _compact_expiries(self) -> None:
+        self._expiries = [
+            (entry.expiry, key)
+            for key, entry in self._cache.items()
+            if entry.expiry is not None
+        ]
+        heapq.heapify(self._expiries)
+
+    def _remove(self, key: str, entry: _Entry[Data]) -> None:
+        del self._cache[key]
+        self._policy.remove(key, entry)
+        self._stats.bytes -= entry.size
+
+    def _over_limit(self) -> bool:
+        return (
+            self._max_entries is not None and len(self._cache) > self._max_entries
+        ) or (self._max_bytes is not None and self._stats.bytes > self._max_bytes)
 
-    async def set(self, key: str, value: Data, ttl: float | None = None) -> None:
-        expiry = (time.time() + ttl) if ttl is not None else None
-        self._cache[key] = {"value": value, "expiry": expiry}
+    def _evict(self) -> None:
+        while self._cache and self._over_limit():
+            key = self._policy.victim()
+            self._remove(key, self._cache[key])
+            self._stats.evictions += 1
@@ -0,0 +1,44 @@
+from dataclasses import dataclass
+
+from pydantic import BaseModel
+
+
+class UrlFailure(BaseModel):
+    failures: int
+    status: int | None = None
+    error: str | None = None
+    retry_at: float
+
+
+@dataclass(frozen=True)
+class NegativeCachePolicy:
+    """
+    How long failures are remembered. A TTL of None disables negative caching
+    for that kind of failure. After `tombstone_after` consecutive failures a URL
+    is tombstoned and not requested again for `tombstone_ttl` seconds.
+
+    Throttled responses (429) are never cached as responses: the URL is not
+    requested again for `throttled_ttl` seconds, or for as long as the
+    server's Retry-After asks, and throttling does not count towards
+    tombstoning.
+    """
+
+    client_error_ttl: float | None = 3600
+    server_error_ttl: float | None = 300
+    connection_error_ttl: float | None = 60
+    throttled_ttl: float | None = 60
+    tombstone_after: int = 3
+    tombstone_ttl: float = 3600 * 24 * 7
+
+    def is_failure(self, status: int) -> bool:
+        return status >= 400
+
+    def is_throttled(self, status: int) -> bool:
+        return status == 429
+
+    def ttl_for_status(self, status: int) -> float | None:
+        if self.is_throttled(status):
+            return self.throttled_ttl
+        if status >= 500:
+            return self.server_error_ttl
+        return self.client_error_ttl
@@ -0,0 +1,159 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+from urllib.parse import urlparse
+
+
+@dataclass
+class _HostState:
+    max_concurrency: int
+    delay: float
+    in_flight: int = 0
+    next_start: float = 0.0
+    queued: bool = False
+    waiters: deque[asyncio.Future[None]] = field(default_factory=deque)
+
+
+class RequestScheduler:
+    """
+    Schedules requests with a global in-flight cap, per-host caps and a minimum
+    delay between request starts on the same host. Hosts with pending requests
+    are served round-robin, so a large batch for one host cannot starve others.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 12,
+        max_per_host: int = 4,
+        host_delay: float = 0.0,
+    ):
+        if max_concurrency < 1 or max_per_host < 1:
+            raise ValueError("Concurrency limits must be at least 1")
+        self._max_concurrency = max_concurrency
+        self._max_per_host = max_per_host
+        self._host_delay = host_delay
+        self._in_flight = 0
+        self._hosts: dict[str, _HostState] = {}
+        self._ready: deque[str] = deque()
+        self._wakeup: asyncio.TimerHandle | None = None
+
+    @property
+    def max_concurrency(self) -> int:
+        return self._max_concurrency
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _host(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(
+                max_concurrency=self._max_per_host, delay=self._host_delay
+            )
+            self._hosts[host] = state
+        return state
+
+    def set_host_limits(
+        self,
+        host: str,
+        max_concurrency: int | None = None,
+        delay: float | None = None,
+    ) -> None:
+        """Override the concurrency cap and/or start delay for a single host."""
+        state = self._host(host)
+        if max_concurrency is not None:
+            state.max_concurrency = max(1, max_concurrency)
+        if delay is not None:
+            state.delay = max(0.0, delay)
+        self._dispatch()
+
+    def host_limits(self, host: str) -> tuple[int, float]:
+        state = self._host(host)
+        return state.max_concurrency, state.delay
+
+    async def acquire(self, url: str) -> str:
+        """Wait for a slot for the given URL and return its host."""
+        host = urlparse(url).netloc
+        state = self._host(host)
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        state.waiters.append(waiter)
+        if not state.queued:
+            state.queued = True
+            self._ready.append(host)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted right before cancellation
+                self.release(host)
+            else:
+                try:
+                    state.waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+        return host
+
+    def release(self, host: str) -> None:
+        state = self._hosts[host]
+        state.in_flight -= 1
+        self._in_flight -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[str]:
+        host = await self.acquire(url)
+        try:
+            yield host
+        finally:
+            self.release(host)
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        next_wakeup: float | None = None
+        checked = 0
+        while self._ready and self._in_flight < self._max_concurrency:
+            if checked >= len(self._ready):
+                break
+            host = self._ready.popleft()
+            state = self._hosts[host]
+            while state.waiters and state.waiters[0].done():
+                state.waiters.popleft()
+            if not state.waiters:
+                state.queued = False
+                continue
+            if state.in_flight >= state.max_concurrency:
+                self._ready.append(host)
+                checked += 1
+                continue
+            if state.next_start > now:
+                self._ready.append(host)
+                checked += 1
+                if next_wakeup is None or state.next_start < next_wakeup:
+                    next_wakeup = state.next_start
+                continue
+            state.waiters.popleft().set_result(None)
+            state.in_flight += 1
+            state.next_start = now + state.delay
+            self._in_flight += 1
+            checked = 0
+            if state.waiters:
+                self._ready.append(host)
+            else:
+                state.queued = False
+        if next_wakeup is not None:
+            self._schedule_wakeup(next_wakeup - now)
+
+    def _schedule_wakeup(self, delay: float) -> None:
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+        self._wakeup = asyncio.get_running_loop().call_later(delay, self._on_wakeup)
+
+    def _on_wakeup(self) -> None:
+        self._wakeup = None
+        self._dispatch()
@@ -0,0 +1,334 @@
+import asyncio
+import logging
+import queue
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Generic, Iterable, Mapping, NamedTuple, Type, TypeVar
+
+from pydantic import BaseModel
+
+from ..domain.caching import CacheEntry
+from .cache_codec import CacheCodec, decode_data, default_codec, encode_data
+
+logger = logging.getLogger(__name__)
+
+Data = TypeVar("Data", bound=BaseModel)
+
+_TABLE_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Stay below SQLite's limit on the number of bound parameters
+_MAX_PARAMS = 500
+
+
+class _Pending(NamedTuple):
+    value: Any
+    data: bytes
+    expiry: float | None
+    stale_at: float | None
+
+
+class SqliteCacheBackend(Generic[Data]):
+    """
+    Stores entries in a table of a SQLite database in WAL mode, with an index
+    on the expiry so `purge_expired` is a single DELETE.
+
+    Writes are queued and committed in batches by a background task, either
+    after `flush_interval` seconds or once `batch_size` writes are queued.
+    Queued writes are visible to `get` straight away. Call `flush` to wait
+    for them to be committed and `close` before the event loop ends. Failed
+    commits are retried with backoff, and the queued writes dropped after
+    `max_write_attempts` failures in a row.
+    Reads run in threads, on a pool of up to `pool_size` connections.
+
+    Values are stored as their JSON compressed with `codec` (zlib by default),
+    see `cache_codec`. Rows written as plain JSON text are still read.
+    """
+
+    def __init__(
+        self,
+        data_type: Type[Data],
+        path: str,
+        table: str = "cache",
+        pool_size: int = 4,
+        batch_size: int = 256,
+        flush_interval: float = 0.05,
+        codec: CacheCodec | None = None,
+        max_write_attempts: int = 5,
+    ):
+        if not _TABLE_RE.match(table):
+            raise ValueError(f"Invalid table name '{table}'")
+        self.data_type = data_type
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.table = table
+        self._pool_size = pool_size
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_write_attempts = max_write_attempts
+        self.codec = codec if codec is not None else default_codec()
+
+        self._pool: queue.Queue[sqlite3.Connection] = queue.Queue()
+        self._connections: list[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()
+
+        self._pending: dict[str, _Pending | None] = {}
+        self._writing: dict[str, _Pending | None] = {}
+        self._write_lock = asyncio.Lock()
+        self._batch_full = asyncio.Event()
+        self._writer: asyncio.Task[None] | None = None
+
+        self._write_connection = self._connect()
+        with self._write_connection:
+            self._write_connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, data BLOB NOT NULL, expiry REAL, stale_at REAL"
+                ") WITHOUT ROWID"
+            )
+            self._write_connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_expiry ON {table} (expiry) "
+                "WHERE expiry IS NOT NULL"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None, timeout=30
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _acquire(self) -> sqlite3.Connection:
+        with self._pool_lock:
+            if self._pool.empty() and len(self._connections) < self._pool_size:
+                connection = self._connect()
+                self._connections.append(connection)
+                return connection
+        return self._pool.get()
+
+    def _select(
+        self, key: str
+    ) -> tuple[bytes | str, float | None, float | None] | None:
+        connection = self._acquire()
+        try:
+            return connection.execute(
+                f"SELECT data, expiry, stale_at FROM {self.table} WHERE key = ?",
+                (key,),
+            ).fetchone()
+        finally:
+            self._pool.put(connection)
+
+    def _select_many(
+        self, keys: list[str]
+    ) -> list[tuple[str, bytes | str, float | None, float | None]]:
+        connection = self._acquire()
+        try:
+            rows = []
+            for i in range(0, len(keys), _MAX_PARAMS):
+                chunk = keys[i : i + _MAX_PARAMS]
+                placeholders = ", ".join("?" * len(chunk))
+                rows += connection.execute(
+                    f"SELECT key, data, expiry, stale_at FROM {self.table} "
+                    f"WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+            return rows
+        finally:
+            self._pool.put(connection)
+
+    async def get(self, key: str) -> Data | None:
+        entry = await self.get_entry(key)
+        return entry.value if entry is not None else None
+
+    async def get_entry(self, key: str) -> CacheEntry[Data] | None:
+        if key in self._pending:
+            return self._pending_entry(self._pending[key])
+        if key in self._writing:
+            return self._pending_entry(self._writing[key])
+
+        row = await asyncio.to_thread(self._select, key)
+        if row is None:
+            return None
+        return self._row_entry(*row)
+
+    def _row_entry(
+        self, data: bytes | str, expiry: float | None, stale_at: float | None
+    ) -> CacheEntry[Data] | None:
+        if expiry is not None and time.time() > expiry:
+            return None
+        try:
+            value = self.data_type.model_validate_json(decode_data(data))
+        except Exception:
+            return None
+        return CacheEntry(value=value, expires_at=expiry, stale_at=stale_at)
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, CacheEntry[Data]]:
+        entries: dict[str, CacheEntry[Data]] = {}
+        stored = []
+        for key in keys:
+            if key in self._pending or key in self._writing:
+                pending = self._pending.get(key, self._writing.get(key))
+                entry = self._pending_entry(pending)
+                if entry is not None:
+                    entries[key] = entry
+            else:
+                stored.append(key)
+
+        if stored:
+            rows = await asyncio.to_thread(self._select_many, stored)
+            for key, data, expiry, stale_at in rows:
+                entry = self._row_entry(data, expiry, stale_at)
+                if entry is not None:
+                    entries[key] = entry
+        return entries
+
+    def _pending_entry(self, pending: _Pending | None) -> CacheEntry[Data] | None:
+        if pending is None:
+            return None
+        if pending.expiry is not None and time.time() > pending.expiry:
+            return None
+        return CacheEntry(
+            value=pending.value, expires_at=pending.expiry, stale_at=pending.stale_at
+        )
+
+    async def set(
+        self,
+        key: str,
+        value: Data,
+        ttl: float | None = None,
+        soft_ttl: float | None = None,
+    ) -> None:
+        now = time.time()
+        self._enqueue(
+            key,
+            _Pending(
+                value=value,
+                data=value.__pydantic_serializer__.to_json(value),
+                expiry=(now + ttl) if ttl is not None else None,
+                stale_at=(now + soft_ttl) if soft_ttl is not None else None,
+            ),
+        )
+
+    async def set_many(
+        self,
+        items: Mapping[str, Data],
+        ttl: float | None = None,
+        soft_ttl: float | None = None,
+    ) -> None:
+        for key, value in items.items():
+            await self.set(key, value, ttl=ttl, soft_ttl=soft_ttl)
+
+    async def delete(self, key: str) -> None:
+        self._enqueue(key, None)
+
+    def _enqueue(self, key: str, pending: _Pending | None) -> None:
+        self._pending[key] = pending
+        if len(self._pending) >= self._batch_size:
+            self._batch_full.set()
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write_loop())
+
+    async def _write_loop(self) -> None:
+        failures = 0
+        while self._pending:
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), self._flush_interval)
+            except TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except sqlite3.Error:
+                failures += 1
+                if failures >= self._max_write_attempts:
+                    # A full disk or a read-only or corrupt file: give up
+                    logger.exception(
+                        "Could not write to %s, dropping %d writes",
+                        self.path,
+                        len(self._pending),
+                    )
+                    self._pending.clear()
+                    return
+                logger.exception("Could not write to %s, retrying", self.path)
+                await asyncio.sleep(self._flush_interval * 2**failures)
+            else:
+                failures = 0
+
+    async def flush(self) -> None:
+        """Commit the queued writes in a single transaction."""
+        async with self._write_lock:
+            self._batch_full.clear()
+            if not self._pending:
+                return
+            self._writing, self._pending = self._pending, {}
+            try:
+                await asyncio.to_thread(self._write_batch, self._writing)
+            except BaseException:
+                # Put the batch back unless it was overwritten meanwhile
+                self._pending = {**self._writing, **self._pending}
+                raise
+            finally:
+                self._writing = {}
+
+    def _write_batch(self, batch: dict[str, _Pending | None]) -> None:
+        # Compressed here, in the writer thread rather than on the event loop
+        upserts = [
+            (
+                key,
+                encode_data(pending.data, self.codec),
+                pending.expiry,
+                pending.stale_at,
+            )
+            for key, pending in batch.items()
+            if pending is not None
+        ]
+        deletes = [(key,) for key, pending in batch.items() if pending is None]
+        connection = self._write_connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, data, expiry, stale_at) "
+                "VALUES (?, ?, ?, ?)",
+                upserts,
+            )
+            connection.executemany(f"DELETE FROM {self.table} WHERE key = ?", deletes)
+            connection.execute("COMMIT")
+        except BaseException:
+            # A failed COMMIT may leave the transaction open, or roll it back
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+
+    async def purge_expired(self) -> int:
+        """Delete the expired entries and return how many were deleted."""
+        await self.flush()
+
+        def purge() -> int:
+            cursor = self._write_connection.execute(
+                f"DELETE FROM {self.table} WHERE expiry < ?", (time.time(),)
+            )
+            return cursor.rowcount
+
+        async with self._write_lock:
+            return await asyncio.to_thread(purge)
+
+    async def close(self) -> None:
+        """
+        Commit the queued writes and close the connections. If the writes
+        cannot be committed, they are dropped and the error is raised.
+        """
+        try:
+            while self._pending:
+                await self.flush()
+        except BaseException:
+            self._pending.clear()
+            raise
+        finally:
+            if self._writer is not None:
+                await self._writer
+            with self._pool_lock:
+                for connection in self._connections:
+                    connection.close()
+                self._connections.clear()
+            self._write_connection.close()
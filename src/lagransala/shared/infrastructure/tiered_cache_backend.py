@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import time
+from typing import Generic, Iterable, Mapping, NamedTuple, TypeVar
+
+from pydantic import BaseModel
+
+from ..domain.caching import CacheBackend, CacheEntry
+
+logger = logging.getLogger(__name__)
+
+Data = TypeVar("Data", bound=BaseModel)
+
+
+def _remaining(at: float | None, now: float) -> float | None:
+    return max(at - now, 0.0) if at is not None else None
+
+
+class _Write(NamedTuple):
+    value: BaseModel | None
+    expires_at: float | None
+    stale_at: float | None
+
+
+class TieredCacheBackend(Generic[Data]):
+    """
+    Combines a fast cache (`l1`, usually a bounded MemoryCacheBackend) with a
+    durable one (`l2`). Reads try `l1` first and copy `l2` hits into it,
+    keeping their expiry. Writes go to both tiers: to `l2` before returning,
+    or with `write_behind` in a background task (see `flush`).
+    """
+
+    def __init__(
+        self,
+        l1: CacheBackend[Data],
+        l2: CacheBackend[Data],
+        write_behind: bool = False,
+    ):
+        self.l1 = l1
+        self.l2 = l2
+        self._write_behind = write_behind
+        self._pending: dict[str, _Write] = {}
+        self._writer: asyncio.Task[None] | None = None
+
+    async def get(self, key: str) -> Data | None:
+        entry = await self.get_entry(key)
+        return entry.value if entry is not None else None
+
+    async def get_entry(self, key: str) -> CacheEntry[Data] | None:
+        entry = await self.l1.get_entry(key)
+        if entry is not None:
+            return entry
+
+        entry = await self.l2.get_entry(key)
+        if entry is not None:
+            await self._promote(key, entry)
+        return entry
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, CacheEntry[Data]]:
+        keys = list(keys)
+        entries = await self.l1.get_many(keys)
+        missing = [key for key in keys if key not in entries]
+        if missing:
+            promoted = await self.l2.get_many(missing)
+            for key, entry in promoted.items():
+                await self._promote(key, entry)
+            entries.update(promoted)
+        return entries
+
+    async def _promote(self, key: str, entry: CacheEntry[Data]) -> None:
+        now = time.time()
+        await self.l1.set(
+            key,
+            entry.value,
+            ttl=_remaining(entry.expires_at, now),
+            soft_ttl=_remaining(entry.stale_at, now),
+        )
+
+    async def set(
+        self,
+        key: str,
+        value: Data,
+        ttl: float | None = None,
+        soft_ttl: float | None = None,
+    ) -> None:
+        await self.l1.set(key, value, ttl=ttl, soft_ttl=soft_ttl)
+        if not self._write_behind:
+            await self.l2.set(key, value, ttl=ttl, soft_ttl=soft_ttl)
+            return
+
+        now = time.time()
+        self._enqueue(
+            key,
+            _Write(
+                value=value,
+                expires_at=(now + ttl) if ttl is not None else None,
+                stale_at=(now + soft_ttl) if soft_ttl is not None else None,
+            ),
+        )
+
+    async def set_many(
+        self,
+        items: Mapping[str, Data],
+        ttl: float | None = None,
+        soft_ttl: float | None = None,
+    ) -> None:
+        if self._write_behind:
+            for key, value in items.items():
+                await self.set(key, value, ttl=ttl, soft_ttl=soft_ttl)
+            return
+        await self.l1.set_many(items, ttl=ttl, soft_ttl=soft_ttl)
+        await self.l2.set_many(items, ttl=ttl, soft_ttl=soft_ttl)
+
+    async def delete(self, key: str) -> None:
+        await self.l1.delete(key)
+        if self._write_behind:
+            self._enqueue(key, _Write(value=None, expires_at=None, stale_at=None))
+        else:
+            await self.l2.delete(key)
+
+    def _enqueue(self, key: str, write: _Write) -> None:
+        # Later writes to a key replace earlier ones not yet written
+        self._pending[key] = write
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write_loop())
+
+    async def _write_loop(self) -> None:
+        while self._pending:
+            key = next(iter(self._pending))
+            write = self._pending.pop(key)
+            try:
+                if write.value is None:
+                    await self.l2.delete(key)
+                else:
+                    now = time.time()
+                    await self.l2.set(
+                        key,
+                        write.value,  # type: ignore[arg-type]
+                        ttl=_remaining(write.expires_at, now),
+                        soft_ttl=_remaining(write.stale_at, now),
+                    )
+            except Exception:
+                logger.exception("Could not write %s to the second cache tier", key)
+
+    async def flush(self) -> None:
+        """Wait until the writes behind have reached `l2`."""
+        while self._writer is not None and not self._writer.done():
+            await self._writer
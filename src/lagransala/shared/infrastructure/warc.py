@@ -0,0 +1,185 @@
+import asyncio
+import gzip
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import urlparse
+
+import aiofiles
+
+from ..domain.fetcher import Response
+
+WARC_VERSION = "WARC/1.1"
+
+
+@dataclass
+class WarcRecord:
+    headers: dict[str, str]
+    block: bytes
+
+    @property
+    def type(self) -> str:
+        return self.headers.get("warc-type", "")
+
+    @property
+    def target_uri(self) -> str | None:
+        return self.headers.get("warc-target-uri")
+
+
+def _record_id() -> str:
+    return f"<urn:uuid:{uuid.uuid4()}>"
+
+
+def _build_record(headers: dict[str, str], block: bytes) -> bytes:
+    lines = [WARC_VERSION]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    lines.append(f"Content-Length: {len(block)}")
+    head = ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8")
+    return head + block + b"\r\n\r\n"
+
+
+def _http_request(url: str) -> bytes:
+    parsed = urlparse(url)
+    target = parsed.path or "/"
+    if parsed.query:
+        target += f"?{parsed.query}"
+    return f"GET {target} HTTP/1.1\r\nHost: {parsed.netloc}\r\n\r\n".encode("utf-8")
+
+
+def _http_response(response: Response) -> bytes:
+    body = response.content.encode("utf-8")
+    headers = {
+        "Content-Type": f"{response.content_type}; charset=utf-8",
+        "Content-Length": str(len(body)),
+    }
+    if response.etag:
+        headers["ETag"] = response.etag
+    if response.last_modified:
+        headers["Last-Modified"] = response.last_modified
+    if response.max_age is not None:
+        headers["Cache-Control"] = f"max-age={int(response.max_age)}"
+    head = f"HTTP/1.1 {response.status}\r\n" + "".join(
+        f"{name}: {value}\r\n" for name, value in headers.items()
+    )
+    return (head + "\r\n").encode("utf-8") + body
+
+
+def parse_http_response(block: bytes, truncated: bool = False) -> Response:
+    """Parse the HTTP message stored in a WARC response record."""
+    head, _, body = block.partition(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("iso-8859-1").split("\r\n")
+    headers: dict[str, str] = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    content_type, charset = "application/octet-stream", "utf-8"
+    if "content-type" in headers:
+        mime, *params = headers["content-type"].split(";")
+        content_type = mime.strip().lower()
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "charset" and value:
+                charset = value.strip('"')
+
+    cache_control = headers.get("cache-control", "")
+    max_age = None
+    if cache_control.startswith("max-age="):
+        max_age = float(cache_control.removeprefix("max-age="))
+
+    return Response(
+        status=int(status_line.split()[1]),
+        content=body.decode(charset, errors="replace"),
+        content_type=content_type,
+        etag=headers.get("etag"),
+        last_modified=headers.get("last-modified"),
+        max_age=max_age,
+        discarded=truncated,
+    )
+
+
+class WarcWriter:
+    """
+    Appends request/response pairs to a WARC file. Files ending in `.gz` are
+    written as one gzip member per record, as is customary for `.warc.gz`.
+    """
+
+    def __init__(self, path: Path | str):
+        self.path = path if isinstance(path, Path) else Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._compress = self.path.suffix == ".gz"
+        self._lock = asyncio.Lock()
+        self._initialized = self.path.exists() and self.path.stat().st_size > 0
+
+    def _encode(self, record: bytes) -> bytes:
+        return gzip.compress(record) if self._compress else record
+
+    def _warcinfo(self) -> bytes:
+        block = b"software: lagransala\r\nformat: WARC File Format 1.1\r\n"
+        return _build_record(
+            {
+                "WARC-Type": "warcinfo",
+                "WARC-Record-ID": _record_id(),
+                "WARC-Date": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "WARC-Filename": self.path.name,
+                "Content-Type": "application/warc-fields",
+            },
+            block,
+        )
+
+    async def write(self, url: str, response: Response) -> None:
+        date = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        response_id = _record_id()
+        response_headers = {
+            "WARC-Type": "response",
+            "WARC-Record-ID": response_id,
+            "WARC-Date": date,
+            "WARC-Target-URI": url,
+            "Content-Type": "application/http;msgtype=response",
+        }
+        if response.discarded:
+            response_headers["WARC-Truncated"] = "length"
+        records = [
+            _build_record(response_headers, _http_response(response)),
+            _build_record(
+                {
+                    "WARC-Type": "request",
+                    "WARC-Record-ID": _record_id(),
+                    "WARC-Date": date,
+                    "WARC-Target-URI": url,
+                    "WARC-Concurrent-To": response_id,
+                    "Content-Type": "application/http;msgtype=request",
+                },
+                _http_request(url),
+            ),
+        ]
+
+        async with self._lock:
+            if not self._initialized:
+                records.insert(0, self._warcinfo())
+                self._initialized = True
+            async with aiofiles.open(self.path, "ab") as f:
+                await f.write(b"".join(self._encode(record) for record in records))
+
+
+def read_warc(path: Path | str) -> Iterator[WarcRecord]:
+    """Iterate over the records of a (optionally gzip compressed) WARC file."""
+    path = path if isinstance(path, Path) else Path(path)
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rb") as stream:
+        while True:
+            line = stream.readline()
+            if not line:
+                return
+            if not line.strip():
+                continue
+            if not line.startswith(b"WARC/"):
+                raise ValueError(f"Invalid WARC record in {path}: {line!r}")
+            headers: dict[str, str] = {}
+            while (line := stream.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("utf-8").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            block = stream.read(int(headers.get("content-length", "0")))
+            yield WarcRecord(headers=headers, block=block)
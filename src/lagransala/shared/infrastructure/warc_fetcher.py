@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import random
+from pathlib import Path
+from typing import AsyncIterator
+
+from ..domain.fetcher import Fetcher, FetchError, Response
+from .warc import WarcWriter, parse_http_response, read_warc
+
+logger = logging.getLogger(__name__)
+
+
+class WarcRecordingFetcher:
+    """Fetcher that delegates to another one and records every exchange to WARC."""
+
+    def __init__(self, fetcher: Fetcher, path: Path | str):
+        self._fetcher = fetcher
+        self._writer = WarcWriter(path)
+
+    async def fetch(self, url: str) -> Response:
+        response = await self._fetcher.fetch(url)
+        await self._writer.write(url, response)
+        return response
+
+    async def fetch_urls(self, urls: list[str]) -> list[Response]:
+        return await asyncio.gather(*[self.fetch(url) for url in urls])
+
+    async def iter_fetch(
+        self, urls: list[str], max_in_flight: int | None = None
+    ) -> AsyncIterator[tuple[str, Response | FetchError]]:
+        async for url, response in self._fetcher.iter_fetch(urls, max_in_flight):
+            if isinstance(response, Response):
+                await self._writer.write(url, response)
+            yield url, response
+
+
+class WarcReplayFetcher:
+    """
+    Fetcher that serves responses from WARC archives without touching the
+    network. Every request waits `latency` plus a random `jitter` seconds so
+    replays keep a realistic concurrency profile.
+    """
+
+    def __init__(
+        self,
+        paths: Path | str | list[Path | str],
+        latency: float = 0.0,
+        jitter: float = 0.0,
+    ):
+        self._latency = latency
+        self._jitter = jitter
+        self._responses: dict[str, Response] = {}
+        for path in paths if isinstance(paths, list) else [paths]:
+            for record in read_warc(path):
+                if record.type != "response" or record.target_uri is None:
+                    continue
+                self._responses[record.target_uri] = parse_http_response(
+                    record.block, truncated="warc-truncated" in record.headers
+                )
+        logger.info("Loaded %d responses for replay", len(self._responses))
+
+    async def fetch(self, url: str) -> Response:
+        delay = self._latency + random.uniform(0, self._jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        response = self._responses.get(url)
+        if response is None:
+            raise FetchError(f"{url} is not in the replay archive")
+        return response
+
+    async def fetch_urls(self, urls: list[str]) -> list[Response]:
+        return await asyncio.gather(*[self.fetch(url) for url in urls])
+
+    async def iter_fetch(
+        self, urls: list[str], max_in_flight: int | None = None
+    ) -> AsyncIterator[tuple[str, Response | FetchError]]:
+        """
+        Replays the URLs, yielding results in completion order, with at most
+        `max_in_flight` outstanding at once, as a live fetcher would.
+        """
+        if max_in_flight is None:
+            max_in_flight = len(urls) or 1
+        elif max_in_flight <= 0:
+            raise ValueError(f"max_in_flight must be positive, got {max_in_flight}")
+        semaphore = asyncio.Semaphore(max_in_flight)
+
+        async def fetch_result(url: str) -> tuple[str, Response | FetchError]:
+            async with semaphore:
+                try:
+                    return url, await self.fetch(url)
+                except FetchError as e:
+                    return url, e
+
+        for result in asyncio.as_completed([fetch_result(url) for url in urls]):
+            yield await result
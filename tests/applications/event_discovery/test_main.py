@@ -1,11 +1,13 @@
-from unittest.mock import Mock, patch
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 from pydantic import HttpUrl
 
-from lagransala.applications.event_discovery.__main__ import State, main
+from lagransala.applications.event_discovery.__main__ import State, main, warm
 from lagransala.extractor.domain import EmptyReason, EventExtractionResult
 from lagransala.schedule.domain import Venue
+from lagransala.scraper.domain import Pagination
 
 
 @pytest.fixture
@@ -58,7 +60,9 @@ def test_state_md_content(mock_venue):
 
 
 @pytest.mark.asyncio
-async def test_main_happy_path(mock_venue):
+async def test_main_happy_path(mock_venue, tmp_path, monkeypatch):
+    # Keep the caches main creates out of the working directory
+    monkeypatch.chdir(tmp_path)
     with (
         patch(
             "lagransala.applications.event_discovery.__main__.initialize_sqlmodel"
@@ -70,7 +74,7 @@ async def test_main_happy_path(mock_venue):
             "lagransala.applications.event_discovery.__main__.seed_venues"
         ) as mock_seed_venues,
         patch(
-            "lagransala.applications.event_discovery.__main__.aiohttp.ClientSession"
+            "lagransala.shared.infrastructure.connection_profile.aiohttp.ClientSession"
         ) as mock_aiohttp_session,
         patch(
             "lagransala.applications.event_discovery.__main__.AiohttpFetcher"
@@ -101,8 +105,12 @@ async def test_main_happy_path(mock_venue):
             mock_venue
         ]
         mock_pagination_elements.return_value = ["http://test.com/page1"]
+        mock_fetcher.return_value.drain_refreshes = AsyncMock()
+        mock_event_extractor.return_value.extract_many = AsyncMock(
+            return_value=[Mock()]
+        )
 
-        # Mock the gather calls for fetching content and extracting events
+        # Mock the gather call for fetching content
         async def gather_side_effect(*args, **kwargs):
             return [Mock()]
 
@@ -116,9 +124,48 @@ async def test_main_happy_path(mock_venue):
         mock_seed_venues.assert_called_once()
         mock_aiohttp_session.assert_called_once()
         mock_fetcher.assert_called_once()
+        mock_fetcher.return_value.drain_refreshes.assert_awaited_once()
         mock_pagination_repo.assert_called_once()
         mock_pagination_elements.assert_called_once()
         mock_instructor.assert_called_once()
         mock_event_extractor.assert_called_once()
+        mock_event_extractor.return_value.extract_many.assert_awaited_once()
         mock_content_repo.assert_called_once()
-        assert mock_gather.call_count == 2
+        assert mock_gather.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_warm(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pagination = Pagination(
+        venue_slug="test-venue",
+        type="day",
+        url="http://test.com/?date={date}",
+        date_format="%Y-%m-%d",
+        limit=2,
+        base_url="http://test.com",
+        element_url_pattern="/films/\\d+",
+    )
+    with (
+        patch(
+            "lagransala.applications.event_discovery.__main__.JsonPaginationRepo"
+        ) as mock_pagination_repo,
+        patch(
+            "lagransala.applications.event_discovery.__main__.AiohttpFetcher"
+        ) as mock_fetcher,
+        patch("lagransala.applications.event_discovery.__main__.Robots") as mock_robots,
+    ):
+        mock_pagination_repo.return_value.get.return_value = [pagination]
+        mock_robots.return_value.filter = AsyncMock(side_effect=lambda urls: urls)
+        mock_fetcher.return_value.warm = AsyncMock(return_value="report")
+        mock_fetcher.return_value.drain_refreshes = AsyncMock()
+
+        report = await warm(refresh_within=60, at=datetime(2025, 1, 31))
+
+        assert report == "report"
+        mock_fetcher.return_value.warm.assert_awaited_once_with(
+            ["http://test.com/?date=2025-01-31", "http://test.com/?date=2025-02-01"],
+            refresh_within=60,
+            max_in_flight=2,
+        )
+        mock_fetcher.return_value.drain_refreshes.assert_awaited_once()
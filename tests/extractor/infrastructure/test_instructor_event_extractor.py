@@ -80,3 +80,27 @@ async def test_instructor_event_extractor_with_cache_extract(mock_client):
     assert call_args.kwargs["messages"][1]["content"] == content
     assert "today" in call_args.kwargs["context"]
     assert result == expected_result, "result was not cached correctly"
+
+
+@pytest.mark.asyncio
+async def test_instructor_event_extractor_extract_many(mock_client):
+    """Test that cached results are looked up in one batch and reused."""
+    cache_backend = MemoryCacheBackend[EventExtractionResult]()
+    extractor = InstructorEventExtractor(
+        client=mock_client, model="test-model", cache_backend=cache_backend
+    )
+    expected_result = EventExtractionResult(
+        events=[], empty_reason=EmptyReason.NO_EVENTS_FOUND
+    )
+    mock_client.chat.completions.create.return_value = expected_result
+    await extractor.extract("cached")
+    mock_client.chat.completions.create.reset_mock()
+
+    cache_backend.get_many = AsyncMock(wraps=cache_backend.get_many)
+    results = await extractor.extract_many(["cached", "new", "new"])
+
+    assert results == [expected_result] * 3
+    cache_backend.get_many.assert_awaited_once()
+    mock_client.chat.completions.create.assert_called_once()
+    call_args = mock_client.chat.completions.create.call_args
+    assert call_args.kwargs["messages"][1]["content"] == "new"
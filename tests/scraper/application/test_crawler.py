@@ -5,6 +5,7 @@ from pydantic import HttpUrl
 
 from lagransala.scraper.application.crawler import Crawler
 from lagransala.scraper.domain import CrawlResult
+from lagransala.shared.application import Robots
 from lagransala.shared.domain.fetcher import Fetcher, Response
 
 
@@ -94,3 +95,32 @@ async def test_crawler_edge_cases():
     result = await crawler.run(start_url=start_url)
 
     assert result.pages == {"/ok", "/bad"}
+
+
+@pytest.mark.asyncio
+async def test_crawler_respects_robots():
+    start_url = HttpUrl("https://example.com/")
+    responses = {
+        str(start_url): Response(
+            status=200,
+            content='<a href="/ok">OK</a><a href="/private/page">Private</a>',
+            content_type="text/html",
+        ),
+        "https://example.com/robots.txt": Response(
+            status=200,
+            content="User-agent: *\nDisallow: /private/",
+            content_type="text/plain",
+        ),
+        "https://example.com/ok": Response(
+            status=200, content="OK", content_type="text/html"
+        ),
+        "https://example.com/private/page": Response(
+            status=200, content="", content_type="text/html"
+        ),
+    }
+    fetcher = MockFetcher(responses)
+
+    crawler = Crawler(fetcher=fetcher, robots=Robots(fetcher))
+    result = await crawler.run(start_url=start_url)
+
+    assert result.pages == {"/ok"}
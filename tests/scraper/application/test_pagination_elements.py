@@ -8,7 +8,7 @@ from yarl import URL
 
 from lagransala.scraper.application import pagination_elements
 from lagransala.scraper.domain import Pagination, PaginationType
-from lagransala.shared.domain import Fetcher
+from lagransala.shared.domain import Fetcher, FetchError
 from lagransala.shared.domain.fetcher import Response
 
 
@@ -20,7 +20,12 @@ async def test_pagination_elements() -> None:
         content='<html><a href="/page/1">1</a><a href="/page/2">2</a></html>',
         content_type="text/html",
     )
-    fetcher.fetch_urls.return_value = [response]
+
+    async def iter_fetch(urls, max_in_flight=None):
+        for url in urls:
+            yield url, response
+
+    fetcher.iter_fetch = iter_fetch
 
     pagination = Pagination(
         venue_slug="test-venue",
@@ -37,3 +42,32 @@ async def test_pagination_elements() -> None:
         str(URL("http://example.com/page/1")),
         str(URL("http://example.com/page/2")),
     }
+
+
+@pytest.mark.asyncio
+async def test_pagination_elements_skips_failed_pages() -> None:
+    fetcher = MagicMock(spec=Fetcher)
+    response = Response(
+        status=200,
+        content='<html><a href="/page/1">1</a></html>',
+        content_type="text/html",
+    )
+
+    async def iter_fetch(urls, max_in_flight=None):
+        yield urls[0], FetchError("boom")
+        yield urls[1], response
+
+    fetcher.iter_fetch = iter_fetch
+
+    pagination = Pagination(
+        venue_slug="test-venue",
+        type=PaginationType.SIMPLE,
+        url="http://example.com?page={n}",
+        limit=2,
+        simple_start_from=1,
+        base_url=HttpUrl("http://example.com"),
+        element_url_pattern=r"/page/\d",
+    )
+    urls = await pagination_elements(fetcher, pagination)
+
+    assert urls == {str(URL("http://example.com/page/1"))}
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Iterable
 from uuid import uuid4
 
@@ -100,3 +101,17 @@ def test_pagination_urls(paginations: list[Pagination]):
         assert (
             not pagination.limit or len(urls) == pagination.limit
         ), "Number of URLs should match the limit"
+
+
+def test_pagination_urls_at_date(paginations: list[Pagination]):
+    day, month = paginations[2], paginations[3]
+    now = datetime(2025, 12, 31, 18, 30)
+
+    assert [str(url) for url in day.urls(now)[:2]] == [
+        "https://cinema.com/films?date=2025-12-31",
+        "https://cinema.com/films?date=2026-01-01",
+    ]
+    assert [str(url) for url in month.urls(now)] == [
+        "https://cinema.com/films?month=2025-12",
+        "https://cinema.com/films?month=2026-01",
+    ]
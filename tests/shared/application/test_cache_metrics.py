@@ -0,0 +1,47 @@
+from pathlib import Path
+
+from lagransala.shared.application import (
+    CacheMetrics,
+    CacheMetricsRegistry,
+    LatencyHistogram,
+    load_cache_metrics,
+)
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+    assert histogram.quantile(0.5) is None
+    assert str(histogram) == "-"
+
+    for seconds in (0.0002, 0.0003, 0.002, 10.0):
+        histogram.observe(seconds)
+
+    assert histogram.count == 4
+    assert histogram.quantile(0.5) == 0.0005
+    assert histogram.quantile(0.75) == 0.005
+    assert histogram.quantile(1.0) == float("inf")
+    assert "p50 ≤ 0.5ms" in str(histogram)
+    assert "p99 ≤ > 5s" in str(histogram)
+
+
+def test_hit_ratio():
+    assert CacheMetrics().hit_ratio == 0.0
+    assert CacheMetrics(hits=3, misses=1).hit_ratio == 0.75
+
+
+def test_registry_save_and_load(tmp_path: Path):
+    registry = CacheMetricsRegistry()
+    registry.labels("http").hits += 2
+    registry.labels("http").get_latency.observe(0.01)
+    registry.labels("extract").misses += 1
+    assert registry.labels("http") is registry.labels("http")
+
+    path = tmp_path / "cache" / "metrics.json"
+    registry.save(path)
+    loaded = load_cache_metrics(path)
+
+    assert loaded == registry.snapshot()
+    assert "2 hits (0 stale), 0 misses (100% hit ratio)" in str(loaded["http"])
+
+    registry.reset()
+    assert registry.snapshot() == {}
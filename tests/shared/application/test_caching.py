@@ -1,8 +1,20 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import math
 import time
+from unittest.mock import patch
 
 import pytest
 
-from lagransala.shared.application import cached, generate_key
+from lagransala.shared.application import (
+    CacheMetricsRegistry,
+    KeyBuilder,
+    cached,
+    drain_refreshes,
+    generate_key,
+)
 
 from .helpers import SimpleData
 
@@ -105,6 +117,111 @@ def test_generate_key_with_mixed_args_and_key_params():
     assert key1 != key5
 
 
+# Tests for KeyBuilder
+def test_key_builder_keeps_key_format():
+    """Test that keys are unchanged, so existing cache entries stay valid."""
+
+    def sample_func(a, b=2, *, c=3):
+        pass
+
+    key_data = {
+        "func": f"{sample_func.__module__}.{sample_func.__qualname__}",
+        "args": [1, 2],
+        "kwargs": [["c", 3]],
+    }
+    expected = hashlib.sha256(
+        json.dumps(key_data, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    assert KeyBuilder(sample_func).key((1,), {}) == expected
+
+    key_data = {"func": key_data["func"], "kwargs": [["a", 1]]}
+    expected = hashlib.sha256(
+        json.dumps(key_data, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    assert KeyBuilder(sample_func, ["a"]).key((), {"a": 1, "b": 5}) == expected
+
+
+@pytest.mark.parametrize(
+    "value",
+    ["text", 'é\n"', 1, 10**30, 1.5, -0.0, math.inf, True, None, [1], {"k": 1}],
+)
+def test_key_builder_primitive_fast_path_keeps_key_format(value):
+    """Test that primitive arguments serialize as they would through json."""
+
+    def sample_func(a, *, b=None):
+        pass
+
+    func_name = f"{sample_func.__module__}.{sample_func.__qualname__}"
+    key_data = {"func": func_name, "args": [value], "kwargs": [["b", value]]}
+    expected = hashlib.sha256(
+        json.dumps(key_data, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    assert KeyBuilder(sample_func).key((value,), {"b": value}) == expected
+
+
+@pytest.mark.parametrize(
+    "args, kwargs, key_params",
+    [
+        ((1,), {}, None),
+        ((1, 2, 3), {"k": 4, "extra": 5}, None),
+        ((1,), {"b": 2}, ["b", "k"]),
+        ((), {}, None),
+        ((1,), {"unknown": 1}, ["a"]),
+    ],
+)
+def test_key_builder_matches_bound_arguments(args, kwargs, key_params):
+    """Test that the fast path and the inspect fallback agree."""
+
+    def simple(a, b=None, k=None, unknown=None):
+        pass
+
+    def variadic(a, /, b=None, *args, k=None, **kwargs):
+        pass
+
+    for func in (simple, variadic):
+        try:
+            bound = inspect.signature(func).bind_partial(*args, **kwargs)
+        except TypeError:
+            continue
+        bound.apply_defaults()
+        arguments = KeyBuilder(func, key_params).arguments(args, kwargs)
+        expected = bound.arguments
+        if key_params:
+            expected = {k: expected[k] for k in key_params if k in expected}
+        assert arguments == expected
+
+
+def test_key_builder_rejects_unknown_keyword_arguments():
+    """Test that an unknown kwarg with a missing argument is a TypeError."""
+
+    def func(a, b):
+        pass
+
+    with pytest.raises(TypeError, match="unexpected keyword argument 'c'"):
+        KeyBuilder(func).key((1,), {"c": 2})
+    with pytest.raises(TypeError, match="unexpected keyword argument 'c'"):
+        KeyBuilder(func, ["a"]).arguments((1,), {"c": 2})
+
+
+@pytest.mark.asyncio
+async def test_cached_resolves_signature_once(memory_cache_backend):
+    """Test that the signature is inspected at decoration time only."""
+
+    with patch(
+        "lagransala.shared.application.caching.inspect.signature",
+        wraps=inspect.signature,
+    ) as signature:
+
+        @cached(backend=memory_cache_backend)
+        async def function(a: int) -> SimpleData:
+            return SimpleData(value=str(a))
+
+        for a in range(5):
+            await function(a)
+
+    assert signature.call_count == 1
+
+
 # Tests for the @cached decorator
 @pytest.mark.asyncio
 async def test_cached_with_memory_backend(memory_cache_backend):
@@ -240,3 +357,160 @@ async def test_cached_with_custom_key_func(memory_cache_backend):
     cached_data = await memory_cache_backend.get(custom_key)
     assert cached_data is not None
     assert cached_data.value == "custom_1"
+
+
+@pytest.mark.asyncio
+async def test_cached_single_flight(memory_cache_backend):
+    """Test that concurrent misses for the same key share one call."""
+    call_count = 0
+
+    @cached(backend=memory_cache_backend, single_flight=True)
+    async def slow_function(a: int) -> SimpleData:
+        nonlocal call_count
+        call_count += 1
+        await asyncio.sleep(0.01)
+        return SimpleData(value=f"slow_{a}")
+
+    results = await asyncio.gather(*[slow_function(1) for _ in range(5)])
+    assert call_count == 1
+    assert [result.value for result in results] == ["slow_1"] * 5
+
+    await asyncio.gather(slow_function(2), slow_function(3))
+    assert call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_cached_without_single_flight(memory_cache_backend):
+    """Test that concurrent misses run the function every time by default."""
+    call_count = 0
+
+    @cached(backend=memory_cache_backend)
+    async def slow_function(a: int) -> SimpleData:
+        nonlocal call_count
+        call_count += 1
+        await asyncio.sleep(0.01)
+        return SimpleData(value=f"slow_{a}")
+
+    await asyncio.gather(*[slow_function(1) for _ in range(3)])
+    assert call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_cached_single_flight_propagates_exceptions(memory_cache_backend):
+    """Test that every waiter sees the exception and nothing is cached."""
+    call_count = 0
+
+    @cached(backend=memory_cache_backend, single_flight=True)
+    async def failing_function(a: int) -> SimpleData:
+        nonlocal call_count
+        call_count += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("failed")
+
+    results = await asyncio.gather(
+        *[failing_function(1) for _ in range(3)], return_exceptions=True
+    )
+    assert call_count == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    with pytest.raises(RuntimeError):
+        await failing_function(1)
+    assert call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_soft_ttl_serves_stale_and_refreshes(memory_cache_backend):
+    """Test that stale values are returned while a refresh runs once."""
+    call_count = 0
+
+    @cached(backend=memory_cache_backend, ttl=10, soft_ttl=0.1, jitter=0)
+    async def refreshed_function(a: int) -> SimpleData:
+        nonlocal call_count
+        call_count += 1
+        await asyncio.sleep(0.01)
+        return SimpleData(value=f"v{call_count}")
+
+    assert (await refreshed_function(1)).value == "v1"
+    time.sleep(0.2)
+
+    results = await asyncio.gather(refreshed_function(1), refreshed_function(1))
+    assert [result.value for result in results] == ["v1", "v1"]
+
+    await drain_refreshes()
+    assert call_count == 2
+    assert (await refreshed_function(1)).value == "v2"
+
+
+@pytest.mark.asyncio
+async def test_cached_failed_refresh_keeps_stale_value(memory_cache_backend):
+    """Test that a failing background refresh keeps serving the stale value."""
+    fail = False
+
+    @cached(backend=memory_cache_backend, ttl=10, soft_ttl=0.1, jitter=0)
+    async def flaky_function(a: int) -> SimpleData:
+        if fail:
+            raise RuntimeError("failed")
+        return SimpleData(value="ok")
+
+    await flaky_function(1)
+    time.sleep(0.2)
+    fail = True
+
+    assert (await flaky_function(1)).value == "ok"
+    await drain_refreshes()
+    assert (await flaky_function(1)).value == "ok"
+
+
+@pytest.mark.asyncio
+async def test_cached_soft_ttl_jitter(memory_cache_backend):
+    """Test that the soft TTL is spread around its nominal value."""
+
+    @cached(backend=memory_cache_backend, ttl=1000, soft_ttl=100, jitter=0.5)
+    async def jittered_function(a: int) -> SimpleData:
+        return SimpleData(value=str(a))
+
+    now = time.time()
+    for a in range(20):
+        await jittered_function(a)
+
+    stale_at = []
+    for a in range(20):
+        key = generate_key(inspect.unwrap(jittered_function), (a,), {})
+        entry = await memory_cache_backend.get_entry(key)
+        stale_at.append(entry.stale_at - now)
+    assert all(50 <= delay <= 151 for delay in stale_at)
+    assert len(set(stale_at)) > 1
+
+
+def test_cached_soft_ttl_must_not_exceed_ttl(memory_cache_backend):
+    """Test that a soft TTL beyond the hard TTL is rejected."""
+    with pytest.raises(ValueError):
+        cached(backend=memory_cache_backend, ttl=10, soft_ttl=20)
+
+
+@pytest.mark.asyncio
+async def test_cached_records_metrics(memory_cache_backend):
+    """Test that lookups and sets are counted under the function's name."""
+    metrics = CacheMetricsRegistry()
+
+    @cached(
+        backend=memory_cache_backend, ttl=10, soft_ttl=0.1, jitter=0, metrics=metrics
+    )
+    async def measured_function(a: int) -> SimpleData:
+        return SimpleData(value=str(a))
+
+    await measured_function(1)
+    await measured_function(1)
+    time.sleep(0.2)
+    await measured_function(1)
+    await drain_refreshes()
+
+    (label,) = metrics.snapshot()
+    assert label.endswith("measured_function")
+    function_metrics = metrics.labels(label)
+    assert function_metrics.misses == 1
+    assert function_metrics.hits == 2
+    assert function_metrics.stale_hits == 1
+    assert function_metrics.sets == 2  # The first call and the refresh
+    assert function_metrics.get_latency.count == 3
+    assert function_metrics.set_latency.count == 2
@@ -0,0 +1,154 @@
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from lagransala.shared.application import Robots, RobotsRules
+from lagransala.shared.domain.fetcher import FetchError, Response
+from lagransala.shared.infrastructure import MemoryCacheBackend
+
+ROBOTS_TXT = """
+User-agent: *
+Disallow: /private/
+Crawl-delay: 2
+"""
+
+
+def _fetcher(responses: dict[str, Response | Exception]) -> AsyncMock:
+    fetcher = AsyncMock()
+
+    async def fetch(url: str) -> Response:
+        response = responses[url]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    fetcher.fetch.side_effect = fetch
+    return fetcher
+
+
+@pytest.mark.asyncio
+async def test_robots_filters_disallowed_urls():
+    fetcher = _fetcher(
+        {
+            "https://a.com/robots.txt": Response(
+                status=200, content=ROBOTS_TXT, content_type="text/plain"
+            )
+        }
+    )
+    robots = Robots(fetcher)
+
+    urls = ["https://a.com/", "https://a.com/private/1", "https://a.com/public"]
+    assert await robots.filter(urls) == ["https://a.com/", "https://a.com/public"]
+    assert fetcher.fetch.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_robots_reports_crawl_delay():
+    fetcher = _fetcher(
+        {
+            "https://a.com/robots.txt": Response(
+                status=200, content=ROBOTS_TXT, content_type="text/plain"
+            )
+        }
+    )
+    delays: dict[str, float] = {}
+    robots = Robots(fetcher, on_crawl_delay=delays.__setitem__)
+
+    assert await robots.crawl_delay("https://a.com/") == 2
+    assert delays == {"a.com": 2}
+
+
+@pytest.mark.asyncio
+async def test_robots_missing_or_unreachable_allows_all():
+    fetcher = _fetcher(
+        {
+            "https://a.com/robots.txt": Response(
+                status=404, content="", content_type="text/html"
+            ),
+            "https://b.com/robots.txt": FetchError("unreachable"),
+        }
+    )
+    robots = Robots(fetcher)
+
+    assert await robots.can_fetch("https://a.com/private/1")
+    assert await robots.can_fetch("https://b.com/private/1")
+
+
+@pytest.mark.asyncio
+async def test_robots_server_error_disallows_all():
+    fetcher = _fetcher(
+        {
+            "https://a.com/robots.txt": Response(
+                status=503, content="", content_type="text/html"
+            )
+        }
+    )
+    robots = Robots(fetcher)
+
+    assert not await robots.can_fetch("https://a.com/")
+
+
+@pytest.mark.asyncio
+async def test_robots_rules_are_cached():
+    responses: dict[str, Response | Exception] = {
+        "https://a.com/robots.txt": Response(
+            status=200, content=ROBOTS_TXT, content_type="text/plain"
+        )
+    }
+    fetcher = _fetcher(responses)
+    backend = MemoryCacheBackend[RobotsRules]()
+
+    await Robots(fetcher, cache_backend=backend).can_fetch("https://a.com/")
+    await Robots(fetcher, cache_backend=backend).can_fetch("https://a.com/")
+
+    assert fetcher.fetch.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_robots_server_error_is_not_cached():
+    responses: dict[str, Response | Exception] = {
+        "https://a.com/robots.txt": Response(
+            status=503, content="", content_type="text/html"
+        )
+    }
+    fetcher = _fetcher(responses)
+    backend = MemoryCacheBackend[RobotsRules]()
+    robots = Robots(fetcher, cache_backend=backend, error_ttl=60)
+
+    assert not await robots.can_fetch("https://a.com/")
+    assert not await robots.can_fetch("https://a.com/other")
+    assert fetcher.fetch.await_count == 1
+
+    responses["https://a.com/robots.txt"] = Response(
+        status=200, content=ROBOTS_TXT, content_type="text/plain"
+    )
+    # Not cached: another instance fetches robots.txt again
+    assert await Robots(fetcher, cache_backend=backend).can_fetch("https://a.com/")
+    assert fetcher.fetch.await_count == 2
+    # And this one only holds on to the error for `error_ttl`
+    assert not await robots.can_fetch("https://a.com/")
+    with patch("time.monotonic", return_value=time.monotonic() + 61):
+        assert await robots.can_fetch("https://a.com/")
+
+
+@pytest.mark.asyncio
+async def test_robots_server_error_keeps_last_good_rules():
+    responses: dict[str, Response | Exception] = {
+        "https://a.com/robots.txt": Response(
+            status=200, content=ROBOTS_TXT, content_type="text/plain"
+        )
+    }
+    fetcher = _fetcher(responses)
+    backend = MemoryCacheBackend[RobotsRules]()
+    await Robots(fetcher, cache_backend=backend, cache_ttl=0).can_fetch(
+        "https://a.com/"
+    )
+
+    responses["https://a.com/robots.txt"] = Response(
+        status=503, content="", content_type="text/html"
+    )
+    robots = Robots(fetcher, cache_backend=backend, cache_ttl=0)
+    assert await robots.can_fetch("https://a.com/public")
+    assert not await robots.can_fetch("https://a.com/private/1")
+    assert fetcher.fetch.await_count == 2
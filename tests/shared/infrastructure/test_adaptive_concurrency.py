@@ -0,0 +1,41 @@
+import pytest
+
+from lagransala.shared.infrastructure import AdaptiveConcurrency
+
+
+def test_additive_increase_up_to_ceiling():
+    adaptive = AdaptiveConcurrency(initial=2, max_limit=4)
+    for _ in range(100):
+        adaptive.observe("a.com", latency=0.1, ok=True)
+    assert adaptive.limit("a.com") == 4
+
+
+def test_multiplicative_decrease_on_error_down_to_floor():
+    adaptive = AdaptiveConcurrency(initial=8, min_limit=2, cooldown=0)
+    assert adaptive.observe("a.com", latency=0.1, ok=False) == 4
+    assert adaptive.observe("a.com", latency=0.1, ok=False) == 2
+    assert adaptive.observe("a.com", latency=0.1, ok=False) == 2
+
+
+def test_decrease_on_latency_above_baseline():
+    adaptive = AdaptiveConcurrency(initial=8, latency_tolerance=2.0, cooldown=0)
+    adaptive.observe("a.com", latency=0.1, ok=True)
+    assert adaptive.observe("a.com", latency=0.5, ok=True) == 4
+
+
+def test_cooldown_limits_decreases():
+    adaptive = AdaptiveConcurrency(initial=8, cooldown=60)
+    adaptive.observe("a.com", latency=0.1, ok=False)
+    assert adaptive.observe("a.com", latency=0.1, ok=False) == 4
+
+
+def test_windows_are_per_host():
+    adaptive = AdaptiveConcurrency(initial=4, cooldown=0)
+    adaptive.observe("slow.com", latency=1, ok=False)
+    adaptive.observe("fast.com", latency=0.01, ok=True)
+    assert adaptive.windows() == {"slow.com": 2, "fast.com": 4}
+
+
+def test_invalid_bounds():
+    with pytest.raises(ValueError):
+        AdaptiveConcurrency(initial=1, min_limit=2)
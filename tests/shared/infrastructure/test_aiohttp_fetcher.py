@@ -1,10 +1,25 @@
 import asyncio
+import time
+from unittest.mock import patch
 
 import pytest
-from aiohttp import ClientSession
+from aiohttp import ClientConnectionError, ClientPayloadError, ClientSession
 from aioresponses import aioresponses
+from yarl import URL
 
-from lagransala.shared.domain.fetcher import Response
+from lagransala.shared.domain.fetcher import (
+    DeadUrlError,
+    FetchError,
+    HostUnavailableError,
+    Response,
+)
+from lagransala.shared.infrastructure import (
+    AdaptiveConcurrency,
+    CircuitBreaker,
+    NegativeCachePolicy,
+    RetryPolicy,
+    UrlFailure,
+)
 from lagransala.shared.infrastructure.aiohttp_fetcher import AiohttpFetcher
 from lagransala.shared.infrastructure.memory_cache_backend import MemoryCacheBackend
 
@@ -81,3 +96,651 @@ async def test_fetch_is_assigned_when_no_cache_is_provided() -> None:
         fetcher = AiohttpFetcher(client=client)
         assert hasattr(fetcher, "fetch")
         assert callable(fetcher.fetch)
+
+
+@pytest.mark.asyncio
+async def test_fetch_revalidates_expired_entry(
+    memory_cache_backend: MemoryCacheBackend[Response],
+) -> None:
+    url = "http://example.com/revalidate"
+    content = "Rarely changes"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(
+                url,
+                status=200,
+                body=content,
+                headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024"},
+            )
+            m.get(url, status=304)
+
+            fetcher = AiohttpFetcher(
+                client=client, cache_backend=memory_cache_backend, cache_ttl=0
+            )
+
+            response1 = await fetcher.fetch(url)
+            assert response1.etag == '"v1"'
+
+            # Entry is expired, so the second call must be a conditional request
+            response2 = await fetcher.fetch(url)
+            assert response2.status == 200
+            assert response2.content == content
+
+            requests = m.requests[("GET", URL(url))]
+            assert len(requests) == 2
+            headers = requests[1].kwargs["headers"]
+            assert headers["If-None-Match"] == '"v1"'
+            assert headers["If-Modified-Since"] == "Mon, 01 Jan 2024"
+
+
+@pytest.mark.asyncio
+async def test_fetch_uses_max_age_with_validators(
+    memory_cache_backend: MemoryCacheBackend[Response],
+) -> None:
+    url = "http://example.com/max-age"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(
+                url,
+                status=200,
+                body="content",
+                headers={"ETag": '"v1"', "Cache-Control": "public, max-age=600"},
+                repeat=True,
+            )
+
+            fetcher = AiohttpFetcher(
+                client=client, cache_backend=memory_cache_backend, cache_ttl=0
+            )
+
+            response = await fetcher.fetch(url)
+            assert response.max_age == 600
+            assert response.expires_at is not None
+
+            await fetcher.fetch(url)
+            assert len(m.requests[("GET", URL(url))]) == 1
+
+
+@pytest.mark.asyncio
+async def test_fetch_keeps_only_revalidatable_responses_past_expiry(
+    memory_cache_backend: MemoryCacheBackend[Response],
+) -> None:
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get("http://example.com/etag", status=200, headers={"ETag": '"v1"'})
+            m.get("http://example.com/plain", status=200)
+            fetcher = AiohttpFetcher(
+                client=client,
+                cache_backend=memory_cache_backend,
+                cache_ttl=60,
+                revalidation_ttl=3600,
+            )
+            await fetcher.fetch("http://example.com/etag")
+            await fetcher.fetch("http://example.com/plain")
+
+            now = time.time()
+            entry = await memory_cache_backend.get_entry(
+                fetcher._cache_key("http://example.com/etag")
+            )
+            assert entry is not None and entry.expires_at is not None
+            assert entry.expires_at - now > 3600
+            entry = await memory_cache_backend.get_entry(
+                fetcher._cache_key("http://example.com/plain")
+            )
+            assert entry is not None and entry.expires_at is not None
+            assert entry.expires_at - now <= 60
+
+
+@pytest.mark.asyncio
+async def test_fetch_discards_disallowed_content_type() -> None:
+    url = "http://example.com/file.pdf"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(url, status=200, body=b"%PDF-1.4", content_type="application/pdf")
+            fetcher = AiohttpFetcher(
+                client=client, allowed_content_types=("text/html",)
+            )
+            response = await fetcher.fetch(url)
+            assert response.status == 200
+            assert response.discarded
+            assert response.content == ""
+            assert response.content_type == "application/pdf"
+
+
+@pytest.mark.asyncio
+async def test_fetch_discards_oversized_body() -> None:
+    url = "http://example.com/huge"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(url, status=200, body="x" * 1000, content_type="text/html")
+            fetcher = AiohttpFetcher(client=client, max_content_size=100)
+            response = await fetcher.fetch(url)
+            assert response.discarded
+            assert response.content == ""
+
+
+@pytest.mark.asyncio
+async def test_fetch_decodes_with_declared_charset() -> None:
+    url = "http://example.com/latin1"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(
+                url,
+                status=200,
+                body="Programación".encode("latin-1"),
+                headers={"Content-Type": "text/html; charset=iso-8859-1"},
+            )
+            fetcher = AiohttpFetcher(
+                client=client, allowed_content_types=("text/html",)
+            )
+            response = await fetcher.fetch(url)
+            assert not response.discarded
+            assert response.content == "Programación"
+
+
+@pytest.mark.asyncio
+async def test_fetch_retries_retryable_status() -> None:
+    url = "http://example.com/flaky"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(url, status=503, headers={"Retry-After": "0"})
+            m.get(url, status=200, body="ok")
+            fetcher = AiohttpFetcher(
+                client=client, retry_policy=RetryPolicy(backoff_base=0.01)
+            )
+            response = await fetcher.fetch(url)
+            assert response.status == 200
+            assert response.content == "ok"
+
+
+@pytest.mark.asyncio
+async def test_fetch_raises_fetch_error_after_retries() -> None:
+    url = "http://example.com/down"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(url, exception=ClientConnectionError("boom"), repeat=True)
+            fetcher = AiohttpFetcher(
+                client=client,
+                retry_policy=RetryPolicy(max_attempts=2, backoff_base=0.01),
+            )
+            with pytest.raises(FetchError):
+                await fetcher.fetch(url)
+            assert len(m.requests[("GET", URL(url))]) == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_circuit_breaker_suspends_host() -> None:
+    url = "http://example.com/broken"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(url, status=500, repeat=True)
+            fetcher = AiohttpFetcher(
+                client=client,
+                retry_policy=RetryPolicy(max_attempts=1),
+                circuit_breaker=CircuitBreaker(failure_threshold=2),
+            )
+            assert (await fetcher.fetch(url)).status == 500
+            assert (await fetcher.fetch(url)).status == 500
+            with pytest.raises(HostUnavailableError):
+                await fetcher.fetch("http://example.com/other")
+
+
+@pytest.mark.asyncio
+async def test_fetch_serves_stale_while_host_is_suspended(
+    memory_cache_backend: MemoryCacheBackend[Response],
+) -> None:
+    url = "http://example.com/cached"
+    breaker = CircuitBreaker(failure_threshold=1)
+    failure_backend = MemoryCacheBackend[UrlFailure]()
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(url, status=200, body="good", headers={"ETag": '"v1"'})
+            fetcher = AiohttpFetcher(
+                client=client,
+                cache_backend=memory_cache_backend,
+                cache_ttl=0,
+                circuit_breaker=breaker,
+                failure_backend=failure_backend,
+            )
+            assert (await fetcher.fetch(url)).content == "good"
+            breaker.record_failure("example.com")
+
+            assert (await fetcher.fetch(url)).content == "good"
+            assert len(m.requests[("GET", URL(url))]) == 1
+            key = fetcher._failure_key(fetcher._cache_key(url))
+            assert await failure_backend.get(key) is None
+            with pytest.raises(HostUnavailableError):
+                await fetcher.fetch("http://example.com/other")
+
+
+@pytest.mark.asyncio
+async def test_fetch_cancelled_half_open_trial_releases_host() -> None:
+    async def hang(url, **kwargs):
+        await asyncio.sleep(10)
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure("example.com")
+    await asyncio.sleep(0.06)
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get("http://example.com/slow", callback=hang)
+            m.get("http://example.com/fast", status=200, body="ok")
+            fetcher = AiohttpFetcher(client=client, circuit_breaker=breaker)
+
+            # Cancelled as the scheduler would, not just a waiter on the fetch
+            trial = asyncio.create_task(fetcher._fetch("http://example.com/slow"))
+            await asyncio.sleep(0.01)
+            assert breaker.state("example.com") == "half_open"
+            trial.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await trial
+
+            assert (await fetcher.fetch("http://example.com/fast")).content == "ok"
+            assert breaker.state("example.com") == "closed"
+
+
+@pytest.mark.asyncio
+async def test_iter_fetch_yields_results_and_errors() -> None:
+    urls = ["http://example.com/1", "http://example.com/2", "http://example.com/3"]
+
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(urls[0], status=200, body="Page 1")
+            m.get(urls[1], exception=ClientConnectionError("boom"))
+            m.get(urls[2], status=200, body="Page 3")
+
+            fetcher = AiohttpFetcher(
+                client=client, retry_policy=RetryPolicy(max_attempts=1)
+            )
+            results = {
+                url: response
+                async for url, response in fetcher.iter_fetch(urls, max_in_flight=1)
+            }
+
+    assert set(results) == set(urls)
+    page = results[urls[0]]
+    assert isinstance(page, Response)
+    assert page.content == "Page 1"
+    assert isinstance(results[urls[1]], FetchError)
+    assert isinstance(results[urls[2]], Response)
+
+
+@pytest.mark.asyncio
+async def test_iter_fetch_rejects_non_positive_max_in_flight() -> None:
+    async with ClientSession() as client:
+        fetcher = AiohttpFetcher(client=client)
+        with pytest.raises(ValueError):
+            async for _ in fetcher.iter_fetch(["http://example.com"], max_in_flight=0):
+                pass
+
+
+@pytest.mark.asyncio
+async def test_fetch_negative_caches_client_errors(
+    memory_cache_backend: MemoryCacheBackend[Response],
+) -> None:
+    url = "http://example.com/gone"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(url, status=404, repeat=True)
+            fetcher = AiohttpFetcher(
+                client=client,
+                cache_backend=memory_cache_backend,
+                cache_ttl=3600,
+                negative_cache_policy=NegativeCachePolicy(client_error_ttl=60),
+            )
+            assert (await fetcher.fetch(url)).status == 404
+            assert (await fetcher.fetch(url)).status == 404
+            assert len(m.requests[("GET", URL(url))]) == 1
+
+            entry = await memory_cache_backend.get(fetcher._cache_key(url))
+            assert entry is not None and entry.expires_at is not None
+            assert entry.expires_at - time.time() <= 60
+
+
+@pytest.mark.asyncio
+async def test_fetch_negative_caches_connection_errors(
+    memory_cache_backend: MemoryCacheBackend[Response],
+) -> None:
+    url = "http://example.com/unreachable"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(url, exception=ClientConnectionError("boom"), repeat=True)
+            fetcher = AiohttpFetcher(
+                client=client,
+                cache_backend=memory_cache_backend,
+                retry_policy=RetryPolicy(max_attempts=1),
+                failure_backend=MemoryCacheBackend[UrlFailure](),
+            )
+            with pytest.raises(FetchError):
+                await fetcher.fetch(url)
+            with pytest.raises(FetchError):
+                await fetcher.fetch(url)
+            assert len(m.requests[("GET", URL(url))]) == 1
+
+
+@pytest.mark.asyncio
+async def test_fetch_tombstones_urls_that_keep_failing(
+    memory_cache_backend: MemoryCacheBackend[Response],
+) -> None:
+    url = "http://example.com/dead"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(url, status=404, repeat=True)
+            fetcher = AiohttpFetcher(
+                client=client,
+                cache_backend=memory_cache_backend,
+                negative_cache_policy=NegativeCachePolicy(
+                    client_error_ttl=0, tombstone_after=2
+                ),
+                failure_backend=MemoryCacheBackend[UrlFailure](),
+            )
+            assert (await fetcher.fetch(url)).status == 404
+            assert (await fetcher.fetch(url)).status == 404
+            with pytest.raises(DeadUrlError):
+                await fetcher.fetch(url)
+            assert len(m.requests[("GET", URL(url))]) == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_serves_stale_on_server_error(
+    memory_cache_backend: MemoryCacheBackend[Response],
+) -> None:
+    url = "http://example.com/stale"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(url, status=200, body="good", headers={"ETag": '"v1"'})
+            m.get(url, status=503, repeat=True)
+            fetcher = AiohttpFetcher(
+                client=client,
+                cache_backend=memory_cache_backend,
+                cache_ttl=0,
+                retry_policy=RetryPolicy(max_attempts=1),
+            )
+            assert (await fetcher.fetch(url)).content == "good"
+            response = await fetcher.fetch(url)
+            assert response.status == 200
+            assert response.content == "good"
+
+
+@pytest.mark.asyncio
+async def test_fetch_serves_stale_while_url_is_failing(
+    memory_cache_backend: MemoryCacheBackend[Response],
+) -> None:
+    url = "http://example.com/stale"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(url, status=200, body="good", headers={"ETag": '"v1"'})
+            m.get(url, exception=ClientConnectionError("boom"), repeat=True)
+            fetcher = AiohttpFetcher(
+                client=client,
+                cache_backend=memory_cache_backend,
+                cache_ttl=0,
+                retry_policy=RetryPolicy(max_attempts=1),
+                failure_backend=MemoryCacheBackend[UrlFailure](),
+            )
+            for _ in range(3):
+                assert (await fetcher.fetch(url)).content == "good"
+            assert len(m.requests[("GET", URL(url))]) == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_does_not_retry_server_errors_early(
+    memory_cache_backend: MemoryCacheBackend[Response],
+) -> None:
+    url = "http://example.com/stale"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(url, status=200, body="good", headers={"ETag": '"v1"'})
+            m.get(url, status=503, repeat=True)
+            fetcher = AiohttpFetcher(
+                client=client,
+                cache_backend=memory_cache_backend,
+                cache_ttl=0,
+                retry_policy=RetryPolicy(max_attempts=1),
+                failure_backend=MemoryCacheBackend[UrlFailure](),
+            )
+            for _ in range(3):
+                assert (await fetcher.fetch(url)).content == "good"
+            assert len(m.requests[("GET", URL(url))]) == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_does_not_cache_throttled_responses(
+    memory_cache_backend: MemoryCacheBackend[Response],
+) -> None:
+    url = "http://example.com/throttled"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(url, status=429, body="slow down", headers={"Retry-After": "0"})
+            m.get(url, status=429, body="slow down", headers={"Retry-After": "0"})
+            m.get(url, status=200, body="content")
+            fetcher = AiohttpFetcher(
+                client=client,
+                cache_backend=memory_cache_backend,
+                cache_ttl=3600,
+                retry_policy=RetryPolicy(max_attempts=2, backoff_base=0.01),
+            )
+            assert (await fetcher.fetch(url)).status == 429
+            assert await memory_cache_backend.get(fetcher._cache_key(url)) is None
+
+            response = await fetcher.fetch(url)
+            assert response.status == 200
+            assert response.content == "content"
+
+
+@pytest.mark.asyncio
+async def test_fetch_remembers_throttling_until_retry_after(
+    memory_cache_backend: MemoryCacheBackend[Response],
+) -> None:
+    url = "http://example.com/throttled"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(url, status=429, headers={"Retry-After": "120"}, repeat=True)
+            failure_backend = MemoryCacheBackend[UrlFailure]()
+            fetcher = AiohttpFetcher(
+                client=client,
+                cache_backend=memory_cache_backend,
+                retry_policy=RetryPolicy(max_attempts=1),
+                negative_cache_policy=NegativeCachePolicy(
+                    throttled_ttl=10, tombstone_after=1
+                ),
+                failure_backend=failure_backend,
+            )
+            assert (await fetcher.fetch(url)).status == 429
+            with pytest.raises(FetchError) as error:
+                await fetcher.fetch(url)
+            assert not isinstance(error.value, DeadUrlError)
+            assert len(m.requests[("GET", URL(url))]) == 1
+
+            failure = await failure_backend.get(
+                fetcher._failure_key(fetcher._cache_key(url))
+            )
+            assert failure is not None and failure.retry_at - time.time() > 100
+
+
+@pytest.mark.asyncio
+async def test_fetch_adapts_host_concurrency() -> None:
+    url = "http://example.com/overloaded"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(url, status=503)
+            adaptive = AdaptiveConcurrency(initial=4)
+            fetcher = AiohttpFetcher(
+                client=client,
+                retry_policy=RetryPolicy(max_attempts=1),
+                adaptive_concurrency=adaptive,
+            )
+            await fetcher.fetch(url)
+
+            assert adaptive.windows() == {"example.com": 2}
+            assert fetcher.scheduler.host_limits("example.com")[0] == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_observes_failed_body_read_once() -> None:
+    url = "http://example.com/truncated"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(url, status=200, body="partial")
+            adaptive = AdaptiveConcurrency(initial=4)
+            fetcher = AiohttpFetcher(
+                client=client,
+                retry_policy=RetryPolicy(max_attempts=1),
+                adaptive_concurrency=adaptive,
+            )
+            with (
+                patch.object(
+                    fetcher, "_read_body", side_effect=ClientPayloadError("cut")
+                ),
+                patch.object(adaptive, "observe", wraps=adaptive.observe) as observe,
+            ):
+                with pytest.raises(FetchError):
+                    await fetcher.fetch(url)
+
+            assert observe.call_count == 1
+            assert observe.call_args.args[2] is False
+
+
+@pytest.mark.asyncio
+async def test_fetch_concurrent_same_url_shares_request() -> None:
+    url = "http://example.com/shared"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(url, status=200, body="shared", repeat=True)
+            fetcher = AiohttpFetcher(client=client)
+
+            responses = await asyncio.gather(*[fetcher.fetch(url) for _ in range(3)])
+
+            assert [r.content for r in responses] == ["shared"] * 3
+            assert len(m.requests[("GET", URL(url))]) == 1
+
+
+@pytest.mark.asyncio
+async def test_fetch_stale_while_revalidate(
+    memory_cache_backend: MemoryCacheBackend[Response],
+) -> None:
+    url = "http://example.com/swr"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(url, status=200, body="old")
+            m.get(url, status=200, body="new")
+            fetcher = AiohttpFetcher(
+                client=client,
+                cache_backend=memory_cache_backend,
+                cache_ttl=0,
+                stale_while_revalidate=60,
+            )
+            assert (await fetcher.fetch(url)).content == "old"
+
+            # Expired: served from the cache while it is refetched
+            stale = await asyncio.gather(fetcher.fetch(url), fetcher.fetch(url))
+            assert [r.content for r in stale] == ["old", "old"]
+            await fetcher.drain_refreshes()
+
+            assert len(m.requests[("GET", URL(url))]) == 2
+            entry = await memory_cache_backend.get(fetcher._cache_key(url))
+            assert entry is not None and entry.content == "new"
+
+
+@pytest.mark.asyncio
+async def test_fetch_urls_splits_cache_hits_and_misses(
+    memory_cache_backend: MemoryCacheBackend[Response],
+) -> None:
+    cached_url = "http://example.com/cached"
+    new_url = "http://example.com/new"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(cached_url, status=200, body="cached")
+            m.get(new_url, status=200, body="new")
+            fetcher = AiohttpFetcher(
+                client=client, cache_backend=memory_cache_backend, cache_ttl=60
+            )
+            await fetcher.fetch(cached_url)
+
+            get_many = memory_cache_backend.get_many
+            with patch.object(
+                memory_cache_backend, "get_many", wraps=get_many
+            ) as batch:
+                responses = await fetcher.fetch_urls([cached_url, new_url, cached_url])
+                batch.assert_awaited_once()
+
+            assert [r.content for r in responses] == ["cached", "new", "cached"]
+            assert len(m.requests[("GET", URL(cached_url))]) == 1
+
+
+@pytest.mark.asyncio
+async def test_iter_fetch_yields_cache_hits_first(
+    memory_cache_backend: MemoryCacheBackend[Response],
+) -> None:
+    cached_url = "http://example.com/cached"
+    new_url = "http://example.com/new"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(cached_url, status=200, body="cached")
+            m.get(new_url, status=200, body="new")
+            fetcher = AiohttpFetcher(
+                client=client, cache_backend=memory_cache_backend, cache_ttl=60
+            )
+            await fetcher.fetch(cached_url)
+
+            results = [item async for item in fetcher.iter_fetch([new_url, cached_url])]
+
+            assert [url for url, _ in results] == [cached_url, new_url]
+            assert len(m.requests[("GET", URL(cached_url))]) == 1
+
+
+@pytest.mark.asyncio
+async def test_warm_fetches_missing_and_expiring_urls(
+    memory_cache_backend: MemoryCacheBackend[Response],
+) -> None:
+    fresh_url = "http://example.com/fresh"
+    expiring_url = "http://example.com/expiring"
+    missing_url = "http://example.com/missing"
+    broken_url = "http://other.com/broken"
+    async with ClientSession() as client:
+        with aioresponses() as m:
+            m.get(fresh_url, status=200, body="fresh")
+            m.get(expiring_url, status=200, body="v1", headers={"ETag": '"v1"'})
+            m.get(expiring_url, status=304)
+            m.get(missing_url, status=200, body="missing")
+            m.get(broken_url, exception=ClientConnectionError("refused"))
+            fetcher = AiohttpFetcher(
+                client=client,
+                cache_backend=memory_cache_backend,
+                cache_ttl=3600,
+                retry_policy=RetryPolicy(max_attempts=1),
+            )
+            await fetcher.fetch(fresh_url)
+            await fetcher.fetch(expiring_url)
+            # Make the second page expire within the warming window
+            key = fetcher._cache_key(expiring_url)
+            cached = await memory_cache_backend.get(key)
+            assert cached is not None
+            cached.expires_at = time.time() + 60
+
+            report = await fetcher.warm(
+                [fresh_url, expiring_url, missing_url, broken_url, missing_url],
+                refresh_within=600,
+            )
+
+            assert (report.urls, report.fresh, report.fetched, report.failed) == (
+                4,
+                1,
+                2,
+                1,
+            )
+            assert "1 already fresh" in str(report)
+            assert len(m.requests[("GET", URL(fresh_url))]) == 1
+            revalidation = m.requests[("GET", URL(expiring_url))][1]
+            assert revalidation.kwargs["headers"]["If-None-Match"] == '"v1"'
+            refreshed = await memory_cache_backend.get(key)
+            assert refreshed is not None and refreshed.expires_at is not None
+            assert refreshed.expires_at > time.time() + 600
+            assert (await fetcher.fetch(missing_url)).content == "missing"
+
+
+@pytest.mark.asyncio
+async def test_warm_without_cache() -> None:
+    async with ClientSession() as client:
+        fetcher = AiohttpFetcher(client=client)
+        report = await fetcher.warm(["http://example.com"])
+        assert (report.urls, report.fetched) == (1, 0)
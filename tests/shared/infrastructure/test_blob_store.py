@@ -0,0 +1,145 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from lagransala.shared.domain.fetcher import Response
+from lagransala.shared.infrastructure import (
+    BlobStore,
+    DedupResponseCacheBackend,
+    FileCacheBackend,
+    StoredResponse,
+    collect_blobs,
+    collect_garbage,
+)
+from lagransala.shared.infrastructure.blob_store import BLOB_GRACE_PERIOD
+
+PAGE = "<html>" + "<p>No changes today</p>" * 100 + "</html>"
+
+
+@pytest.fixture
+def blobs(tmp_path: Path):
+    store = BlobStore(str(tmp_path / "cache" / "blobs"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def cache(tmp_path: Path, blobs: BlobStore) -> DedupResponseCacheBackend:
+    entries = FileCacheBackend(StoredResponse, str(tmp_path / "cache" / "pages"))
+    return DedupResponseCacheBackend(entries, blobs)
+
+
+def _blob_files(blobs: BlobStore) -> list[Path]:
+    return list(blobs.path.glob("*/*/*.blob"))
+
+
+def _age(path: Path) -> None:
+    old = time.time() - BLOB_GRACE_PERIOD - 1
+    os.utime(path, (old, old))
+
+
+@pytest.mark.asyncio
+async def test_identical_contents_are_stored_once(cache: DedupResponseCacheBackend):
+    """Test that responses with the same content share a single blob."""
+    day1 = Response(status=200, content=PAGE, content_type="text/html", etag="1")
+    day2 = Response(status=200, content=PAGE, content_type="text/html", etag="2")
+    await cache.set("https://venue.es/?day=1", day1, ttl=10, soft_ttl=5)
+    await cache.set_many({"https://venue.es/?day=2": day2}, ttl=10)
+
+    assert len(_blob_files(cache.blobs)) == 1
+    entry = await cache.get_entry("https://venue.es/?day=1")
+    assert entry is not None and entry.value == day1
+    assert entry.stale_at is not None
+    entries = await cache.get_many(["https://venue.es/?day=2", "missing"])
+    assert {key: entry.value for key, entry in entries.items()} == {
+        "https://venue.es/?day=2": day2
+    }
+
+
+@pytest.mark.asyncio
+async def test_entries_without_digest_are_served_inline(
+    cache: DedupResponseCacheBackend,
+):
+    """Test that entries cached as whole responses are still returned."""
+    response = Response(status=200, content=PAGE, content_type="text/html")
+    await cache.entries.set("key", StoredResponse(**response.model_dump()))
+
+    assert await cache.get("key") == response
+
+
+@pytest.mark.asyncio
+async def test_missing_blob_is_a_miss(cache: DedupResponseCacheBackend):
+    response = Response(status=200, content=PAGE, content_type="text/html")
+    await cache.set("key", response)
+    for blob in _blob_files(cache.blobs):
+        blob.unlink()
+
+    assert await cache.get("key") is None
+    assert await cache.get_many(["key"]) == {}
+
+
+@pytest.mark.asyncio
+async def test_collect_blobs(cache: DedupResponseCacheBackend):
+    """Test that only old blobs without unexpired references are removed."""
+    kept = Response(status=200, content="kept", content_type="text/html")
+    await cache.set("kept", kept)
+    await cache.set("shared1", Response(status=200, content="a", content_type="x"))
+    await cache.set("shared2", Response(status=200, content="a", content_type="x"))
+    await cache.set("expired", Response(status=200, content="b", content_type="x"))
+    await cache.set("expired", Response(status=200, content="c", content_type="x"), 0)
+    await cache.delete("shared1")
+    for blob in _blob_files(cache.blobs):
+        _age(blob)
+    time.sleep(0.01)
+
+    dry_run = collect_blobs(cache.blobs.path, dry_run=True)
+    assert dry_run.blobs_removed == 2
+    assert len(_blob_files(cache.blobs)) == 4
+
+    report = collect_blobs(cache.blobs.path)
+
+    assert report.blobs_removed == 2  # "b", replaced, and "c", expired
+    assert report.bytes_remaining > 0
+    assert len(_blob_files(cache.blobs)) == 2
+    assert await cache.get("kept") == kept
+    assert (await cache.get("shared2")) is not None
+
+
+@pytest.mark.asyncio
+async def test_recent_blobs_are_kept(cache: DedupResponseCacheBackend):
+    await cache.set("key", Response(status=200, content="a", content_type="x"))
+    await cache.delete("key")
+
+    assert collect_blobs(cache.blobs.path).blobs_removed == 0
+
+
+@pytest.mark.asyncio
+async def test_collect_garbage_collects_blobs(
+    tmp_path: Path, cache: DedupResponseCacheBackend
+):
+    await cache.set("key", Response(status=200, content="a", content_type="x"))
+    await cache.delete("key")
+    for blob in _blob_files(cache.blobs):
+        _age(blob)
+
+    report = collect_garbage(tmp_path / "cache")
+
+    assert report.blobs_removed == 1
+    assert "1 blobs removed" in str(report)
+    assert _blob_files(cache.blobs) == []
+
+
+@pytest.mark.asyncio
+async def test_size_budget_evicts_blobs(
+    tmp_path: Path, cache: DedupResponseCacheBackend
+):
+    """Test that referenced blobs count towards the budget, and become misses."""
+    await cache.set("key", Response(status=200, content=PAGE, content_type="x"))
+
+    report = collect_garbage(tmp_path / "cache", max_bytes=0)
+
+    assert report.blobs_removed == 0
+    assert report.entries_evicted == 2  # The entry and its blob
+    assert await cache.get("key") is None
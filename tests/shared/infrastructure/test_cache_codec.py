@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from lagransala.shared.infrastructure.cache_codec import (
+    HEADER_SIZE,
+    IdentityCodec,
+    ZlibCodec,
+    ZstdCodec,
+    decode_data,
+    decode_entry,
+    encode_data,
+    encode_entry,
+    read_expiry,
+    zstandard,
+)
+
+DATA = b'{"name": "' + b"<p>event</p>" * 100 + b'"}'
+
+
+@pytest.mark.parametrize("codec", [IdentityCodec(), ZlibCodec()])
+def test_entry_round_trip(codec):
+    blob = encode_entry(DATA, 123.5, None, codec)
+
+    decoded = decode_entry(blob)
+    assert decoded.data == DATA
+    assert decoded.expiry == 123.5
+    assert decoded.stale_at is None
+    assert not decoded.legacy
+    assert read_expiry(blob[:HEADER_SIZE]) == 123.5
+
+
+def test_zlib_compresses():
+    assert len(encode_entry(DATA, None, None, ZlibCodec())) < len(DATA) / 10
+
+
+@pytest.mark.skipif(zstandard is None, reason="zstandard is not installed")
+def test_zstd_round_trip():
+    assert decode_entry(encode_entry(DATA, None, 1.0, ZstdCodec())).data == DATA
+
+
+@pytest.mark.skipif(zstandard is not None, reason="zstandard is installed")
+def test_zstd_requires_zstandard():
+    with pytest.raises(ImportError):
+        ZstdCodec()
+
+
+def test_legacy_json_entry():
+    blob = json.dumps({"expiry": 1.0, "data": {"name": "x"}}).encode()
+
+    decoded = decode_entry(blob)
+    assert json.loads(decoded.data) == {"name": "x"}
+    assert decoded.expiry == 1.0
+    assert decoded.legacy
+    assert read_expiry(blob) == 1.0
+
+
+@pytest.mark.parametrize(
+    "blob",
+    [
+        b"not json",
+        b"{}",
+        b"LGC\x01",
+        encode_entry(DATA, None, None, ZlibCodec())[:-5],
+        b"LGC\x09" + encode_entry(DATA, None, None, ZlibCodec())[4:],
+    ],
+)
+def test_invalid_entries(blob):
+    with pytest.raises(ValueError):
+        decode_entry(blob)
+
+
+def test_data_round_trip():
+    assert decode_data(encode_data(DATA, ZlibCodec())) == DATA
+    assert decode_data('{"name": "x"}') == '{"name": "x"}'
@@ -0,0 +1,245 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+import pytest
+from pydantic import BaseModel
+
+from lagransala.shared.infrastructure import (
+    FileCacheBackend,
+    LogCacheBackend,
+    SqliteCacheBackend,
+    collect_garbage,
+    parse_size,
+)
+
+
+class SimpleData(BaseModel):
+    name: str
+    value: int
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> FileCacheBackend[SimpleData]:
+    return FileCacheBackend(SimpleData, cache_dir=str(tmp_path / "cache" / "extract"))
+
+
+def _files(path: Path) -> list[Path]:
+    return [
+        file
+        for file in path.rglob("*")
+        if file.is_file() and file.name != ".no-legacy-entries"
+    ]
+
+
+@pytest.mark.parametrize(
+    "size, expected",
+    [("512", 512), ("1K", 1024), ("500M", 500 * 1024**2), ("2GiB", 2 * 1024**3)],
+)
+def test_parse_size(size, expected):
+    assert parse_size(size) == expected
+
+
+def test_parse_size_invalid():
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_entries_store_expiry_as_mtime(cache: FileCacheBackend[SimpleData]):
+    asyncio.run(cache.set("key", SimpleData(name="a", value=1), ttl=100))
+    path = cache._path_for_key("key")
+    assert path.stat().st_mtime == pytest.approx(time.time() + 100, abs=5)
+
+
+def test_removes_expired_entries(tmp_path: Path, cache: FileCacheBackend[SimpleData]):
+    asyncio.run(cache.set("expired", SimpleData(name="a", value=1), ttl=0.1))
+    asyncio.run(cache.set("fresh", SimpleData(name="b", value=2), ttl=100))
+    asyncio.run(cache.set("forever", SimpleData(name="c", value=3)))
+    time.sleep(0.2)
+
+    report = collect_garbage(tmp_path / "cache")
+
+    assert report.entries_scanned == 3
+    assert report.entries_expired == 1
+    assert report.bytes_reclaimed > 0
+    assert not cache._path_for_key("expired").exists()
+    assert asyncio.run(cache.get("fresh")) is not None
+    assert asyncio.run(cache.get("forever")) is not None
+    # The shard directories of the expired entry are gone too
+    assert len(_files(tmp_path / "cache")) == 2
+    directories = [path for path in (tmp_path / "cache").rglob("*") if path.is_dir()]
+    assert all(any(directory.iterdir()) for directory in directories)
+
+
+def test_dry_run_removes_nothing(tmp_path: Path, cache: FileCacheBackend[SimpleData]):
+    asyncio.run(cache.set("expired", SimpleData(name="a", value=1), ttl=0.1))
+    time.sleep(0.2)
+
+    report = collect_garbage(tmp_path / "cache", dry_run=True)
+
+    assert report.entries_expired == 1
+    assert cache._path_for_key("expired").exists()
+
+
+def test_fixes_mtime_of_entries_written_without_it(
+    tmp_path: Path, cache: FileCacheBackend[SimpleData]
+):
+    asyncio.run(cache.set("key", SimpleData(name="a", value=1), ttl=100))
+    path = cache._path_for_key("key")
+    os.utime(path, (time.time() - 50, time.time() - 50))
+
+    report = collect_garbage(tmp_path / "cache")
+
+    assert report.entries_expired == 0
+    assert path.stat().st_mtime > time.time()
+
+
+def test_removes_corrupted_entries_and_stale_temp_files(
+    tmp_path: Path, cache: FileCacheBackend[SimpleData]
+):
+    corrupted = cache._path_for_key("corrupted")
+    corrupted.parent.mkdir(parents=True, exist_ok=True)
+    corrupted.write_text("not json")
+    os.utime(corrupted, (0, 0))
+    temp = corrupted.with_name(".leftover.tmp")
+    temp.write_text("{")
+
+    report = collect_garbage(tmp_path / "cache")
+    assert report.entries_expired == 1
+    assert report.temp_files_removed == 0  # Too recent, may still be written
+
+    assert not corrupted.exists()
+    assert temp.exists()
+
+
+def test_evicts_least_recently_used_over_budget(
+    tmp_path: Path, cache: FileCacheBackend[SimpleData]
+):
+    for i in range(3):
+        asyncio.run(cache.set(f"key{i}", SimpleData(name="x" * 100, value=i)))
+        path = cache._path_for_key(f"key{i}")
+        stat = path.stat()
+        os.utime(path, (time.time() - 1000 + i * 100, stat.st_mtime))
+    size = cache._path_for_key("key0").stat().st_size
+
+    # Reading key0 makes it the most recently used entry
+    path = cache._path_for_key("key0")
+    os.utime(path, (time.time() + 10, path.stat().st_mtime))
+
+    report = collect_garbage(tmp_path / "cache", max_bytes=2 * size)
+
+    assert report.entries_evicted == 1
+    assert report.bytes_remaining == 2 * size
+    assert cache._path_for_key("key0").exists()
+    assert not cache._path_for_key("key1").exists()
+    assert cache._path_for_key("key2").exists()
+
+
+def test_purges_and_vacuums_sqlite(tmp_path: Path):
+    path = tmp_path / "cache" / "http.sqlite"
+
+    async def fill() -> None:
+        backend = SqliteCacheBackend(SimpleData, str(path))
+        items = {f"key{i}": SimpleData(name="x" * 1000, value=i) for i in range(200)}
+        await backend.set_many(items, ttl=0.1)
+        await backend.set("kept", SimpleData(name="kept", value=1))
+        await backend.close()
+
+    asyncio.run(fill())
+    time.sleep(0.2)
+
+    report = collect_garbage(tmp_path / "cache")
+
+    assert report.entries_scanned == 201
+    assert report.entries_expired == 200
+    assert report.bytes_reclaimed > 0
+
+
+def test_missing_directory(tmp_path: Path):
+    report = collect_garbage(tmp_path / "missing")
+    assert report.entries_scanned == 0
+    assert "0 entries scanned" in str(report)
+
+
+def test_legacy_entry_payload(tmp_path: Path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    entry = cache_dir / "legacy.json"
+    entry.write_text(json.dumps({"expiry": time.time() - 1, "data": {}}))
+
+    assert collect_garbage(cache_dir).entries_expired == 1
+    assert not entry.exists()
+
+
+def test_leaves_other_files_alone(tmp_path: Path, cache: FileCacheBackend[SimpleData]):
+    asyncio.run(cache.set("key", SimpleData(name="a", value=1)))
+    metrics = tmp_path / "cache" / "metrics.json"
+    metrics.write_text(json.dumps({"http": {"hits": 1}}))
+    notes = tmp_path / "cache" / "extract" / "ab" / "notes.json"
+    notes.parent.mkdir(parents=True)
+    notes.write_text("not json")
+    os.utime(notes, (0, 0))
+    data = tmp_path / "cache" / "data.bin"
+    data.write_bytes(b"\0" * 100)
+
+    report = collect_garbage(tmp_path / "cache", max_bytes=0)
+
+    assert report.entries_scanned == 1
+    assert report.entries_evicted == 1
+    assert metrics.exists() and notes.exists() and data.exists()
+
+
+def test_quotes_sqlite_table_names(tmp_path: Path):
+    path = tmp_path / "cache" / "odd.sqlite"
+    path.parent.mkdir()
+    with closing(sqlite3.connect(path)) as connection, connection:
+        connection.execute('CREATE TABLE "order" (key TEXT, expiry REAL)')
+        connection.execute('INSERT INTO "order" VALUES (?, ?)', ("a", 0))
+
+    report = collect_garbage(tmp_path / "cache")
+
+    assert report.entries_scanned == 1
+    assert report.entries_expired == 1
+
+
+def test_purges_and_compacts_log_stores(tmp_path: Path):
+    path = tmp_path / "cache" / "log"
+
+    async def fill() -> None:
+        backend = LogCacheBackend(SimpleData, str(path), segment_size=4096)
+        for i in range(100):
+            await backend.set(f"key{i}", SimpleData(name="x" * 50, value=i), ttl=0.1)
+        await backend.set("kept", SimpleData(name="kept", value=1))
+        await backend.close()
+
+    asyncio.run(fill())
+    time.sleep(0.2)
+
+    def contents() -> dict[str, bytes]:
+        return {file.name: file.read_bytes() for file in path.iterdir()}
+
+    before = contents()
+    report = collect_garbage(tmp_path / "cache", dry_run=True)
+    assert report.entries_scanned == 101
+    assert report.entries_expired == 100
+    assert contents() == before
+
+    report = collect_garbage(tmp_path / "cache")
+
+    assert report.entries_scanned == 101
+    assert report.entries_expired == 100
+    assert report.bytes_reclaimed > 0
+    assert report.bytes_remaining > 0
+
+    async def read() -> SimpleData | None:
+        backend = LogCacheBackend(SimpleData, str(path))
+        try:
+            return await backend.get("kept")
+        finally:
+            await backend.close()
+
+    assert asyncio.run(read()) == SimpleData(name="kept", value=1)
@@ -0,0 +1,54 @@
+from pathlib import Path
+
+import pytest
+from pydantic import BaseModel
+
+from lagransala.shared.infrastructure import (
+    CACHE_NAMESPACES,
+    CacheNamespace,
+    FileCacheBackend,
+    TieredCacheBackend,
+    get_cache_namespace,
+)
+
+
+class SimpleData(BaseModel):
+    name: str
+
+
+def test_get_cache_namespace():
+    assert get_cache_namespace("http") is CACHE_NAMESPACES["http"]
+    with pytest.raises(ValueError):
+        get_cache_namespace("unknown")
+
+
+def test_namespaces_do_not_share_directories():
+    directories = [Path(ns.directory) for ns in CACHE_NAMESPACES.values()]
+    for directory in directories:
+        assert not any(
+            other != directory and directory in other.parents for other in directories
+        )
+
+
+def test_extraction_results_are_never_evicted():
+    extract = get_cache_namespace("extract")
+    assert extract.ttl is None and extract.max_bytes is None
+
+
+@pytest.mark.asyncio
+async def test_backends(tmp_path: Path):
+    namespace = CacheNamespace(
+        name="test", directory=str(tmp_path / "test"), memory_max_bytes=1024
+    )
+
+    file_backend = namespace.file_backend(SimpleData, "sub")
+    assert file_backend.cache_dir == tmp_path / "test" / "sub"
+
+    backend = namespace.with_memory_tier(file_backend)
+    assert isinstance(backend, TieredCacheBackend)
+    await backend.set("key", SimpleData(name="x"))
+    assert await file_backend.get("key") == SimpleData(name="x")
+
+    without_memory = CacheNamespace(name="disk", directory=str(tmp_path))
+    assert without_memory.with_memory_tier(file_backend) is file_backend
+    assert isinstance(without_memory.file_backend(SimpleData), FileCacheBackend)
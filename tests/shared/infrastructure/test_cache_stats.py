@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import pytest
+from pydantic import BaseModel
+
+from lagransala.shared.domain.fetcher import Response
+from lagransala.shared.infrastructure import (
+    BlobStore,
+    DedupResponseCacheBackend,
+    FileCacheBackend,
+    LogCacheBackend,
+    SqliteCacheBackend,
+    StoredResponse,
+    summarize_cache,
+)
+
+
+class SimpleData(BaseModel):
+    name: str
+
+
+def test_missing_directory(tmp_path: Path):
+    summary = summarize_cache(tmp_path / "missing")
+    assert summary.entries == 0
+    assert summary.total_bytes == 0
+
+
+@pytest.mark.asyncio
+async def test_summarize_cache(tmp_path: Path):
+    files = FileCacheBackend(SimpleData, str(tmp_path / "files"))
+    await files.set("fresh", SimpleData(name="fresh"), ttl=60)
+    await files.set("expired", SimpleData(name="expired"), ttl=0)
+    blobs = BlobStore(str(tmp_path / "blobs"))
+    pages = DedupResponseCacheBackend(
+        FileCacheBackend(StoredResponse, str(tmp_path / "pages")), blobs
+    )
+    page = Response(status=200, content="<p>same</p>", content_type="text/html")
+    await pages.set("a", page)
+    await pages.set("b", page)
+    log = LogCacheBackend(SimpleData, str(tmp_path / "log"))
+    await log.set("key", SimpleData(name="record"))
+    await log.close()
+    database = SqliteCacheBackend(SimpleData, str(tmp_path / "db.sqlite"))
+    await database.set("key", SimpleData(name="row"))
+    await database.close()
+    blobs.close()
+
+    summary = summarize_cache(tmp_path)
+
+    assert summary.entries == 4
+    assert summary.expired_entries == 1
+    assert summary.blobs == 1
+    assert summary.blob_references == 2
+    assert summary.database_rows == 1
+    assert summary.total_bytes > 0
+    assert "1 blobs for 2 references" in str(summary)
+    assert "1 database rows" in str(summary)
+    assert summary.log_entries == 1
+    assert "1 log entries" in str(summary)
@@ -0,0 +1,54 @@
+import time
+
+from lagransala.shared.infrastructure import CircuitBreaker
+
+
+def test_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure("a.com")
+    assert breaker.allow("a.com")
+
+    breaker.record_failure("a.com")
+    assert breaker.state("a.com") == "open"
+    assert not breaker.allow("a.com")
+    assert breaker.allow("b.com")
+
+
+def test_success_resets_failures():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure("a.com")
+    breaker.record_success("a.com")
+    breaker.record_failure("a.com")
+    assert breaker.state("a.com") == "closed"
+
+
+def test_half_open_allows_single_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure("a.com")
+    assert not breaker.allow("a.com")
+
+    time.sleep(0.06)
+    assert breaker.state("a.com") == "half_open"
+    assert breaker.allow("a.com")
+    assert not breaker.allow("a.com")
+
+    breaker.record_failure("a.com")
+    assert breaker.state("a.com") == "open"
+
+    time.sleep(0.06)
+    assert breaker.allow("a.com")
+    breaker.record_success("a.com")
+    assert breaker.state("a.com") == "closed"
+
+
+def test_release_ends_trial_without_outcome():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure("a.com")
+    time.sleep(0.06)
+    assert breaker.allow("a.com")
+    assert not breaker.allow("a.com")
+
+    breaker.release("a.com")
+    assert breaker.state("a.com") == "half_open"
+    assert breaker.allow("a.com")
@@ -0,0 +1,61 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from lagransala.shared.infrastructure import (
+    ConnectionProfile,
+    ConnectionStats,
+    get_connection_profile,
+)
+
+
+@pytest.mark.asyncio
+async def test_connector_settings():
+    profile = ConnectionProfile(
+        name="test", limit=10, limit_per_host=3, ttl_dns_cache=None
+    )
+    connector = profile.connector()
+    try:
+        assert connector.limit == 10
+        assert connector.limit_per_host == 3
+        assert not connector.use_dns_cache
+        assert not connector.force_close
+    finally:
+        await connector.close()
+
+
+@pytest.mark.asyncio
+async def test_force_close_profile():
+    connector = ConnectionProfile(name="test", force_close=True).connector()
+    try:
+        assert connector.force_close
+    finally:
+        await connector.close()
+
+
+def test_get_connection_profile():
+    assert get_connection_profile("venues").name == "venues"
+    with pytest.raises(ValueError):
+        get_connection_profile("unknown")
+
+
+@pytest.mark.asyncio
+async def test_stats_report_connection_reuse():
+    async def handler(_: web.Request) -> web.Response:
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    stats = ConnectionStats()
+
+    async with TestServer(app) as server:
+        profile = ConnectionProfile(name="test", limit_per_host=1)
+        async with profile.client_session(stats=stats) as session:
+            for _ in range(3):
+                async with session.get(server.make_url("/")) as response:
+                    assert await response.text() == "ok"
+
+    assert stats.requests == 3
+    assert stats.connections_created == 1
+    assert stats.connections_reused == 2
+    assert stats.reuse_ratio == pytest.approx(2 / 3)
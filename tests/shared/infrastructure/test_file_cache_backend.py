@@ -1,11 +1,15 @@
+import asyncio
+import base64
+import json
 import time
 from pathlib import Path
-from re import S
+from unittest.mock import patch
 
 import pytest
 from pydantic import BaseModel
 
-from lagransala.shared.infrastructure import FileCacheBackend
+from lagransala.shared.infrastructure import FileCacheBackend, IdentityCodec
+from lagransala.shared.infrastructure.cache_codec import decode_entry
 
 
 class SimpleData(BaseModel):
@@ -142,3 +146,172 @@ async def test_set_without_ttl(cache_simple: FileCacheBackend[SimpleData]):
 
     retrieved_data = await cache_simple.get(key)
     assert retrieved_data == data
+
+
+@pytest.mark.asyncio
+async def test_delete(cache_simple: FileCacheBackend[SimpleData]):
+    """Test that a deleted key is no longer returned."""
+    await cache_simple.set("key", SimpleData(name="test", value=1))
+    await cache_simple.delete("key")
+    await cache_simple.delete("missing_key")
+
+    assert await cache_simple.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_get_entry_with_soft_ttl(cache_simple: FileCacheBackend[SimpleData]):
+    """Test that an entry past its soft TTL is stale but still returned."""
+    data = SimpleData(name="soft", value=1)
+    await cache_simple.set("key", data, ttl=10, soft_ttl=0.1)
+
+    entry = await cache_simple.get_entry("key")
+    assert entry is not None
+    assert entry.value == data
+    assert entry.expires_at is not None
+    assert not entry.is_stale()
+
+    time.sleep(0.2)
+
+    entry = await cache_simple.get_entry("key")
+    assert entry is not None and entry.is_stale()
+    assert await cache_simple.get("key") == data
+
+
+@pytest.mark.asyncio
+async def test_layout_is_hashed_and_sharded(
+    cache_simple: FileCacheBackend[SimpleData],
+):
+    """Test that entries are stored under fixed-length, sharded names."""
+    key = "k" * 1000  # Too long for a file name when base64-encoded
+    await cache_simple.set(key, SimpleData(name="long", value=1))
+
+    path = cache_simple._path_for_key(key)
+    assert path.exists()
+    assert len(path.stem) == 64
+    assert path.parent.parent.parent == cache_simple.cache_dir
+    assert path.parent.name == path.stem[2:4]
+    assert path.parent.parent.name == path.stem[:2]
+    assert await cache_simple.get(key) == SimpleData(name="long", value=1)
+
+
+@pytest.mark.asyncio
+async def test_set_leaves_no_temporary_files(
+    cache_simple: FileCacheBackend[SimpleData],
+):
+    """Test that concurrent writes are atomic and clean up after themselves."""
+    await asyncio.gather(
+        *[cache_simple.set("key", SimpleData(name="x", value=i)) for i in range(10)]
+    )
+
+    files = [
+        path
+        for path in cache_simple.cache_dir.rglob("*")
+        if path.is_file() and path.name != ".no-legacy-entries"
+    ]
+    assert files == [cache_simple._path_for_key("key")]
+    decode_entry(files[0].read_bytes())
+    assert (await cache_simple.get("key")) is not None
+
+
+def test_migrates_legacy_layout(tmp_path: Path):
+    """Test that entries of the flat base64 layout are moved and still found."""
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    key = "legacy_key"
+    legacy_name = base64.urlsafe_b64encode(key.encode("utf-8")).decode("utf-8")
+    payload = {"expiry": None, "data": {"name": "legacy", "value": 1}}
+    (cache_dir / f"{legacy_name}.json").write_text(json.dumps(payload))
+    (cache_dir / "not base64!.json").write_text("{}")
+
+    cache = FileCacheBackend(data_type=SimpleData, cache_dir=str(cache_dir))
+
+    assert not (cache_dir / f"{legacy_name}.json").exists()
+    assert (cache_dir / "not base64!.json").exists()
+    assert asyncio.run(cache.get(key)) == SimpleData(name="legacy", value=1)
+    assert cache.migrate_legacy_layout() == 0
+
+
+@pytest.mark.asyncio
+async def test_get_many_and_set_many(cache_simple: FileCacheBackend[SimpleData]):
+    """Test that batches return only valid, unexpired keys."""
+    items = {f"key{i}": SimpleData(name="batch", value=i) for i in range(3)}
+    await cache_simple.set_many(items, ttl=10, soft_ttl=5)
+    await cache_simple.set("expired", SimpleData(name="old", value=0), ttl=0.1)
+    corrupted = cache_simple._path_for_key("corrupted")
+    corrupted.parent.mkdir(parents=True, exist_ok=True)
+    corrupted.write_text("not json")
+    time.sleep(0.2)
+
+    entries = await cache_simple.get_many(
+        ["key0", "key1", "missing", "expired", "corrupted"]
+    )
+
+    assert {key: entry.value for key, entry in entries.items()} == {
+        "key0": items["key0"],
+        "key1": items["key1"],
+    }
+    assert entries["key0"].stale_at is not None
+    assert not cache_simple._path_for_key("expired").exists()
+
+
+@pytest.mark.asyncio
+async def test_entries_are_compressed(tmp_path: Path):
+    """Test that the default codec stores much less than the plain JSON."""
+    compressed = FileCacheBackend(SimpleData, str(tmp_path / "zlib"))
+    plain = FileCacheBackend(SimpleData, str(tmp_path / "plain"), IdentityCodec())
+    data = SimpleData(name="<p>event</p>" * 1000, value=1)
+
+    await compressed.set("key", data)
+    await plain.set("key", data)
+
+    assert await compressed.get("key") == data
+    assert await plain.get("key") == data
+    compressed_size = compressed._path_for_key("key").stat().st_size
+    plain_size = plain._path_for_key("key").stat().st_size
+    assert compressed_size * 10 < plain_size
+
+
+@pytest.mark.asyncio
+async def test_json_entries_are_rewritten(cache_simple: FileCacheBackend[SimpleData]):
+    """Test that entries of the JSON format are read and then converted."""
+    path = cache_simple._path_for_key("key")
+    json_path = path.with_suffix(".json")
+    json_path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "expiry": time.time() + 10,
+        "stale_at": None,
+        "data": {"name": "json", "value": 1},
+    }
+    json_path.write_text(json.dumps(payload))
+    # As in a directory written before the current format, with JSON entries
+    (cache_simple.cache_dir / ".no-legacy-entries").unlink()
+    cache = FileCacheBackend(SimpleData, str(cache_simple.cache_dir))
+
+    entry = await cache.get_entry("key")
+
+    assert entry is not None
+    assert entry.value == SimpleData(name="json", value=1)
+    assert entry.expires_at == payload["expiry"]
+    assert not json_path.exists()
+    assert decode_entry(path.read_bytes()).expiry == payload["expiry"]
+    assert await cache.get_many(["key"]) == {"key": entry}
+
+
+@pytest.mark.asyncio
+async def test_misses_skip_json_lookup_without_json_entries(tmp_path: Path):
+    """Test that misses only look for JSON entries while there may be some."""
+    cache = FileCacheBackend(SimpleData, str(tmp_path))
+    assert (tmp_path / ".no-legacy-entries").exists()
+
+    with patch.object(cache, "_read_json") as read_json:
+        assert await cache.get("missing") is None
+        assert await cache.get_many(["missing"]) == {}
+    read_json.assert_not_called()
+
+    json_path = cache._path_for_key("key").with_suffix(".json")
+    json_path.parent.mkdir(parents=True, exist_ok=True)
+    json_path.write_text(json.dumps({"data": {"name": "json", "value": 1}}))
+    (tmp_path / ".no-legacy-entries").unlink()
+    reopened = FileCacheBackend(SimpleData, str(tmp_path))
+    assert not (tmp_path / ".no-legacy-entries").exists()
+    assert await reopened.get("key") == SimpleData(name="json", value=1)
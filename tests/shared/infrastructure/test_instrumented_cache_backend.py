@@ -0,0 +1,66 @@
+import time
+
+import pytest
+from pydantic import BaseModel
+
+from lagransala.shared.application import CacheMetricsRegistry
+from lagransala.shared.infrastructure import (
+    InstrumentedCacheBackend,
+    MemoryCacheBackend,
+)
+
+
+class SimpleData(BaseModel):
+    name: str
+
+
+@pytest.fixture
+def metrics() -> CacheMetricsRegistry:
+    return CacheMetricsRegistry()
+
+
+@pytest.mark.asyncio
+async def test_records_lookups_and_writes(metrics: CacheMetricsRegistry):
+    backend = InstrumentedCacheBackend(
+        MemoryCacheBackend[SimpleData](max_entries=2), "test", metrics=metrics
+    )
+    data = SimpleData(name="x")
+
+    await backend.set("a", data, ttl=10, soft_ttl=0.1)
+    await backend.set_many({"b": data, "c": data})
+    assert await backend.get("missing") is None
+    time.sleep(0.2)
+    assert await backend.get("c") == data
+    entries = await backend.get_many(["b", "c", "missing"])
+    await backend.delete("c")
+
+    recorded = metrics.labels("test")
+    assert set(entries) == {"b", "c"}
+    assert recorded.sets == 3
+    assert recorded.evictions == 1  # "a", over max_entries
+    assert recorded.hits == 3
+    assert recorded.misses == 2
+    assert recorded.stale_hits == 0
+    assert recorded.deletes == 1
+    size = len(data.model_dump_json())
+    assert recorded.bytes_written == 3 * size
+    assert recorded.bytes_read == 3 * size
+    assert recorded.get_latency.count == 3
+    assert recorded.set_latency.count == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_hits_and_custom_size(metrics: CacheMetricsRegistry):
+    backend = InstrumentedCacheBackend(
+        MemoryCacheBackend[SimpleData](),
+        "test",
+        metrics=metrics,
+        sizeof=lambda value: len(value.name),
+    )
+    await backend.set("key", SimpleData(name="abc"), ttl=10, soft_ttl=0.1)
+    time.sleep(0.2)
+
+    assert await backend.get_entry("key") is not None
+    recorded = metrics.labels("test")
+    assert recorded.stale_hits == 1
+    assert recorded.bytes_read == recorded.bytes_written == 3
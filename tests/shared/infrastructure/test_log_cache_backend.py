@@ -0,0 +1,182 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from pydantic import BaseModel
+
+from lagransala.shared.infrastructure import IdentityCodec, LogCacheBackend
+
+
+class SimpleData(BaseModel):
+    name: str
+    value: int
+
+
+@pytest_asyncio.fixture(loop_scope="function")
+async def cache(tmp_path: Path):
+    backend = LogCacheBackend(SimpleData, str(tmp_path), segment_size=4096)
+    yield backend
+    await backend.close()
+
+
+def segments(path: Path) -> list[Path]:
+    return sorted(path.glob("*.seg"))
+
+
+@pytest.mark.asyncio
+async def test_set_and_get(cache: LogCacheBackend[SimpleData]):
+    """Test that the latest value of every key is returned."""
+    await cache.set("key", SimpleData(name="first", value=1))
+    await cache.set("other", SimpleData(name="other", value=2))
+    await cache.set("key", SimpleData(name="second", value=3))
+
+    assert await cache.get("key") == SimpleData(name="second", value=3)
+    assert await cache.get("other") == SimpleData(name="other", value=2)
+    assert await cache.get("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_set_with_ttl(cache: LogCacheBackend[SimpleData]):
+    """Test that entries expire after their TTL and keep their soft TTL."""
+    await cache.set("short", SimpleData(name="short", value=1), ttl=0.1)
+    await cache.set("soft", SimpleData(name="soft", value=2), ttl=10, soft_ttl=0.1)
+    time.sleep(0.2)
+
+    assert await cache.get("short") is None
+    entry = await cache.get_entry("soft")
+    assert entry is not None and entry.is_stale()
+    assert entry.expires_at is not None
+
+
+@pytest.mark.asyncio
+async def test_get_many_and_delete(cache: LogCacheBackend[SimpleData]):
+    """Test batched reads and writes, and that deleted keys are misses."""
+    await cache.set_many(
+        {f"key{i}": SimpleData(name=f"item{i}", value=i) for i in range(3)}
+    )
+    await cache.delete("key1")
+    await cache.delete("missing")
+
+    entries = await cache.get_many(["key0", "key1", "key2", "missing"])
+    assert {key: entry.value.value for key, entry in entries.items()} == {
+        "key0": 0,
+        "key2": 2,
+    }
+
+
+@pytest.mark.asyncio
+async def test_persistence(tmp_path: Path):
+    """Test that entries, and where to append, survive reopening."""
+    backend = LogCacheBackend(SimpleData, str(tmp_path), codec=IdentityCodec())
+    await backend.set("key", SimpleData(name="test", value=1))
+    await backend.close()
+
+    reopened = LogCacheBackend(SimpleData, str(tmp_path))
+    await reopened.set("other", SimpleData(name="other", value=2))
+    assert await reopened.get("key") == SimpleData(name="test", value=1)
+    assert await reopened.get("other") == SimpleData(name="other", value=2)
+    assert len(segments(tmp_path)) == 1
+    await reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_index_grows(tmp_path: Path):
+    """Test that the index is rebuilt larger once it fills up."""
+    backend = LogCacheBackend(SimpleData, str(tmp_path), index_capacity=8)
+    items = {f"key{i}": SimpleData(name=f"item{i}", value=i) for i in range(100)}
+    await backend.set_many(items)
+    for i in range(0, 100, 2):
+        await backend.delete(f"key{i}")
+
+    entries = await backend.get_many(items)
+    assert sorted(entry.value.value for entry in entries.values()) == list(
+        range(1, 100, 2)
+    )
+    await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_segments_roll_over(cache: LogCacheBackend[SimpleData]):
+    """Test that writes go to a new segment once one is full, even large ones."""
+    for i in range(100):
+        await cache.set(f"key{i}", SimpleData(name=f"item{i}", value=i))
+    await cache.set("large", SimpleData(name="x" * 10_000, value=0))
+
+    assert len(segments(cache.path)) > 2
+    assert await cache.get("key0") == SimpleData(name="item0", value=0)
+    large = await cache.get("large")
+    assert large is not None and large.name == "x" * 10_000
+
+
+@pytest.mark.asyncio
+async def test_compaction(cache: LogCacheBackend[SimpleData]):
+    """Test that compaction rewrites live entries and deletes old segments."""
+    for i in range(100):
+        await cache.set(f"key{i}", SimpleData(name=f"item{i}", value=i))
+    await cache.set("expiring", SimpleData(name="expiring", value=0), ttl=0.1)
+    for i in range(100):
+        if i % 10:
+            await cache.delete(f"key{i}")
+    time.sleep(0.2)
+    old_segments = segments(cache.path)[:-1]
+
+    reclaimed = await asyncio.to_thread(cache.compact, True)
+
+    assert reclaimed > 0
+    assert not any(segment.exists() for segment in old_segments)
+    entries = await cache.get_many(f"key{i}" for i in range(100))
+    assert sorted(entry.value.value for entry in entries.values()) == list(
+        range(0, 100, 10)
+    )
+    assert await cache.get("expiring") is None
+
+
+@pytest.mark.asyncio
+async def test_background_compaction(cache: LogCacheBackend[SimpleData]):
+    """Test that segments that are mostly garbage are compacted on writes."""
+    for _ in range(3):
+        for i in range(20):
+            await cache.set(f"key{i}", SimpleData(name=f"item{i}", value=i))
+    if cache._compactor is not None:
+        await cache._compactor
+
+    assert not (cache.path / "00000001.seg").exists()
+    entries = await cache.get_many(f"key{i}" for i in range(20))
+    assert sorted(entry.value.value for entry in entries.values()) == list(range(20))
+
+
+@pytest.mark.asyncio
+async def test_corrupted_record_is_a_miss(cache: LogCacheBackend[SimpleData]):
+    """Test that a record that does not decode is dropped from the index."""
+    await cache.set("key", SimpleData(name="test", value=1))
+    segment = cache._active
+    segment.map[40:60] = b"\0" * 20
+
+    assert await cache.get("key") is None
+    await cache.set("key", SimpleData(name="again", value=2))
+    assert await cache.get("key") == SimpleData(name="again", value=2)
+
+
+@pytest.mark.asyncio
+async def test_record_that_is_not_an_entry_is_a_miss(
+    cache: LogCacheBackend[SimpleData],
+):
+    """Test that a record without the entry header is a miss, not an error."""
+    await cache.set("key", SimpleData(name="test", value=1))
+    cache._active.map[36:39] = b"{x}"
+
+    assert await cache.get("key") is None
+    assert await cache.get_many(["key"]) == {}
+
+
+@pytest.mark.asyncio
+async def test_purge_expired(cache: LogCacheBackend[SimpleData]):
+    """Test that expired entries are dropped from the index."""
+    await cache.set("expiring", SimpleData(name="expiring", value=1), ttl=0.1)
+    await cache.set("kept", SimpleData(name="kept", value=2))
+    time.sleep(0.2)
+
+    assert await cache.purge_expired() == 1
+    assert len(cache) == 1
@@ -74,3 +74,148 @@ async def test_set_without_ttl(cache: MemoryCacheBackend[SimpleData]):
     time.sleep(1)  # Wait to ensure it would have expired if a short TTL was set
 
     assert await cache.get(key) == data
+
+
+@pytest.mark.asyncio
+async def test_delete(cache: MemoryCacheBackend[SimpleData]):
+    """Test that a deleted key is no longer returned."""
+    await cache.set("key", SimpleData(name="test", value=1))
+    await cache.delete("key")
+    await cache.delete("missing_key")
+
+    assert await cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_get_entry_with_soft_ttl(cache: MemoryCacheBackend[SimpleData]):
+    """Test that an entry past its soft TTL is stale but still returned."""
+    data = SimpleData(name="soft", value=1)
+    await cache.set("key", data, ttl=10, soft_ttl=0.1)
+
+    entry = await cache.get_entry("key")
+    assert entry is not None
+    assert entry.value == data
+    assert not entry.is_stale()
+
+    time.sleep(0.2)
+
+    entry = await cache.get_entry("key")
+    assert entry is not None and entry.is_stale()
+    assert await cache.get("key") == data
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_by_entries():
+    """Test that the least recently used entry is evicted first."""
+    cache = MemoryCacheBackend[SimpleData](max_entries=2)
+    await cache.set("a", SimpleData(name="a", value=1))
+    await cache.set("b", SimpleData(name="b", value=2))
+    await cache.get("a")
+    await cache.set("c", SimpleData(name="c", value=3))
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") is not None
+    assert await cache.get("c") is not None
+    assert cache.stats.evictions == 1
+    assert cache.stats.entries == 2
+
+
+@pytest.mark.asyncio
+async def test_lfu_eviction_by_entries():
+    """Test that the least frequently used entry is evicted first."""
+    cache = MemoryCacheBackend[SimpleData](max_entries=3, eviction="lfu")
+    for key in "abc":
+        await cache.set(key, SimpleData(name=key, value=1))
+    await cache.get("a")
+    await cache.get("a")
+    await cache.get("c")
+    await cache.set("d", SimpleData(name="d", value=1))
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") is not None
+    assert await cache.get("c") is not None
+    assert await cache.get("d") is not None
+    assert cache.stats.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_eviction_by_bytes():
+    """Test that entries are evicted to stay under max_bytes."""
+    cache = MemoryCacheBackend[SimpleData](max_bytes=100, sizeof=lambda _: 40)
+    for key in "abc":
+        await cache.set(key, SimpleData(name=key, value=1))
+
+    assert cache.stats.entries == 2
+    assert cache.stats.bytes == 80
+    assert await cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_oversized_entry_is_not_stored():
+    """Test that a value larger than max_bytes is not cached."""
+    cache = MemoryCacheBackend[SimpleData](max_bytes=10, sizeof=lambda _: 20)
+    await cache.set("key", SimpleData(name="big", value=1))
+
+    assert await cache.get("key") is None
+    assert cache.stats.bytes == 0
+
+
+@pytest.mark.asyncio
+async def test_overwrite_keeps_size_accounting():
+    """Test that overwriting a key replaces its size instead of adding to it."""
+    cache = MemoryCacheBackend[SimpleData]()
+    await cache.set("key", SimpleData(name="x", value=1))
+    size = cache.stats.bytes
+    await cache.set("key", SimpleData(name="x", value=2))
+    await cache.delete("missing")
+
+    assert cache.stats.bytes == size > 0
+    await cache.delete("key")
+    assert cache.stats.bytes == 0
+
+
+@pytest.mark.asyncio
+async def test_sweep_removes_expired_entries():
+    """Test that expired entries are removed without being read."""
+    cache = MemoryCacheBackend[SimpleData]()
+    await cache.set("short", SimpleData(name="short", value=1), ttl=0.1)
+    await cache.set("long", SimpleData(name="long", value=1), ttl=10)
+    await cache.set("forever", SimpleData(name="forever", value=1))
+
+    time.sleep(0.2)
+
+    assert cache.sweep() == 1
+    assert cache.stats.entries == 2
+    assert cache.stats.expirations == 1
+
+
+@pytest.mark.asyncio
+async def test_sweep_ignores_overwritten_entries():
+    """Test that an overwritten entry is not removed by its old expiry."""
+    cache = MemoryCacheBackend[SimpleData]()
+    await cache.set("key", SimpleData(name="key", value=1), ttl=0.1)
+    await cache.set("key", SimpleData(name="key", value=2), ttl=10)
+
+    time.sleep(0.2)
+
+    assert cache.sweep() == 0
+    assert await cache.get("key") == SimpleData(name="key", value=2)
+
+
+def test_unknown_eviction_policy():
+    with pytest.raises(ValueError):
+        MemoryCacheBackend(eviction="fifo")  # type: ignore[arg-type]
+
+
+@pytest.mark.asyncio
+async def test_get_many_and_set_many(cache: MemoryCacheBackend[SimpleData]):
+    """Test that batches return only the keys found."""
+    items = {f"key{i}": SimpleData(name="batch", value=i) for i in range(3)}
+    await cache.set_many(items, ttl=10)
+
+    entries = await cache.get_many(["key0", "key2", "missing"])
+    assert {key: entry.value for key, entry in entries.items()} == {
+        "key0": items["key0"],
+        "key2": items["key2"],
+    }
+    assert entries["key0"].expires_at is not None
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+
+from lagransala.shared.infrastructure import RequestScheduler
+
+
+async def _track(
+    scheduler: RequestScheduler,
+    url: str,
+    active: dict[str, int],
+    peaks: dict[str, int],
+    order: list[str],
+    duration: float = 0.02,
+) -> None:
+    async with scheduler.slot(url) as host:
+        order.append(url)
+        active[host] = active.get(host, 0) + 1
+        active["*"] = active.get("*", 0) + 1
+        peaks[host] = max(peaks.get(host, 0), active[host])
+        peaks["*"] = max(peaks.get("*", 0), active["*"])
+        await asyncio.sleep(duration)
+        active[host] -= 1
+        active["*"] -= 1
+
+
+@pytest.mark.asyncio
+async def test_global_and_per_host_limits():
+    """Test that neither the global nor the per-host cap is exceeded."""
+    scheduler = RequestScheduler(max_concurrency=3, max_per_host=2)
+    active: dict[str, int] = {}
+    peaks: dict[str, int] = {}
+    urls = [f"http://a.com/{i}" for i in range(6)] + [
+        f"http://b.com/{i}" for i in range(6)
+    ]
+
+    await asyncio.gather(*[_track(scheduler, url, active, peaks, []) for url in urls])
+
+    assert peaks["*"] == 3
+    assert peaks["a.com"] == 2
+    assert peaks["b.com"] == 2
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_round_robin_across_hosts():
+    """Test that a large batch for one host does not starve another host."""
+    scheduler = RequestScheduler(max_concurrency=1, max_per_host=1)
+    order: list[str] = []
+    urls = [f"http://a.com/{i}" for i in range(4)] + ["http://b.com/0"]
+
+    blocker = await scheduler.acquire("http://c.com/")
+    tasks = [
+        asyncio.create_task(_track(scheduler, url, {}, {}, order, duration=0))
+        for url in urls
+    ]
+    await asyncio.sleep(0)
+    scheduler.release(blocker)
+    await asyncio.gather(*tasks)
+
+    assert order.index("http://b.com/0") <= 1
+
+
+@pytest.mark.asyncio
+async def test_host_delay():
+    """Test that request starts on the same host are spaced by the delay."""
+    scheduler = RequestScheduler(max_concurrency=10, max_per_host=10, host_delay=0.05)
+    starts: list[float] = []
+
+    async def request(url: str) -> None:
+        async with scheduler.slot(url):
+            starts.append(time.monotonic())
+
+    await asyncio.gather(*[request(f"http://a.com/{i}") for i in range(3)])
+
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    assert all(gap >= 0.04 for gap in gaps)
+
+
+@pytest.mark.asyncio
+async def test_set_host_limits():
+    """Test that per-host overrides take precedence over the defaults."""
+    scheduler = RequestScheduler(max_concurrency=10, max_per_host=4)
+    scheduler.set_host_limits("a.com", max_concurrency=1, delay=0.5)
+
+    assert scheduler.host_limits("a.com") == (1, 0.5)
+    assert scheduler.host_limits("b.com") == (4, 0.0)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_releases_nothing():
+    """Test that cancelling a queued request does not leak a slot."""
+    scheduler = RequestScheduler(max_concurrency=1, max_per_host=1)
+    host = await scheduler.acquire("http://a.com/0")
+    waiter = asyncio.create_task(scheduler.acquire("http://a.com/1"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    scheduler.release(host)
+    assert scheduler.in_flight == 0
+    async with scheduler.slot("http://a.com/2"):
+        assert scheduler.in_flight == 1
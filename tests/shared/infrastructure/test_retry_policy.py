@@ -0,0 +1,43 @@
+import time
+from email.utils import formatdate
+
+from lagransala.shared.infrastructure.retry_policy import (
+    RetryPolicy,
+    parse_retry_after,
+)
+
+
+def test_parse_retry_after_seconds():
+    assert parse_retry_after("120") == 120.0
+
+
+def test_parse_retry_after_http_date():
+    delay = parse_retry_after(formatdate(time.time() + 60, usegmt=True))
+    assert delay is not None
+    assert 55 <= delay <= 60
+
+
+def test_parse_retry_after_invalid():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+
+def test_delay_is_bounded_exponential_backoff():
+    policy = RetryPolicy(backoff_base=1.0, backoff_max=5.0)
+    for attempt in range(1, 10):
+        delay = policy.delay(attempt)
+        assert 0 <= delay <= min(5.0, 2 ** (attempt - 1))
+
+
+def test_delay_honours_retry_after():
+    policy = RetryPolicy(backoff_base=0.01, backoff_max=10.0)
+    assert policy.delay(1, retry_after=3.0) == 3.0
+    assert policy.delay(1, retry_after=60.0) == 10.0
+
+
+def test_is_retryable():
+    policy = RetryPolicy()
+    assert policy.is_retryable(503)
+    assert policy.is_retryable(429)
+    assert not policy.is_retryable(404)
+    assert not policy.is_retryable(200)
@@ -0,0 +1,257 @@
+import asyncio
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from pydantic import BaseModel
+
+from lagransala.shared.infrastructure import SqliteCacheBackend
+
+
+class SimpleData(BaseModel):
+    name: str
+    value: int
+
+
+@pytest_asyncio.fixture(loop_scope="function")
+async def cache(tmp_path: Path):
+    backend = SqliteCacheBackend(SimpleData, str(tmp_path / "cache.sqlite"))
+    yield backend
+    await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_set_and_get(cache: SqliteCacheBackend[SimpleData]):
+    """Test that queued and committed values are returned."""
+    data = SimpleData(name="test", value=1)
+    await cache.set("key", data)
+
+    assert await cache.get("key") == data
+    await cache.flush()
+    assert await cache.get("key") == data
+    assert await cache.get("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_set_with_ttl(cache: SqliteCacheBackend[SimpleData]):
+    """Test that entries expire after their TTL, committed or not."""
+    await cache.set("queued", SimpleData(name="queued", value=1), ttl=0.1)
+    await cache.set("committed", SimpleData(name="committed", value=1), ttl=0.1)
+    await cache.flush()
+    await cache.set("queued", SimpleData(name="queued", value=1), ttl=0.1)
+
+    time.sleep(0.2)
+
+    assert await cache.get("queued") is None
+    assert await cache.get("committed") is None
+
+
+@pytest.mark.asyncio
+async def test_get_entry_with_soft_ttl(cache: SqliteCacheBackend[SimpleData]):
+    """Test that soft TTLs survive a round trip through the database."""
+    await cache.set("key", SimpleData(name="soft", value=1), ttl=10, soft_ttl=0.1)
+    await cache.flush()
+    time.sleep(0.2)
+
+    entry = await cache.get_entry("key")
+    assert entry is not None and entry.is_stale()
+    assert entry.expires_at is not None
+
+
+@pytest.mark.asyncio
+async def test_delete(cache: SqliteCacheBackend[SimpleData]):
+    """Test that deletes hide queued and committed values."""
+    await cache.set("key", SimpleData(name="test", value=1))
+    await cache.flush()
+    await cache.delete("key")
+    await cache.delete("missing")
+
+    assert await cache.get("key") is None
+    await cache.flush()
+    assert await cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_writes_are_batched(cache: SqliteCacheBackend[SimpleData]):
+    """Test that queued writes are committed together in the background."""
+    with patch.object(cache, "_write_batch", wraps=cache._write_batch) as write_batch:
+        for i in range(50):
+            await cache.set(f"key{i}", SimpleData(name="batch", value=i))
+        assert write_batch.call_count == 0
+
+        assert cache._writer is not None
+        await cache._writer
+
+    assert write_batch.call_count == 1
+    assert len(write_batch.call_args.args[0]) == 50
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_written_at_once(tmp_path: Path):
+    """Test that reaching batch_size does not wait for the flush interval."""
+    cache = SqliteCacheBackend(
+        SimpleData, str(tmp_path / "cache.sqlite"), batch_size=2, flush_interval=60
+    )
+    await cache.set("a", SimpleData(name="a", value=1))
+    await cache.set("b", SimpleData(name="b", value=2))
+    assert cache._writer is not None
+    await cache._writer
+    await cache.close()
+
+    with closing(sqlite3.connect(tmp_path / "cache.sqlite")) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM cache").fetchone() == (2,)
+
+
+@pytest.mark.asyncio
+async def test_close_persists_queued_writes(tmp_path: Path):
+    """Test that entries are visible to a new backend after close."""
+    path = str(tmp_path / "cache.sqlite")
+    cache = SqliteCacheBackend(SimpleData, path, flush_interval=60)
+    await cache.set("key", SimpleData(name="persisted", value=1))
+    await cache.close()
+
+    reopened = SqliteCacheBackend(SimpleData, path)
+    assert await reopened.get("key") == SimpleData(name="persisted", value=1)
+    with closing(sqlite3.connect(path)) as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    await reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_purge_expired(cache: SqliteCacheBackend[SimpleData]):
+    """Test that expired entries are deleted in one statement."""
+    await cache.set("short", SimpleData(name="short", value=1), ttl=0.1)
+    await cache.set("long", SimpleData(name="long", value=1), ttl=10)
+    await cache.set("forever", SimpleData(name="forever", value=1))
+    time.sleep(0.2)
+
+    assert await cache.purge_expired() == 1
+    assert await cache.get("long") is not None
+
+
+@pytest.mark.asyncio
+async def test_tables_are_independent(tmp_path: Path):
+    """Test that backends on different tables of one file do not collide."""
+    path = str(tmp_path / "cache.sqlite")
+    first = SqliteCacheBackend(SimpleData, path, table="first")
+    second = SqliteCacheBackend(SimpleData, path, table="second")
+    await first.set("key", SimpleData(name="first", value=1))
+    await first.close()
+
+    assert await second.get("key") is None
+    await second.close()
+
+
+def test_invalid_table_name(tmp_path: Path):
+    with pytest.raises(ValueError):
+        SqliteCacheBackend(SimpleData, str(tmp_path / "c.sqlite"), table="x; --")
+
+
+@pytest.mark.asyncio
+async def test_get_many_and_set_many(cache: SqliteCacheBackend[SimpleData]):
+    """Test that batches combine queued and committed entries."""
+    items = {f"key{i}": SimpleData(name="batch", value=i) for i in range(600)}
+    await cache.set_many(items, ttl=10)
+    await cache.flush()
+    await cache.set("queued", SimpleData(name="queued", value=1))
+    await cache.delete("key1")
+
+    entries = await cache.get_many([*items, "queued", "missing"])
+
+    assert len(entries) == 600
+    assert "key1" not in entries
+    assert entries["key599"].value == items["key599"]
+    assert entries["queued"].value == SimpleData(name="queued", value=1)
+
+
+@pytest.mark.asyncio
+async def test_values_are_compressed_and_json_rows_still_read(
+    cache: SqliteCacheBackend[SimpleData],
+):
+    """Test that values are stored compressed, next to rows of plain JSON."""
+    data = SimpleData(name="<p>event</p>" * 100, value=1)
+    await cache.set("compressed", data)
+    await cache.flush()
+    with closing(sqlite3.connect(cache.path)) as connection, connection:
+        connection.execute(
+            "INSERT INTO cache (key, data) VALUES (?, ?)",
+            ("json", SimpleData(name="json", value=2).model_dump_json()),
+        )
+        (stored,) = connection.execute(
+            "SELECT data FROM cache WHERE key = 'compressed'"
+        ).fetchone()
+
+    assert isinstance(stored, bytes)
+    assert len(stored) < len(data.model_dump_json()) / 10
+    assert await cache.get("compressed") == data
+    assert await cache.get("json") == SimpleData(name="json", value=2)
+
+
+@pytest.mark.asyncio
+async def test_failed_writes_are_dropped(tmp_path: Path):
+    """Test that writes that keep failing are dropped instead of retried forever."""
+    cache = SqliteCacheBackend(
+        SimpleData,
+        str(tmp_path / "cache.sqlite"),
+        flush_interval=0.01,
+        max_write_attempts=2,
+    )
+    error = sqlite3.OperationalError("database or disk is full")
+    with patch.object(cache, "_write_batch", side_effect=error) as write_batch:
+        await cache.set("key", SimpleData(name="lost", value=1))
+        assert cache._writer is not None
+        await asyncio.wait_for(cache._writer, 1)
+
+        assert write_batch.call_count == 2
+        assert not cache._pending
+        await cache.close()
+
+
+@pytest.mark.asyncio
+async def test_close_raises_when_writes_fail(tmp_path: Path):
+    """Test that close raises, instead of hanging, if the writes cannot be committed."""
+    cache = SqliteCacheBackend(
+        SimpleData, str(tmp_path / "cache.sqlite"), flush_interval=60
+    )
+    error = sqlite3.OperationalError("attempt to write a readonly database")
+    with patch.object(cache, "_write_batch", side_effect=error):
+        await cache.set("key", SimpleData(name="lost", value=1))
+        with pytest.raises(sqlite3.OperationalError):
+            await asyncio.wait_for(cache.close(), 1)
+
+    assert not cache._pending
+
+
+@pytest.mark.asyncio
+async def test_failed_commit_is_rolled_back(tmp_path: Path):
+    """Test that a batch whose COMMIT failed can be written again."""
+    path = str(tmp_path / "cache.sqlite")
+    cache = SqliteCacheBackend(SimpleData, path, flush_interval=60)
+    connection = cache._write_connection
+
+    class FailingCommit:
+        failed = False
+
+        def execute(self, sql: str, *args):
+            if sql == "COMMIT" and not self.failed:
+                self.failed = True
+                raise sqlite3.OperationalError("database is locked")
+            return connection.execute(sql, *args)
+
+        def __getattr__(self, name: str):
+            return getattr(connection, name)
+
+    cache._write_connection = FailingCommit()  # type: ignore[assignment]
+    await cache.set("key", SimpleData(name="retried", value=1))
+    with pytest.raises(sqlite3.OperationalError):
+        await cache.flush()
+    await cache.flush()
+    cache._write_connection = connection
+    await cache.close()
+
+    with closing(sqlite3.connect(path)) as reader:
+        assert reader.execute("SELECT COUNT(*) FROM cache").fetchone() == (1,)
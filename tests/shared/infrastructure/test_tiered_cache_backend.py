@@ -0,0 +1,118 @@
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+from pydantic import BaseModel
+
+from lagransala.shared.infrastructure import (
+    FileCacheBackend,
+    MemoryCacheBackend,
+    TieredCacheBackend,
+)
+
+
+class SimpleData(BaseModel):
+    name: str
+    value: int
+
+
+@pytest.fixture
+def l1() -> MemoryCacheBackend[SimpleData]:
+    return MemoryCacheBackend[SimpleData]()
+
+
+@pytest.fixture
+def l2(tmp_path: Path) -> FileCacheBackend[SimpleData]:
+    return FileCacheBackend(SimpleData, cache_dir=str(tmp_path / "cache"))
+
+
+@pytest.mark.asyncio
+async def test_set_writes_through_both_tiers(l1, l2):
+    cache = TieredCacheBackend(l1, l2)
+    data = SimpleData(name="test", value=1)
+    await cache.set("key", data, ttl=10)
+
+    assert await l1.get("key") == data
+    assert await l2.get("key") == data
+    assert await cache.get("key") == data
+
+
+@pytest.mark.asyncio
+async def test_l1_hit_skips_l2(l1, l2):
+    cache = TieredCacheBackend(l1, l2)
+    await cache.set("key", SimpleData(name="test", value=1))
+    l2.get_entry = AsyncMock()
+
+    assert await cache.get("key") is not None
+    l2.get_entry.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_l2_hit_is_promoted_with_its_expiry(l1, l2):
+    cache = TieredCacheBackend(l1, l2)
+    data = SimpleData(name="test", value=1)
+    await l2.set("key", data, ttl=0.3, soft_ttl=0.1)
+
+    entry = await cache.get_entry("key")
+    assert entry is not None and entry.value == data
+
+    promoted = await l1.get_entry("key")
+    assert promoted is not None and promoted.value == data
+    assert promoted.expires_at == pytest.approx(entry.expires_at, abs=0.05)
+    assert promoted.stale_at == pytest.approx(entry.stale_at, abs=0.05)
+
+    time.sleep(0.4)
+    assert await cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_delete_removes_from_both_tiers(l1, l2):
+    cache = TieredCacheBackend(l1, l2)
+    await cache.set("key", SimpleData(name="test", value=1))
+    await cache.delete("key")
+
+    assert await l1.get("key") is None
+    assert await l2.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_write_behind(l1, l2):
+    cache = TieredCacheBackend(l1, l2, write_behind=True)
+    await cache.set("key", SimpleData(name="first", value=1), ttl=10)
+    await cache.set("key", SimpleData(name="second", value=2), ttl=10)
+    await cache.set("gone", SimpleData(name="gone", value=3))
+    await cache.delete("gone")
+
+    assert await cache.get("key") == SimpleData(name="second", value=2)
+    await cache.flush()
+
+    entry = await l2.get_entry("key")
+    assert entry is not None and entry.value == SimpleData(name="second", value=2)
+    assert entry.expires_at is not None and entry.expires_at > time.time() + 9
+    assert await l2.get("gone") is None
+
+
+@pytest.mark.asyncio
+async def test_write_behind_failure_is_logged(l1, caplog):
+    l2 = AsyncMock()
+    l2.set.side_effect = OSError("disk full")
+    cache = TieredCacheBackend(l1, l2, write_behind=True)
+    await cache.set("key", SimpleData(name="test", value=1))
+    await cache.flush()
+
+    assert await cache.get("key") is not None
+    assert "second cache tier" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_get_many_promotes_l2_hits(l1, l2):
+    cache = TieredCacheBackend(l1, l2)
+    await cache.set_many({"a": SimpleData(name="a", value=1)}, ttl=10)
+    await l2.set("b", SimpleData(name="b", value=2), ttl=10)
+
+    entries = await cache.get_many(["a", "b", "c"])
+
+    assert set(entries) == {"a", "b"}
+    assert await l1.get("b") == SimpleData(name="b", value=2)
+    assert await l2.get("a") == SimpleData(name="a", value=1)
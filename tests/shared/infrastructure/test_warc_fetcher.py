@@ -0,0 +1,102 @@
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+
+from lagransala.shared.domain.fetcher import FetchError, Response
+from lagransala.shared.infrastructure import WarcRecordingFetcher, WarcReplayFetcher
+from lagransala.shared.infrastructure.warc import read_warc
+
+
+@pytest.fixture
+def responses() -> dict[str, Response]:
+    return {
+        "http://example.com/": Response(
+            status=200,
+            content="<html>Programación</html>",
+            content_type="text/html",
+            etag='"v1"',
+        ),
+        "http://example.com/missing?q=1": Response(
+            status=404, content="", content_type="text/html"
+        ),
+        "http://example.com/file.pdf": Response(
+            status=200, content="", content_type="application/pdf", discarded=True
+        ),
+    }
+
+
+@pytest.mark.parametrize("filename", ["crawl.warc", "crawl.warc.gz"])
+@pytest.mark.asyncio
+async def test_record_and_replay(
+    tmp_path: Path, responses: dict[str, Response], filename: str
+):
+    """Test that recorded exchanges are served back identically on replay."""
+    path = tmp_path / filename
+    inner = AsyncMock()
+    inner.fetch.side_effect = lambda url: responses[url]
+    recorder = WarcRecordingFetcher(inner, path)
+
+    for url in responses:
+        await recorder.fetch(url)
+
+    records = list(read_warc(path))
+    assert [r.type for r in records] == ["warcinfo"] + ["response", "request"] * 3
+
+    replay = WarcReplayFetcher(path)
+    for url, expected in responses.items():
+        assert await replay.fetch(url) == expected
+
+
+@pytest.mark.asyncio
+async def test_replay_unknown_url(tmp_path: Path, responses: dict[str, Response]):
+    """Test that URLs missing from the archive raise FetchError."""
+    path = tmp_path / "crawl.warc.gz"
+    inner = AsyncMock()
+    inner.fetch.side_effect = lambda url: responses[url]
+    await WarcRecordingFetcher(inner, path).fetch("http://example.com/")
+
+    replay = WarcReplayFetcher(path, latency=0.01)
+    with pytest.raises(FetchError):
+        await replay.fetch("http://example.com/other")
+
+    results = dict(
+        [r async for r in replay.iter_fetch(["http://example.com/", "http://x.com/"])]
+    )
+    assert isinstance(results["http://example.com/"], Response)
+    assert isinstance(results["http://x.com/"], FetchError)
+
+
+@pytest.mark.asyncio
+async def test_replay_iter_fetch_bounds_in_flight(
+    tmp_path: Path, responses: dict[str, Response]
+):
+    """Test that replays keep at most `max_in_flight` requests outstanding."""
+    path = tmp_path / "crawl.warc"
+    inner = AsyncMock()
+    inner.fetch.side_effect = lambda url: responses[url]
+    await WarcRecordingFetcher(inner, path).fetch("http://example.com/")
+
+    replay = WarcReplayFetcher(path, latency=0.01)
+    in_flight = peak = 0
+    fetch = replay.fetch
+
+    async def tracked(url: str) -> Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            return await fetch(url)
+        finally:
+            in_flight -= 1
+
+    replay.fetch = tracked  # type: ignore[method-assign]
+    urls = ["http://example.com/"] * 6
+    results = [r async for r in replay.iter_fetch(urls, max_in_flight=2)]
+
+    assert len(results) == 6
+    assert peak == 2
+
+    with pytest.raises(ValueError):
+        async for _ in replay.iter_fetch(urls, max_in_flight=0):
+            pass
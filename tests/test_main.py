@@ -1,8 +1,10 @@
-from unittest.mock import patch
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
 
 from typer.testing import CliRunner
 
 from lagransala.__main__ import app
+from lagransala.shared.application import CacheMetricsRegistry
 
 runner = CliRunner()
 
@@ -30,3 +32,84 @@ def test_app():
         mock_logging.getLogger.return_value.setLevel.assert_called_with(
             mock_logging.INFO
         )
+
+
+def test_cache_gc(tmp_path):
+    with patch("lagransala.__main__.collect_garbage") as mock_collect_garbage:
+        mock_collect_garbage.return_value = "report"
+        result = runner.invoke(
+            app, ["cache", "gc", "--path", str(tmp_path), "--max-size", "1M"]
+        )
+        assert result.exit_code == 0
+        assert "Reclaimed: report" in result.output
+        mock_collect_garbage.assert_called_once_with(
+            tmp_path, max_bytes=1024**2, dry_run=False
+        )
+
+        result = runner.invoke(app, ["cache", "gc", "--max-size", "lots"])
+        assert result.exit_code != 0
+
+
+def test_cache_gc_namespaces():
+    with patch("lagransala.__main__.collect_garbage") as mock_collect_garbage:
+        mock_collect_garbage.return_value = "report"
+        result = runner.invoke(app, ["cache", "gc"])
+        assert result.exit_code == 0
+        assert "Reclaimed from http: report" in result.output
+        assert "Reclaimed from extract: report" in result.output
+        mock_collect_garbage.assert_any_call(
+            ".cache/http", max_bytes=2 * 1024**3, dry_run=False
+        )
+        mock_collect_garbage.assert_any_call(
+            ".cache/extract", max_bytes=None, dry_run=False
+        )
+
+        mock_collect_garbage.reset_mock()
+        result = runner.invoke(
+            app, ["cache", "gc", "--namespace", "extract", "--dry-run"]
+        )
+        assert result.exit_code == 0
+        assert "Would reclaim from extract: report" in result.output
+        mock_collect_garbage.assert_called_once_with(
+            ".cache/extract", max_bytes=None, dry_run=True
+        )
+
+        result = runner.invoke(app, ["cache", "gc", "--namespace", "nope"])
+        assert result.exit_code != 0
+
+
+def test_cache_stats(tmp_path):
+    metrics_path = tmp_path / "metrics.json"
+    with patch("lagransala.__main__.summarize_cache") as mock_summarize_cache:
+        mock_summarize_cache.return_value = "summary"
+        result = runner.invoke(app, ["cache", "stats", "--metrics", str(metrics_path)])
+        assert result.exit_code == 0
+        assert "http: summary" in result.output
+        assert "extract: summary" in result.output
+        assert "No metrics of a previous run." in result.output
+
+        registry = CacheMetricsRegistry()
+        registry.labels("http").hits = 3
+        registry.save(metrics_path)
+        result = runner.invoke(
+            app,
+            ["cache", "stats", "--namespace", "http", "--metrics", str(metrics_path)],
+        )
+        assert result.exit_code == 0
+        assert "extract: summary" not in result.output
+        assert "  http: 3 hits" in result.output
+
+
+def test_cache_warm():
+    with patch(
+        "lagransala.__main__.warm_event_discovery_cache", new_callable=AsyncMock
+    ) as mock_warm:
+        mock_warm.return_value = "report"
+        result = runner.invoke(
+            app, ["cache", "warm", "--refresh-within", "2", "--at", "2025-01-31"]
+        )
+        assert result.exit_code == 0
+        assert "Warmed: report" in result.output
+        mock_warm.assert_awaited_once_with(
+            refresh_within=7200.0, max_in_flight=2, at=datetime(2025, 1, 31)
+        )